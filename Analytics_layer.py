@@ -1,22 +1,27 @@
-import json
 import pandas as pd
-from redis_client import redis_client
+from redis_cache import get_cached, namespace_generation
 
 CACHE_KEY = "exam_candidates:v1"
+DATASET_NAMESPACE = "exam_candidates"
+
+
+def dataset_version() -> int:
+    """
+    Version of the exam dataset snapshot; admin_refresh_cache bumps it on
+    every refresh so results computed from older data are never reused.
+    """
+    return namespace_generation(DATASET_NAMESPACE)
 
 
 def get_exam_dataset() -> pd.DataFrame:
-    cached = redis_client.get(CACHE_KEY)
+    df = get_cached(CACHE_KEY)
 
-    if not cached:
+    if df is None:
         raise RuntimeError("❌ Exam dataset not found in Redis. Run admin cache refresh.")
 
-    data = json.loads(cached)
-    df = pd.DataFrame(data)
-
     # Precompute Age once
     if "DateOfBirth" in df.columns:
         dob = pd.to_datetime(df["DateOfBirth"], errors="coerce")
         df["Age"] = pd.Timestamp.today().year - dob.dt.year
 
-    return df
\ No newline at end of file
+    return df
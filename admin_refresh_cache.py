@@ -1,6 +1,5 @@
-import json
 import pandas as pd
-from redis_client import redis_client
+from redis_cache import set_cached, bump_namespace
 from db_connection import create_connection
 
 CACHE_KEY = "exam_candidates:v1"
@@ -26,18 +25,16 @@ if "DateOfBirth" in df.columns:
     df["DateOfBirth"] = pd.to_datetime(df["DateOfBirth"], errors="coerce")
     df["Age"] = pd.Timestamp.today().year - df["DateOfBirth"].dt.year
 
-# ============================
-# ✅ FORCE convert ALL Timestamp values
-# ============================
-def safe_json_value(x):
-    if isinstance(x, (pd.Timestamp,)):
-        return str(x)
-    return x
+# Stored as an Arrow snapshot (see cache_serializers.py): Timestamps and
+# numeric dtypes survive the round-trip, so no JSON coercion is needed.
+# Nothing is bumped unless the snapshot landed: a refused write (e.g. over
+# the namespace budget) would otherwise point readers at a missing dataset.
+if not set_cached(CACHE_KEY, df, ttl=None):
+    raise RuntimeError(f"❌ Redis did not accept the dataset under '{CACHE_KEY}' (cache budget?); nothing was bumped.")
 
-df = df.applymap(safe_json_value)
+# Dataset changed → drop every cached distinct-value list in O(1) and move
+# to a new dataset version (cached report results are keyed by it)
+bump_namespace("distinct")
+bump_namespace("exam_candidates")
 
-records = df.to_dict(orient="records")
-
-redis_client.set(CACHE_KEY, json.dumps(records))
-
-print(f"✅ Cached {len(records):,} records into Redis under key '{CACHE_KEY}'")
\ No newline at end of file
+print(f"✅ Cached {len(df):,} records into Redis under key '{CACHE_KEY}'")
\ No newline at end of file
@@ -0,0 +1,252 @@
+# artifact_store.py
+# Content-addressed storage for generated files (report and invoice PDFs).
+# An artifact is named by the SHA-256 of its bytes, so identical outputs are
+# stored once. The returned ref ("<sha256><ext>") is what goes into the DB
+# (invoices.pdf, user_reports.pdf_path).
+#
+# Local layout (sharded so no directory grows unbounded):
+#   <ARTIFACT_ROOT>/ab/cd/abcd…ef.pdf
+#
+# Other backends (e.g. object storage) plug in via register_backend().
+#
+# Garbage collection: `python artifact_store.py gc [--dry-run]`
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local")
+ARTIFACT_ROOT = os.getenv("ARTIFACT_ROOT", "artifacts")
+# Unreferenced artifacts younger than this are kept (a job may not have saved its ref yet)
+ARTIFACT_GC_GRACE = int(os.getenv("ARTIFACT_GC_GRACE", str(60 * 60 * 24 * 7)))
+CHUNK_SIZE = 64 * 1024
+
+metrics.describe("artifact_writes_total", "Artifacts stored, by whether the content already existed")
+metrics.describe("artifact_bytes_written_total", "Bytes written to the artifact store")
+metrics.describe("artifact_gc_deleted_total", "Artifacts removed by garbage collection")
+
+
+# =========================================================
+# BACKENDS
+# =========================================================
+class LocalArtifactBackend:
+    """Artifacts as files under a sharded directory tree."""
+
+    def __init__(self, root: str = ARTIFACT_ROOT):
+        self.root = root
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.root, ref[:2], ref[2:4], ref)
+
+    def exists(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref))
+
+    def touch(self, ref: str) -> bool:
+        """Marks an existing artifact as just written (keeps GC off it). False if absent."""
+        try:
+            os.utime(self._path(ref))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put(self, ref: str, data: bytes):
+        path = self._path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_file(self, ref: str, src_path: str):
+        """Moves an already-written file into place (no copy through memory)."""
+        path = self._path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(src_path, path)
+
+    def open(self, ref: str):
+        return open(self._path(ref), "rb")
+
+    def delete(self, ref: str) -> int:
+        path = self._path(ref)
+        size = os.path.getsize(path)
+        os.remove(path)
+        # Drop shard directories left empty
+        for shard in (os.path.dirname(path), os.path.dirname(os.path.dirname(path))):
+            try:
+                os.rmdir(shard)
+            except OSError:
+                break
+        return size
+
+    def list(self):
+        """Yields (ref, size, modified time) for every stored artifact."""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(dirpath, name))
+                yield name, stat.st_size, stat.st_mtime
+
+
+BACKENDS = {
+    "local": LocalArtifactBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def register_backend(name: str, factory):
+    """
+    Plug in another storage backend. `factory()` must return an object with
+    exists/touch/put/put_file/open/delete/list like LocalArtifactBackend.
+    """
+    BACKENDS[name] = factory
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = BACKENDS[ARTIFACT_BACKEND]()
+        return _backend
+
+
+# =========================================================
+# PUBLIC API
+# =========================================================
+def is_artifact_ref(value) -> bool:
+    """Refs are bare '<sha256><ext>' names; anything with a directory is a legacy file path."""
+    return bool(value) and os.sep not in value and "/" not in value and len(value.split(".", 1)[0]) == 64
+
+
+def put_bytes(data: bytes, ext: str = ".pdf") -> str:
+    """
+    Stores `data` and returns its ref. Identical content is written once;
+    storing it again refreshes its age so GC's grace period starts over.
+    """
+    ref = hashlib.sha256(data).hexdigest() + ext
+    backend = get_backend()
+    if backend.touch(ref):
+        metrics.inc("artifact_writes_total", deduplicated="true")
+        return ref
+    backend.put(ref, data)
+    metrics.inc("artifact_writes_total", deduplicated="false")
+    metrics.inc("artifact_bytes_written_total", len(data))
+    return ref
+
+
+def put_file(path: str, ext: str) -> str:
+    """
+    Like put_bytes for output already written to `path` (large exports):
+    hashed in chunks and moved into the store. `path` is consumed.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    ref = digest.hexdigest() + ext
+    backend = get_backend()
+    if backend.touch(ref):
+        os.remove(path)
+        metrics.inc("artifact_writes_total", deduplicated="true")
+        return ref
+    size = os.path.getsize(path)
+    backend.put_file(ref, path)
+    metrics.inc("artifact_writes_total", deduplicated="false")
+    metrics.inc("artifact_bytes_written_total", size)
+    return ref
+
+
+def open_artifact(ref: str):
+    """
+    Binary file object for streaming reads (e.g. st.download_button).
+    Legacy DB values that are plain file paths are opened directly.
+    """
+    if is_artifact_ref(ref):
+        return get_backend().open(ref)
+    return open(ref, "rb")
+
+
+def read_artifact(ref: str) -> bytes:
+    with open_artifact(ref) as f:
+        return f.read()
+
+
+def iter_artifact(ref: str, chunk_size: int = CHUNK_SIZE):
+    """Yields the artifact in chunks without loading it whole."""
+    with open_artifact(ref) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+# =========================================================
+# GARBAGE COLLECTION
+# =========================================================
+def live_refs(engine) -> set:
+    """
+    Refs still in use: PDFs of reports that have not expired, and invoice PDFs.
+    Artifacts of expired user_reports drop out of this set.
+    """
+    import pandas as pd
+    from sqlalchemy import text
+
+    reports = pd.read_sql(text("SELECT pdf_path FROM user_reports WHERE expires_at > NOW()"), engine)
+    invoices = pd.read_sql(text("SELECT pdf FROM invoices WHERE pdf IS NOT NULL"), engine)
+    return set(reports["pdf_path"].dropna()) | set(invoices["pdf"].dropna())
+
+
+def collect_garbage(referenced: set, grace: int = ARTIFACT_GC_GRACE, dry_run: bool = False) -> dict:
+    """
+    Deletes artifacts that no live row references and that are older than
+    `grace` seconds. Returns {"deleted", "bytes_freed", "kept"}.
+    """
+    backend = get_backend()
+    cutoff = time.time() - grace
+    deleted, freed, kept = 0, 0, 0
+    for ref, size, modified in list(backend.list()):
+        if ref in referenced or modified > cutoff:
+            kept += 1
+            continue
+        if not dry_run:
+            backend.delete(ref)
+            metrics.inc("artifact_gc_deleted_total")
+        deleted += 1
+        freed += size
+    logger.info("artifact gc: %d deleted (%d bytes), %d kept%s",
+                deleted, freed, kept, " [dry run]" if dry_run else "")
+    return {"deleted": deleted, "bytes_freed": freed, "kept": kept}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "gc":
+        print("Usage: python artifact_store.py gc [--dry-run]")
+        sys.exit(1)
+
+    from db_connection import create_connection
+
+    engine = create_connection()
+    if engine is None:
+        raise RuntimeError("❌ Could not connect to database.")
+
+    dry_run = "--dry-run" in sys.argv
+    summary = collect_garbage(live_refs(engine), dry_run=dry_run)
+    print(f"🧹 {'Would delete' if dry_run else 'Deleted'} {summary['deleted']} artifact(s), "
+          f"{summary['bytes_freed']:,} bytes; kept {summary['kept']}")
@@ -1,21 +1,27 @@
 # auth_utils.py
 import streamlit as st
+from streamlit.errors import StreamlitDuplicateElementKey
 from streamlit_cookies_manager import EncryptedCookieManager
 import os
 import time
 from datetime import datetime, timedelta
+from session_manager import delete_session
+
+def _new_cookie_manager():
+    """Renders the cookie component: writes any queued cookies and reads the browser's back."""
+    # Use environment variable for production, or a default for development
+    secret_key = os.getenv("COOKIE_SECRET_KEY", "edustat-default-secret-key-change-in-production")
+    
+    return EncryptedCookieManager(
+        prefix="edustat_",
+        password=secret_key
+    )
 
 def get_cookie_manager():
     """Initialize and return the cookie manager (singleton pattern)"""
     # Check if cookie manager already exists in session state
     if "cookie_manager" not in st.session_state:
-        # Use environment variable for production, or a default for development
-        secret_key = os.getenv("COOKIE_SECRET_KEY", "edustat-default-secret-key-change-in-production")
-        
-        cookies = EncryptedCookieManager(
-            prefix="edustat_",
-            password=secret_key
-        )
+        cookies = _new_cookie_manager()
         
         # Wait for cookies to be ready
         if not cookies.ready():
@@ -26,6 +32,25 @@ def get_cookie_manager():
     
     return st.session_state.cookie_manager
 
+def cookies_pending():
+    """True while cookies set by login_user have not been confirmed stored by the browser."""
+    # streamlit_cookies_manager keeps unconfirmed writes here until the browser reports them back
+    return bool(st.session_state.get("CookieManager.queue"))
+
+def sync_cookies():
+    """
+    Re-syncs with the browser while cookies are pending; True once they are
+    stored. No fixed sleep: the cookie component reruns the script as soon as
+    the browser reports the new cookies.
+    """
+    if not cookies_pending():
+        return True
+    try:
+        st.session_state.cookie_manager = _new_cookie_manager()
+    except StreamlitDuplicateElementKey:
+        pass  # already synced in this script run
+    return not cookies_pending()
+
 def check_authentication():
     """
     Check if user is authenticated via cookies.
@@ -96,10 +121,7 @@ def login_user(username, user_email="", user_id=""):
         cookies["user_email"] = str(user_email)
         cookies["user_id"] = str(user_id)
         cookies["login_time"] = login_time
-        cookies.save()
-        
-        # Give cookies time to save before redirect
-        time.sleep(0.5)
+        cookies.save()  # confirmed later by sync_cookies(), before leaving the login page
     except Exception as e:
         st.error(f"Cookie save error: {e}")
 
@@ -109,6 +131,11 @@ def logout_user():
     """
     cookies = get_cookie_manager()
     
+    # End the server-side session (see session_manager.py)
+    session_token = st.session_state.pop("session_token", None)
+    if session_token:
+        delete_session(session_token)
+    
     # Clear session state
     st.session_state.logged_in = False
     st.session_state.username = ""
@@ -0,0 +1,54 @@
+# bench_cache_serializers.py
+# Measures encode/decode CPU time and payload size for each cache serializer.
+# Usage: python bench_cache_serializers.py [rows]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_serializers import SERIALIZERS, encode, decode
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+REPEAT = 5
+
+
+def sample_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "ExamYear": rng.integers(2015, 2025, rows),
+        "Sex": rng.choice(["Male", "Female"], rows),
+        "State": rng.choice(["Lagos", "Kano", "Oyo", "Rivers", "Enugu"], rows),
+        "Age": rng.integers(14, 25, rows),
+        "DateOfBirth": pd.to_datetime("2005-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D"),
+    })
+
+
+def time_it(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench(label, data, serializer):
+    payload = encode(data, serializer)
+    enc_ms = time_it(lambda: encode(data, serializer))
+    dec_ms = time_it(lambda: decode(payload))
+    print(f"{label:<28}{serializer:<10}{enc_ms:>10.2f}{dec_ms:>10.2f}{len(payload) / 1024:>12.1f}")
+
+
+df = sample_frame(ROWS)
+records = df.astype({"DateOfBirth": str}).to_dict(orient="records")
+distinct = sorted(df["State"].unique().tolist())
+ages = df["Age"].to_numpy()
+
+print(f"{'value':<28}{'format':<10}{'enc ms':>10}{'dec ms':>10}{'size KiB':>12}")
+for serializer in ("json", "orjson"):
+    if serializer in SERIALIZERS:
+        bench(f"records x{ROWS:,}", records, serializer)
+        bench("distinct list", distinct, serializer)
+bench(f"DataFrame x{ROWS:,}", df, "arrow")
+bench(f"int array x{ROWS:,}", ages, "npy")
@@ -0,0 +1,277 @@
+# cache_budget.py
+# Per-namespace byte budgets and priorities for everything redis_cache writes.
+#
+# Bookkeeping (approximate, shared by all app processes):
+#   cache:usage:<ns>  sorted set  member = redis key, score = expiry (unix time)
+#   cache:sizes:<ns>  hash        redis key -> payload bytes
+#   cache:bytes       hash        namespace -> total payload bytes
+import logging
+import os
+import time
+
+from redis_client import redis_binary_client as redis_client
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# priority: higher survives longer; lower-priority namespaces are evicted first.
+# protected: never evicted to make room for other writes (the app needs it).
+NAMESPACE_POLICIES = {
+    "session":         {"ttl": 60 * 60 * 4,  "budget_bytes": 64 * MB,   "max_item_bytes": 64 * 1024, "priority": 100},
+    "distinct":        {"ttl": 60 * 60 * 6,  "budget_bytes": 16 * MB,   "max_item_bytes": 2 * MB,    "priority": 80},
+    "exam_candidates": {"ttl": None,         "budget_bytes": 1024 * MB, "max_item_bytes": 1024 * MB, "priority": 60,
+                        "protected": True},
+    "user_profile":    {"ttl": 60 * 60,      "budget_bytes": 16 * MB,   "max_item_bytes": 1024,      "priority": 50},
+    "report":          {"ttl": 60 * 60 * 24, "budget_bytes": 256 * MB,  "max_item_bytes": 16 * MB,   "priority": 40},
+    "report_export":   {"ttl": 60 * 60 * 24, "budget_bytes": 4 * MB,    "max_item_bytes": 1024,      "priority": 40},
+    "invoice_pdf":     {"ttl": 60 * 60 * 24, "budget_bytes": 4 * MB,    "max_item_bytes": 1024,      "priority": 40},
+}
+DEFAULT_POLICY = {"ttl": 60 * 60 * 6, "budget_bytes": 64 * MB, "max_item_bytes": 4 * MB, "priority": 10}
+
+CACHE_TOTAL_BUDGET_BYTES = int(os.getenv("CACHE_TOTAL_BUDGET_BYTES", str(1536 * MB)))
+
+# Redis maxmemory policies that never evict keys without a TTL
+# (exam snapshot, generation counters) - we rely on our own budgets instead.
+RECOMMENDED_EVICTION_POLICIES = ("volatile-lfu", "volatile-lru", "volatile-ttl")
+
+NO_EXPIRY_SCORE = float("inf")
+
+USAGE_KEY = "cache:usage:{namespace}"
+SIZES_KEY = "cache:sizes:{namespace}"
+BYTES_KEY = "cache:bytes"
+
+metrics.describe("cache_refused_total", "Writes refused by the budgets, by reason (item_size, total_budget)")
+
+
+def policy_for(namespace: str) -> dict:
+    return NAMESPACE_POLICIES.get(namespace, DEFAULT_POLICY)
+
+
+def _as_str(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _forget(namespace: str, members: list):
+    """Drops bookkeeping for keys that expired or were evicted."""
+    if not members:
+        return 0
+    sizes = redis_client.hmget(SIZES_KEY.format(namespace=namespace), members)
+    freed = sum(int(s) for s in sizes if s is not None)
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zrem(USAGE_KEY.format(namespace=namespace), *members)
+        pipe.hdel(SIZES_KEY.format(namespace=namespace), *members)
+        pipe.hincrby(BYTES_KEY, namespace, -freed)
+        pipe.execute()
+    return freed
+
+
+def prune_expired(namespace: str):
+    """Removes bookkeeping for keys whose TTL has passed."""
+    expired = redis_client.zrangebyscore(USAGE_KEY.format(namespace=namespace), "-inf", time.time())
+    _forget(namespace, expired)
+
+
+def namespace_usage(namespace: str) -> int:
+    return max(int(redis_client.hget(BYTES_KEY, namespace) or 0), 0)
+
+
+def _evict(namespace: str, bytes_needed: int):
+    """
+    Deletes the keys of a namespace closest to expiry until `bytes_needed`
+    bytes are freed. Returns (bytes freed, evicted redis keys).
+    """
+    usage_key = USAGE_KEY.format(namespace=namespace)
+    freed = 0
+    evicted = []
+    while freed < bytes_needed:
+        victims = redis_client.zrange(usage_key, 0, 49)
+        if not victims:
+            break
+        sizes = redis_client.hmget(SIZES_KEY.format(namespace=namespace), victims)
+        batch = []
+        for member, size in zip(victims, sizes):
+            batch.append(member)
+            freed += int(size or 0)
+            if freed >= bytes_needed:
+                break
+        redis_client.delete(*batch)
+        _forget(namespace, batch)
+        evicted.extend(_as_str(m) for m in batch)
+        metrics.inc("cache_evictions_total", len(batch), namespace=namespace)
+        logger.info("evicted %d key(s) from cache namespace %s", len(batch), namespace)
+    return freed, evicted
+
+
+def evict_oldest(namespace: str, bytes_needed: int) -> int:
+    """Frees `bytes_needed` bytes from a namespace, oldest keys first. Returns the bytes freed."""
+    return _evict(namespace, bytes_needed)[0]
+
+
+def _victims(priority: int, usage: dict) -> list:
+    """Namespaces a write of this priority may evict from, lowest priority first."""
+    return sorted(
+        (ns for ns in set(NAMESPACE_POLICIES) | set(usage)
+         if policy_for(ns)["priority"] < priority and not policy_for(ns).get("protected")),
+        key=lambda ns: policy_for(ns)["priority"],
+    )
+
+
+def _refuse(namespace: str, redis_key: str, reason: str, message: str):
+    metrics.inc("cache_refused_total", namespace=namespace, reason=reason)
+    logger.warning("refused %s: %s", redis_key, message)
+    return False
+
+
+def admit_many(entries: list) -> list:
+    """
+    Decides a batch of writes [(namespace, redis_key, size, ttl)], making
+    room first if needed. Returns [(allowed, ttl, previous_size)] in order;
+    previous_size is what an overwrite replaces.
+
+    The bookkeeping for the whole batch is read in one pipelined round-trip;
+    only evictions (over budget) cost more. Protected namespaces (the exam
+    snapshot) are never evicted for another write, and a write that only
+    fits by evicting them is refused.
+    """
+    if not entries:
+        return []
+
+    namespaces = sorted({namespace for namespace, _, _, _ in entries})
+    with redis_client.pipeline(transaction=False) as pipe:
+        now = time.time()
+        for namespace in namespaces:
+            pipe.zrangebyscore(USAGE_KEY.format(namespace=namespace), "-inf", now)
+        for namespace, redis_key, _, _ in entries:
+            pipe.hget(SIZES_KEY.format(namespace=namespace), redis_key)
+        pipe.hgetall(BYTES_KEY)
+        results = pipe.execute()
+
+    expired = dict(zip(namespaces, results[:len(namespaces)]))
+    previous = {
+        (namespace, redis_key): int(size or 0)
+        for (namespace, redis_key, _, _), size in zip(entries, results[len(namespaces):-1])
+    }
+    usage = {_as_str(ns): max(int(v), 0) for ns, v in results[-1].items()}
+
+    def gone(namespace, members):
+        # Keys deleted or expired before this write no longer have a size to replace
+        for member in members:
+            key = (namespace, _as_str(member))
+            if key in previous:
+                previous[key] = 0
+
+    for namespace, members in expired.items():
+        if members:
+            usage[namespace] = max(usage.get(namespace, 0) - _forget(namespace, members), 0)
+            gone(namespace, members)
+
+    decisions = []
+    for namespace, redis_key, size, ttl in entries:
+        policy = policy_for(namespace)
+        if size > policy["max_item_bytes"]:
+            decisions.append((_refuse(namespace, redis_key, "item_size",
+                                      f"{size} bytes exceeds {namespace} item limit"), ttl, 0))
+            continue
+
+        # 1) Stay inside the namespace's own budget
+        growth = size - previous[(namespace, redis_key)]
+        over_namespace = usage.get(namespace, 0) + growth - policy["budget_bytes"]
+        if over_namespace > 0:
+            freed, evicted = _evict(namespace, over_namespace)
+            usage[namespace] = max(usage.get(namespace, 0) - freed, 0)
+            gone(namespace, evicted)
+            growth = size - previous[(namespace, redis_key)]
+
+        # 2) Stay inside the global budget, evicting lower-priority namespaces first
+        over_total = sum(usage.values()) + growth - CACHE_TOTAL_BUDGET_BYTES
+        if over_total > 0:
+            for victim in _victims(policy["priority"], usage):
+                freed, evicted = _evict(victim, over_total)
+                usage[victim] = max(usage.get(victim, 0) - freed, 0)
+                gone(victim, evicted)
+                over_total -= freed
+                if over_total <= 0:
+                    break
+
+        if over_total > 0 and not policy.get("protected"):
+            decisions.append((_refuse(namespace, redis_key, "total_budget",
+                                      "cache over total budget"), ttl, 0))
+            continue
+
+        usage[namespace] = usage.get(namespace, 0) + growth
+        decisions.append((True, ttl, previous[(namespace, redis_key)]))
+    return decisions
+
+
+def admit(namespace: str, redis_key: str, size: int, ttl):
+    """Single-write admit_many. Returns (allowed, ttl, previous_size)."""
+    return admit_many([(namespace, redis_key, size, ttl)])[0]
+
+
+def record_write(pipe, namespace: str, redis_key: str, size: int, ttl, previous_size: int = 0):
+    """
+    Queues the bookkeeping for a write on an existing pipeline, so it goes
+    out in the same round-trip as the SET itself.
+    """
+    expires_at = NO_EXPIRY_SCORE if ttl is None else time.time() + ttl
+    pipe.zadd(USAGE_KEY.format(namespace=namespace), {redis_key: expires_at})
+    pipe.hset(SIZES_KEY.format(namespace=namespace), redis_key, size)
+    pipe.hincrby(BYTES_KEY, namespace, size - previous_size)
+
+
+def record_delete(namespace: str, redis_key: str):
+    _forget(namespace, [redis_key])
+
+
+def usage_report() -> list:
+    """
+    Current usage per namespace, highest priority first.
+    """
+    namespaces = set(NAMESPACE_POLICIES) | set(map(_as_str, redis_client.hkeys(BYTES_KEY)))
+    rows = []
+    for namespace in namespaces:
+        prune_expired(namespace)
+        policy = policy_for(namespace)
+        used = namespace_usage(namespace)
+        rows.append({
+            "namespace": namespace,
+            "priority": policy["priority"],
+            "keys": redis_client.zcard(USAGE_KEY.format(namespace=namespace)),
+            "used_bytes": used,
+            "budget_bytes": policy["budget_bytes"],
+            "used_pct": round(used / policy["budget_bytes"] * 100, 1) if policy["budget_bytes"] else 0.0,
+            "max_item_bytes": policy["max_item_bytes"],
+            "ttl": policy["ttl"],
+        })
+    return sorted(rows, key=lambda r: (-r["priority"], r["namespace"]))
+
+
+def eviction_policy_status() -> dict:
+    """
+    Reads Redis maxmemory settings and flags configurations that fight our
+    budgets (e.g. allkeys-* could evict the snapshot or generation counters).
+    """
+    status = {"maxmemory": None, "policy": None, "warnings": []}
+    try:
+        memory = redis_client.info("memory")
+        status["maxmemory"] = int(memory.get("maxmemory", 0))
+        status["policy"] = _as_str(memory.get("maxmemory_policy"))
+    except Exception as e:
+        status["warnings"].append(f"Could not read Redis memory info: {e}")
+        return status
+
+    if status["policy"] and status["policy"] not in RECOMMENDED_EVICTION_POLICIES:
+        status["warnings"].append(
+            f"maxmemory-policy is '{status['policy']}'; use one of "
+            f"{', '.join(RECOMMENDED_EVICTION_POLICIES)} so keys without a TTL are never evicted."
+        )
+    if status["maxmemory"] and CACHE_TOTAL_BUDGET_BYTES > status["maxmemory"]:
+        status["warnings"].append(
+            f"CACHE_TOTAL_BUDGET_BYTES ({CACHE_TOTAL_BUDGET_BYTES:,}) exceeds Redis maxmemory "
+            f"({status['maxmemory']:,}); Redis will evict before our budgets do."
+        )
+    if not status["maxmemory"]:
+        status["warnings"].append("Redis maxmemory is not set; memory is bounded only by our budgets.")
+    return status
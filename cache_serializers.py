@@ -0,0 +1,144 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ---------------------------------------------------------
+# Format configuration
+# ---------------------------------------------------------
+# Bump FORMAT_VERSION whenever an encoding changes. It is embedded in every
+# Redis key, so new code reads/writes fresh keys while old ones expire on
+# their own TTL (no flush needed).
+FORMAT_VERSION = "f2"
+
+TAG_SEPARATOR = b"|"
+
+DEFAULT_SERIALIZER = os.getenv("CACHE_SERIALIZER", "orjson" if orjson else "json")
+
+
+# ---------------------------------------------------------
+# Serializer implementations (dumps -> bytes, loads <- bytes)
+# ---------------------------------------------------------
+def _json_dumps(data) -> bytes:
+    return json.dumps(data).encode("utf-8")
+
+
+def _json_loads(payload: bytes):
+    return json.loads(payload)
+
+
+def _orjson_dumps(data) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _orjson_loads(payload: bytes):
+    return orjson.loads(payload)
+
+
+def _arrow_dumps(df: pd.DataFrame) -> bytes:
+    """DataFrame -> Arrow IPC stream (columnar, no per-row text encoding)."""
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_loads(payload: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _npy_dumps(arr: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, arr, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _npy_loads(payload: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(payload), allow_pickle=False)
+
+
+def _raw_dumps(data: bytes) -> bytes:
+    return bytes(data)
+
+
+def _raw_loads(payload: bytes) -> bytes:
+    return payload
+
+
+SERIALIZERS = {
+    "json": (_json_dumps, _json_loads),
+    "raw": (_raw_dumps, _raw_loads),
+    "arrow": (_arrow_dumps, _arrow_loads),
+    "npy": (_npy_dumps, _npy_loads),
+}
+
+if orjson is not None:
+    SERIALIZERS["orjson"] = (_orjson_dumps, _orjson_loads)
+
+
+def register_serializer(tag: str, dumps, loads):
+    """
+    Plug in an extra serializer. `tag` is stored in front of every payload,
+    so it must be short, ASCII and must not contain '|'.
+    """
+    SERIALIZERS[tag] = (dumps, loads)
+
+
+# ---------------------------------------------------------
+# Public API
+# ---------------------------------------------------------
+def pick_serializer(data) -> str:
+    """
+    Chooses the serializer for a value: binary formats for
+    DataFrames / numeric arrays / bytes, the default text format for
+    everything else.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return "raw"
+    if isinstance(data, pd.DataFrame):
+        return "arrow"
+    if isinstance(data, np.ndarray) and data.dtype.kind in "biufcmM":
+        return "npy"
+    return DEFAULT_SERIALIZER if DEFAULT_SERIALIZER in SERIALIZERS else "json"
+
+
+def encode(data, serializer: str = None) -> bytes:
+    """
+    Serializes `data` to `<tag>|<payload>` bytes.
+    """
+    tag = serializer or pick_serializer(data)
+    dumps, _ = SERIALIZERS[tag]
+    return tag.encode("ascii") + TAG_SEPARATOR + dumps(data)
+
+
+def decode(raw: bytes):
+    """
+    Reverses encode(). Every key carries FORMAT_VERSION, so anything read
+    here was written by encode(); an unknown tag is an error.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+
+    tag, _, payload = raw.partition(TAG_SEPARATOR)
+    serializer = SERIALIZERS.get(tag.decode("ascii", errors="ignore"))
+    if serializer is None:
+        raise ValueError(f"unknown cache serializer tag {tag[:16]!r}")
+    return serializer[1](payload)
+
+
+def versioned_key(key: str) -> str:
+    """
+    Appends the format version tag to a cache key.
+    """
+    return f"{key}@{FORMAT_VERSION}"
@@ -0,0 +1,66 @@
+# chart_data.py
+# Reduces candidate-level data to small aggregated series before any figure
+# is built, so figure JSON (browser + image export) has one row per category
+# or bin instead of one row per candidate.
+import numpy as np
+import pandas as pd
+
+
+def category_counts(df: pd.DataFrame, column: str, top: int = None, sort_index: bool = False) -> pd.DataFrame:
+    """
+    Counts per category -> DataFrame[column, "Count"], largest first
+    (or in category order when sort_index=True).
+    """
+    counts = df[column].value_counts()
+    if sort_index:
+        counts = counts.sort_index()
+    if top is not None:
+        counts = counts.head(top)
+    data = counts.reset_index()
+    data.columns = [column, "Count"]
+    return data
+
+
+def crosstab_counts(df: pd.DataFrame, column: str, by: str) -> pd.DataFrame:
+    """
+    Counts per (column, by) pair -> DataFrame[column, by, "Count"].
+    """
+    return df.groupby([column, by]).size().reset_index(name="Count")
+
+
+def histogram_edges(values: np.ndarray, nbins: int = 10) -> np.ndarray:
+    """
+    Bin edges for a numeric array. Integer data gets integer-aligned bins
+    so each bar covers whole values.
+    """
+    low, high = values.min(), values.max()
+    if np.all(np.mod(values, 1) == 0):
+        span = int(high - low) + 1
+        width = max(1, int(np.ceil(span / nbins)))
+        return low + width * np.arange(int(np.ceil(span / width)) + 1, dtype=float)
+    return np.histogram_bin_edges(values, bins=nbins)
+
+
+def bins_frame(edges: np.ndarray, counts) -> pd.DataFrame:
+    """
+    Edges + per-bin counts -> DataFrame["Start", "End", "Center", "Width", "Count"].
+    """
+    return pd.DataFrame({
+        "Start": edges[:-1],
+        "End": edges[1:],
+        "Center": (edges[:-1] + edges[1:]) / 2,
+        "Width": np.diff(edges),
+        "Count": np.asarray(counts, dtype=int),
+    })
+
+
+def histogram_bins(series: pd.Series, nbins: int = 10) -> pd.DataFrame:
+    """
+    Bins a numeric series server-side -> DataFrame["Start", "End", "Center", "Width", "Count"].
+    """
+    values = pd.to_numeric(series, errors="coerce").dropna().to_numpy()
+    if values.size == 0:
+        return pd.DataFrame(columns=["Start", "End", "Center", "Width", "Count"])
+
+    counts, edges = np.histogram(values, bins=histogram_edges(values, nbins))
+    return bins_frame(edges, counts)
@@ -0,0 +1,129 @@
+# chart_renderer.py
+# Long-lived chart → PNG service. One background thread owns an asyncio loop
+# and a kaleido instance with CHART_RENDER_WORKERS warm browser tabs, so
+# report pages never pay browser start-up per chart and all charts of a
+# report render concurrently.
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import metrics
+
+try:
+    import kaleido
+except ImportError:
+    kaleido = None
+
+logger = logging.getLogger(__name__)
+
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "4"))
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "60"))  # seconds per batch
+
+DEFAULT_IMAGE_OPTS = {"format": "png", "width": 800, "height": 400, "scale": 2}
+
+metrics.describe("chart_render_seconds", "Wall time to render one batch of chart images")
+metrics.describe("chart_render_failures_total", "Charts whose image export failed")
+
+_lock = threading.Lock()
+_loop = None
+_kaleido = None
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+async def _open_kaleido():
+    renderer = kaleido.Kaleido(n=CHART_RENDER_WORKERS, timeout=int(CHART_RENDER_TIMEOUT))
+    await renderer.open()
+    return renderer
+
+
+def _ensure_started():
+    """Starts the render loop and browser tabs once per process."""
+    global _loop, _kaleido
+    with _lock:
+        if _kaleido is not None:
+            return
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=_run_loop, args=(loop,), name="chart-renderer", daemon=True).start()
+        try:
+            _kaleido = asyncio.run_coroutine_threadsafe(_open_kaleido(), loop).result(CHART_RENDER_TIMEOUT)
+        except Exception:
+            loop.call_soon_threadsafe(loop.stop)
+            raise
+        _loop = loop
+        logger.info("chart renderer started with %d warm worker(s)", CHART_RENDER_WORKERS)
+
+
+async def _shutdown(renderer, loop):
+    try:
+        await renderer.close()
+    finally:
+        loop.stop()
+
+
+def _reset():
+    """Drops a broken browser so the next batch starts a fresh one."""
+    global _loop, _kaleido
+    with _lock:
+        if _kaleido is not None:
+            asyncio.run_coroutine_threadsafe(_shutdown(_kaleido, _loop), _loop)
+        _loop, _kaleido = None, None
+
+
+async def _render_batch(figs, opts):
+    return await asyncio.gather(
+        *(_kaleido.calc_fig(fig, opts=opts) for fig in figs),
+        return_exceptions=True,
+    )
+
+
+def _render_sequential(figs, opts):
+    """Fallback without the service: plain plotly export, one by one."""
+    images = []
+    for fig in figs:
+        try:
+            images.append(fig.to_image(**opts))
+        except Exception as e:
+            images.append(e)
+    return images
+
+
+def render_images(figs: list, **opts) -> list:
+    """
+    Renders several Plotly figures concurrently.
+    Returns PNG bytes per figure, in order; None where a figure failed.
+    opts override DEFAULT_IMAGE_OPTS (format, width, height, scale).
+    """
+    if not figs:
+        return []
+    opts = {**DEFAULT_IMAGE_OPTS, **opts}
+    start = time.perf_counter()
+
+    results = None
+    if kaleido is not None:
+        try:
+            _ensure_started()
+            future = asyncio.run_coroutine_threadsafe(_render_batch(figs, opts), _loop)
+            results = future.result(CHART_RENDER_TIMEOUT)
+        except Exception:
+            logger.warning("chart renderer failed, falling back to sequential export", exc_info=True)
+            _reset()
+    if results is None:
+        results = _render_sequential(figs, opts)
+
+    images = []
+    for result in results:
+        if isinstance(result, BaseException):
+            metrics.inc("chart_render_failures_total")
+            logger.warning("chart export failed: %s", result)
+            images.append(None)
+        else:
+            images.append(result)
+
+    metrics.observe("chart_render_seconds", time.perf_counter() - start)
+    return images
@@ -7,6 +7,17 @@ from sqlalchemy import text
  
 from db_connection import create_connection
  
+# Shared by the polled queries (fetch_invoice_status runs every few seconds
+# per open invoice), so they reuse one pool instead of a new Engine per call.
+_engine = None
+ 
+ 
+def _get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_connection()
+    return _engine
+ 
  
 # =========================================================
 # ✅ CACHED FETCH (safe)
@@ -166,6 +177,48 @@ def mark_invoice_paid_by_paystack_ref(paystack_ref):
     except Exception as e:
         st.error(f"Failed to mark invoice paid: {e}")
  
+def mark_invoice_paid_by_ref(invoice_ref):
+    """Mark invoice as PAID using its own reference (Nomba orders carry it as orderReference)."""
+    engine = create_connection()
+    if engine is None:
+        return
+ 
+    query = text("""
+        UPDATE invoices
+        SET invoice_data =
+            CASE
+                WHEN invoice_data IS NULL THEN JSON_OBJECT('status', 'paid', 'paid_at', NOW())
+                ELSE JSON_SET(invoice_data, '$.status', 'paid', '$.paid_at', NOW())
+            END,
+            updated_at = NOW()
+        WHERE ref = :invoice_ref
+    """)
+ 
+    try:
+        with engine.begin() as conn:
+            conn.execute(query, {"invoice_ref": invoice_ref})
+        st.cache_data.clear()
+    except Exception as e:
+        st.error(f"Failed to mark invoice paid: {e}")
+ 
+ 
+def fetch_invoice_status(invoice_ref):
+    """
+    Current invoice status ('paid', 'pending', 'FAILED', ...) straight from
+    the DB, uncached: payment webhooks update it from another process.
+    """
+    engine = _get_engine()
+    if engine is None:
+        return None
+ 
+    query = text("SELECT JSON_UNQUOTE(JSON_EXTRACT(invoice_data, '$.status')) FROM invoices WHERE ref = :invoice_ref")
+    try:
+        with engine.connect() as conn:
+            return conn.execute(query, {"invoice_ref": invoice_ref}).scalar()
+    except Exception as e:
+        st.error(f"Failed to read invoice status: {e}")
+        return None
+ 
 def mark_invoice_failed(invoice_ref):
     """Mark an invoice as FAILED in the database."""
     engine = create_connection()
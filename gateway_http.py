@@ -0,0 +1,129 @@
+# gateway_http.py
+# Shared HTTP client for the payment gateways (Paystack, Nomba).
+# One keep-alive connection pool per gateway, connect/read timeouts on every
+# call, bounded retries with exponential backoff, and latency metrics per
+# gateway and endpoint, so a slow gateway can no longer hang a page.
+#
+# Retries: idempotent calls (GET, or idempotent=True) retry on connection
+# errors, timeouts and 429/5xx responses. Other POSTs retry only when the
+# connection could not be opened, so a payment is never submitted twice.
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    retry_if_result,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "3.05"))  # seconds
+GATEWAY_READ_TIMEOUT = float(os.getenv("GATEWAY_READ_TIMEOUT", "15"))  # seconds
+GATEWAY_POOL_SIZE = int(os.getenv("GATEWAY_POOL_SIZE", "20"))  # keep-alive connections per gateway
+GATEWAY_MAX_ATTEMPTS = int(os.getenv("GATEWAY_MAX_ATTEMPTS", "3"))
+GATEWAY_BACKOFF = float(os.getenv("GATEWAY_BACKOFF", "0.5"))  # seconds, doubled per retry
+GATEWAY_BACKOFF_MAX = float(os.getenv("GATEWAY_BACKOFF_MAX", "4"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+metrics.describe("gateway_request_seconds", "Latency of one payment gateway HTTP attempt")
+metrics.describe("gateway_requests_total", "Payment gateway calls, by final outcome")
+metrics.describe("gateway_retries_total", "Payment gateway attempts that were retried")
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(gateway: str) -> requests.Session:
+    """Pooled session for a gateway, created once per process."""
+    with _sessions_lock:
+        session = _sessions.get(gateway)
+        if session is None:
+            session = requests.Session()
+            # Retries are done here (with metrics), not by urllib3
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GATEWAY_POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[gateway] = session
+        return session
+
+
+def _retryable_error(idempotent: bool):
+    def check(exc):
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True  # nothing reached the gateway
+        if not idempotent:
+            return False
+        return isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+    return check
+
+
+def request(gateway: str, method: str, url: str, endpoint: str = None, idempotent: bool = None,
+            timeout=None, **kwargs) -> requests.Response:
+    """
+    Sends one gateway call through the pooled session and returns the final
+    response (callers still raise_for_status()). Raises
+    requests.exceptions.RequestException when every attempt failed.
+    `endpoint` labels the metrics (defaults to the method).
+    """
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    endpoint = endpoint or method.lower()
+    timeout = timeout or (GATEWAY_CONNECT_TIMEOUT, GATEWAY_READ_TIMEOUT)
+    session = get_session(gateway)
+
+    retry = retry_if_exception(_retryable_error(idempotent))
+    if idempotent:
+        retry = retry | retry_if_result(lambda response: response.status_code in RETRY_STATUSES)
+
+    def before_sleep(state):
+        metrics.inc("gateway_retries_total", gateway=gateway, endpoint=endpoint)
+        logger.warning("%s %s attempt %d failed, retrying", gateway, endpoint, state.attempt_number)
+
+    def attempt():
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            metrics.observe("gateway_request_seconds", time.perf_counter() - start,
+                            gateway=gateway, endpoint=endpoint, status=status)
+
+    retrying = Retrying(
+        stop=stop_after_attempt(GATEWAY_MAX_ATTEMPTS),
+        wait=wait_exponential(multiplier=GATEWAY_BACKOFF, max=GATEWAY_BACKOFF_MAX),
+        retry=retry,
+        before_sleep=before_sleep,
+        reraise=True,
+        # Out of attempts on a 429/5xx: hand back the last response
+        retry_error_callback=lambda state: state.outcome.result(),
+    )
+    try:
+        response = retrying(attempt)
+    except requests.exceptions.RequestException:
+        metrics.inc("gateway_requests_total", gateway=gateway, endpoint=endpoint, outcome="error")
+        raise
+    outcome = "ok" if response.ok else "http_error"
+    metrics.inc("gateway_requests_total", gateway=gateway, endpoint=endpoint, outcome=outcome)
+    return response
+
+
+def get(gateway: str, url: str, **kwargs) -> requests.Response:
+    return request(gateway, "GET", url, **kwargs)
+
+
+def post(gateway: str, url: str, **kwargs) -> requests.Response:
+    return request(gateway, "POST", url, **kwargs)
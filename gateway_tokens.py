@@ -0,0 +1,212 @@
+# gateway_tokens.py
+# OAuth access tokens for the payment gateways, shared by every session in
+# the process and every replica, so the app asks a gateway for one token per
+# lifetime instead of one per user session.
+#
+#   in-process   {gateway: (token, expires_at, refresh_at)}   checked first, no I/O
+#   gateway_token:<gateway>        string  JSON {"token", "expires_at", "refresh_at"}, TTL = token lifetime
+#   gateway_token:<gateway>:lock   string  replica currently fetching a token
+#
+# Once a token is within GATEWAY_TOKEN_REFRESH_AHEAD of expiry (half its
+# lifetime for short-lived tokens), one background thread fetches the next
+# one while callers keep using the current token. Fetches are single-flight: one per process (thread lock)
+# and one across replicas (Redis lock); the others wait for its result.
+# Redis being down only costs the sharing, never the token.
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import redis
+
+from redis_client import redis_client
+import metrics
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_TOKEN_REFRESH_AHEAD = float(os.getenv("GATEWAY_TOKEN_REFRESH_AHEAD", "300"))  # seconds before expiry
+GATEWAY_TOKEN_EXPIRY_MARGIN = float(os.getenv("GATEWAY_TOKEN_EXPIRY_MARGIN", "60"))  # never use a token this close to expiry
+GATEWAY_TOKEN_LOCK_TTL = int(os.getenv("GATEWAY_TOKEN_LOCK_TTL", "30"))  # seconds one fetch may hold the lock
+GATEWAY_TOKEN_WAIT = float(os.getenv("GATEWAY_TOKEN_WAIT", "10"))  # seconds to wait for another replica's fetch
+
+TOKEN_KEY = "gateway_token:{gateway}"
+LOCK_KEY = "gateway_token:{gateway}:lock"
+
+metrics.describe("gateway_token_lookups_total", "Gateway token lookups, by where the token came from")
+metrics.describe("gateway_token_fetches_total", "Gateway token requests sent to the gateway, by outcome")
+
+_tokens = {}  # gateway -> (token, expires_at, refresh_at)
+_fetch_locks = {}
+_refreshing = set()
+_state_lock = threading.Lock()
+
+
+def _fetch_lock(gateway: str) -> threading.Lock:
+    with _state_lock:
+        return _fetch_locks.setdefault(gateway, threading.Lock())
+
+
+# =========================================================
+# SHARED COPY (REDIS)
+# =========================================================
+def _read_shared(gateway: str):
+    try:
+        raw = redis_client.get(TOKEN_KEY.format(gateway=gateway))
+    except redis.RedisError:
+        logger.warning("could not read shared %s token", gateway, exc_info=True)
+        return None
+    if not raw:
+        return None
+    try:
+        entry = json.loads(raw)
+        return entry["token"], float(entry["expires_at"]), float(entry["refresh_at"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _publish(gateway: str, token: str, expires_at: float, refresh_at: float):
+    _tokens[gateway] = (token, expires_at, refresh_at)
+    ttl = int(expires_at - time.time())
+    if ttl <= 0:
+        return
+    try:
+        redis_client.set(TOKEN_KEY.format(gateway=gateway),
+                         json.dumps({"token": token, "expires_at": expires_at, "refresh_at": refresh_at}), ex=ttl)
+    except redis.RedisError:
+        logger.warning("could not share %s token", gateway, exc_info=True)
+
+
+def _acquire_shared_lock(gateway: str, owner: str) -> bool:
+    try:
+        return bool(redis_client.set(LOCK_KEY.format(gateway=gateway), owner, nx=True, ex=GATEWAY_TOKEN_LOCK_TTL))
+    except redis.RedisError:
+        return True  # no Redis, no other replica to coordinate with
+
+
+def _release_shared_lock(gateway: str, owner: str):
+    key = LOCK_KEY.format(gateway=gateway)
+    try:
+        if redis_client.get(key) == owner:
+            redis_client.delete(key)
+    except redis.RedisError:
+        pass  # expires on its own
+
+
+# =========================================================
+# LOOKUP / REFRESH
+# =========================================================
+def _cached(gateway: str):
+    """Freshest known (token, expires_at, refresh_at): this process, then Redis when due."""
+    entry = _tokens.get(gateway)
+    if entry is None or _due(entry):
+        shared = _read_shared(gateway)
+        if shared and (entry is None or shared[1] > entry[1]):
+            _tokens[gateway] = entry = shared
+    return entry
+
+
+def _usable(entry) -> bool:
+    return entry is not None and entry[1] - time.time() > GATEWAY_TOKEN_EXPIRY_MARGIN
+
+
+def _due(entry) -> bool:
+    return time.time() >= entry[2]
+
+
+def _refresh(gateway: str, fetch, wait: bool):
+    """
+    Single-flight fetch of a new token. Returns the newest entry,
+    or None when wait=False and someone else is already fetching.
+    """
+    lock = _fetch_lock(gateway)
+    if not lock.acquire(blocking=wait):
+        return None
+    try:
+        # Another thread or replica may have refreshed it meanwhile
+        entry = _cached(gateway)
+        if entry is not None and not _due(entry):
+            return entry
+
+        owner = uuid.uuid4().hex
+        if not _acquire_shared_lock(gateway, owner):
+            if not wait:
+                return None
+            deadline = time.time() + GATEWAY_TOKEN_WAIT
+            while time.time() < deadline:
+                time.sleep(0.1)
+                shared = _read_shared(gateway)
+                if _usable(shared) and (entry is None or shared[1] > entry[1]):
+                    _tokens[gateway] = shared
+                    metrics.inc("gateway_token_lookups_total", gateway=gateway, source="replica")
+                    return shared
+            logger.warning("timed out waiting for another replica's %s token, fetching", gateway)
+
+        try:
+            token, expires_in = fetch()
+        except Exception:
+            metrics.inc("gateway_token_fetches_total", gateway=gateway, outcome="error")
+            raise
+        finally:
+            _release_shared_lock(gateway, owner)
+        metrics.inc("gateway_token_fetches_total", gateway=gateway, outcome="ok")
+        expires_in = float(expires_in)
+        now = time.time()
+        entry = (token, now + expires_in, now + expires_in - min(GATEWAY_TOKEN_REFRESH_AHEAD, expires_in / 2))
+        _publish(gateway, *entry)
+        return entry
+    finally:
+        lock.release()
+
+
+def _refresh_in_background(gateway: str, fetch):
+    with _state_lock:
+        if gateway in _refreshing:
+            return
+        _refreshing.add(gateway)
+
+    def run():
+        try:
+            _refresh(gateway, fetch, wait=False)
+        except Exception:
+            logger.warning("background %s token refresh failed", gateway, exc_info=True)
+        finally:
+            with _state_lock:
+                _refreshing.discard(gateway)
+
+    threading.Thread(target=run, name=f"{gateway}-token-refresh", daemon=True).start()
+
+
+# =========================================================
+# PUBLIC API
+# =========================================================
+def get_token(gateway: str, fetch) -> str:
+    """
+    Shared access token for a gateway. `fetch()` requests a new one from the
+    gateway and returns (token, expires_in seconds); it runs only when no
+    valid token is cached, or in the background shortly before expiry.
+    Exceptions from `fetch` propagate when there is no token to fall back on.
+    """
+    entry = _cached(gateway)
+    if _usable(entry):
+        if _due(entry):
+            _refresh_in_background(gateway, fetch)
+        metrics.inc("gateway_token_lookups_total", gateway=gateway, source="cache")
+        return entry[0]
+
+    metrics.inc("gateway_token_lookups_total", gateway=gateway, source="fetch")
+    return _refresh(gateway, fetch, wait=True)[0]
+
+
+def invalidate_token(gateway: str, token: str):
+    """Drops a token the gateway rejected, if it is still the cached one."""
+    entry = _tokens.get(gateway)
+    if entry is not None and entry[0] == token:
+        _tokens.pop(gateway, None)
+    shared = _read_shared(gateway)
+    if shared is not None and shared[0] == token:
+        try:
+            redis_client.delete(TOKEN_KEY.format(gateway=gateway))
+        except redis.RedisError:
+            pass
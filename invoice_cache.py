@@ -0,0 +1,142 @@
+# invoice_cache.py
+# Rendered invoice PDFs keyed by (invoice ref, status, template version), so
+# re-opening an invoice — after a refresh, on another device, from
+# My Invoices — serves the stored artifact instead of rendering again.
+#
+#   invoices.pdf                    artifact ref of the invoice's current PDF
+#   invoices.invoice_data.pdf_tag   "<paid|pending>:v<INVOICE_TEMPLATE_VERSION>" it was rendered for
+#   invoice_pdf:g<gen>:<hash>       Redis copy of the ref, so lookups skip the DB
+#
+# The DB is the source of truth; Redis only saves the round-trip. A paid PDF
+# is never replaced by a pending one.
+import json
+import logging
+
+from sqlalchemy import text
+
+from artifact_store import get_backend, is_artifact_ref
+from db_connection import create_connection
+from invoice_pdf import INVOICE_TEMPLATE_VERSION, generate_invoice_pdf
+from redis_cache import cache_key, get_cached, set_cached, set_many
+import metrics
+
+logger = logging.getLogger(__name__)
+
+INVOICE_PDF_NAMESPACE = "invoice_pdf"
+
+FETCH_PDF_SQL = text("SELECT pdf, invoice_data FROM invoices WHERE ref = :ref")
+
+STORE_PDF_SQL = text("""
+    UPDATE invoices
+    SET pdf = :pdf,
+        invoice_data = JSON_SET(COALESCE(invoice_data, JSON_OBJECT()), '$.pdf_tag', :tag)
+    WHERE ref = :ref
+      AND (:tag LIKE 'paid:%'
+           OR COALESCE(JSON_UNQUOTE(JSON_EXTRACT(invoice_data, '$.pdf_tag')), '') NOT LIKE 'paid:%')
+""")
+
+metrics.describe("invoice_pdf_cache_lookups_total", "Invoice PDF lookups, by where they were served from")
+
+_engine = None
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_connection()
+    return _engine
+
+
+def invoice_pdf_tag(status: str) -> str:
+    """Cache tag for a status as passed to generate_invoice_pdf ("PAID ✅", "Pending Payment", "paid", ...)."""
+    state = "paid" if "PAID" in str(status).upper() else "pending"
+    return f"{state}:v{INVOICE_TEMPLATE_VERSION}"
+
+
+def _redis_key(invoice_ref: str, tag: str) -> str:
+    return cache_key(INVOICE_PDF_NAMESPACE, invoice_ref, tag)
+
+
+def _usable(pdf_ref) -> bool:
+    return isinstance(pdf_ref, str) and is_artifact_ref(pdf_ref) and get_backend().exists(pdf_ref)
+
+
+def _stored_tag(invoice_data) -> str:
+    try:
+        data = json.loads(invoice_data) if isinstance(invoice_data, str) else invoice_data
+    except ValueError:
+        return ""
+    return (data or {}).get("pdf_tag", "")
+
+
+# =========================================================
+# PUBLIC API
+# =========================================================
+def lookup_invoice_pdf(invoice_ref: str, status: str, row=None):
+    """
+    Artifact ref of the invoice's PDF for this status and template version,
+    or None. Pass the `invoices` row (with pdf and invoice_data) when the
+    caller already has it, to skip the DB read.
+    """
+    tag = invoice_pdf_tag(status)
+    pdf_ref = get_cached(_redis_key(invoice_ref, tag))
+    if _usable(pdf_ref):
+        metrics.inc("invoice_pdf_cache_lookups_total", source="redis")
+        return pdf_ref
+
+    if row is None:
+        engine = _get_engine()
+        if engine is None:
+            return None
+        with engine.connect() as conn:
+            row = conn.execute(FETCH_PDF_SQL, {"ref": invoice_ref}).mappings().first()
+    if row is not None and _stored_tag(row["invoice_data"]) == tag and _usable(row["pdf"]):
+        metrics.inc("invoice_pdf_cache_lookups_total", source="db")
+        set_cached(_redis_key(invoice_ref, tag), row["pdf"], serializer="json")
+        return row["pdf"]
+
+    metrics.inc("invoice_pdf_cache_lookups_total", source="miss")
+    return None
+
+
+def store_invoice_pdf(invoice_ref: str, status: str, pdf_ref: str):
+    """Records pdf_ref as the invoice's PDF for this status (DB, then Redis)."""
+    tag = invoice_pdf_tag(status)
+    engine = _get_engine()
+    if engine is not None:
+        with engine.begin() as conn:
+            conn.execute(STORE_PDF_SQL, {"ref": invoice_ref, "pdf": pdf_ref, "tag": tag})
+    set_cached(_redis_key(invoice_ref, tag), pdf_ref, serializer="json")
+
+
+def store_invoice_pdfs(engine, refs: dict):
+    """
+    Batch store_invoice_pdf for {invoice ref: (artifact ref, status)}: one
+    executemany, then one pipelined write replacing the Redis copies.
+    """
+    if not refs:
+        return
+    with engine.begin() as conn:
+        conn.execute(STORE_PDF_SQL, [
+            {"ref": ref, "pdf": pdf, "tag": invoice_pdf_tag(status)} for ref, (pdf, status) in refs.items()
+        ])
+    set_many({_redis_key(ref, invoice_pdf_tag(status)): pdf for ref, (pdf, status) in refs.items()})
+
+
+def get_or_render_invoice_pdf(render_args: dict, row=None) -> str:
+    """
+    Cached PDF for generate_invoice_pdf(**render_args), rendering and
+    storing it only on a miss. Returns the artifact ref.
+    """
+    invoice_ref = render_args["invoice_ref"]
+    status = render_args.get("status", "Pending Payment")
+    pdf_ref = lookup_invoice_pdf(invoice_ref, status, row=row)
+    if pdf_ref is not None:
+        return pdf_ref
+
+    pdf_ref = generate_invoice_pdf(**render_args)
+    try:
+        store_invoice_pdf(invoice_ref, status, pdf_ref)
+    except Exception:
+        logger.warning("could not record PDF for invoice %s", invoice_ref, exc_info=True)
+    return pdf_ref
@@ -1,35 +1,89 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import (
-    SimpleDocTemplate,
     Paragraph,
     Spacer,
     Table,
     TableStyle,
 )
 from reportlab.lib.enums import TA_CENTER
-from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from datetime import datetime
-import os
+from functools import lru_cache
 from io import BytesIO
-from watermark import add_watermark
+import json
+import sys
+import time
+from watermark import WatermarkedDocTemplate
+from artifact_store import put_bytes
+import metrics
 
-pdfmetrics.registerFont(
-    TTFont("DejaVu", "assets/fonts/DejaVuSans.ttf")
+# Bump when the layout, branding or watermark changes so stored invoices of
+# an older version can be told apart and regenerated
+INVOICE_TEMPLATE_VERSION = "1"
+INVOICE_FONT = "DejaVu"
+INVOICE_FONT_PATH = "assets/fonts/DejaVuSans.ttf"
+WATERMARK_IMAGE = "altered_edustat.jpg"
+
+metrics.describe("invoice_render_seconds", "Time to lay out one invoice PDF")
+
+
+# ------------------ TEMPLATE (built once per process) ------------------
+def register_fonts():
+    if INVOICE_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(INVOICE_FONT, INVOICE_FONT_PATH))
+
+
+register_fonts()
+
+
+@lru_cache(maxsize=1)
+def invoice_styles():
+    """Paragraph styles for invoices, derived from the sample sheet once."""
+    base = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle("InvoiceTitle", parent=base["Title"], fontName=INVOICE_FONT, alignment=TA_CENTER),
+        "heading": ParagraphStyle("InvoiceHeading", parent=base["Heading2"], fontName=INVOICE_FONT),
+        "normal": ParagraphStyle("InvoiceNormal", parent=base["Normal"], fontName=INVOICE_FONT, spaceAfter=12),
+    }
+
+
+INFO_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 0), (-1, -1), INVOICE_FONT),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ]
 )
 
-# ------------------ CONFIG ------------------
-OUTPUT_DIR = "generated_invoices"
+ITEMS_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTNAME", (0, 0), (-1, -1), INVOICE_FONT),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("BACKGROUND", (-3, -1), (-1, -1), colors.whitesmoke),
+    ]
+)
 
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+# Markup that is the same on every invoice
+HEADER_TITLE = "<b>EDUSTAT REPORTING PLATFORM</b>"
+HEADER_HEADING = "<b>INVOICE</b>"
+FOOTER_TEXT = "<i>Thank you for using Edustat Reporting Platform.</i>"
+PAID_STATUS_HTML = '<b>Status:</b> <font color="green">PAID ✓</font>'
+PENDING_STATUS_HTML = '<b>Status:</b> <font color="orange">Pending Payment</font>'
 
 
-# ------------------ MAIN FUNCTION ------------------
-def generate_invoice_pdf(
+# ------------------ RENDERING ------------------
+def render_invoice(
     invoice_ref: str,
     user_email: str,
     amount: float,
@@ -37,42 +91,35 @@ def generate_invoice_pdf(
     selected_group: str,
     selected_columns: list,
     status: str = "Pending Payment",
-):
+    invoice_date: str = None,
+) -> bytes:
     """
-    Generates a professional invoice PDF (NO WATERMARK).
+    Lays out the invoice and returns the PDF bytes (nothing is written).
+    Output is deterministic for the same inputs, so re-renders dedupe in
+    the artifact store.
     """
+    start = time.perf_counter()
+    styles = invoice_styles()
+    normal = styles["normal"]
 
-    # Prepare file name
-    safe_ref = invoice_ref.replace("/", "_")
-    pdf_path = os.path.join(OUTPUT_DIR, f"Invoice_{safe_ref}.pdf")
-
-    # Create the document
-    doc = SimpleDocTemplate(
-        pdf_path, pagesize=A4, rightMargin=50, leftMargin=50, topMargin=80, bottomMargin=50
+    # Create the document in memory
+    buffer = BytesIO()
+    doc = WatermarkedDocTemplate(
+        buffer, watermark_image_path=WATERMARK_IMAGE, pagesize=A4,
+        rightMargin=50, leftMargin=50, topMargin=80, bottomMargin=50, invariant=1
     )
     elements = []
-    styles = getSampleStyleSheet()
-
-    styles["Title"].fontName = "DejaVu"
-    styles["Heading2"].fontName = "DejaVu"
-    styles["Normal"].fontName = "DejaVu"
-
-    # Custom styles
-    title_style = styles["Title"]
-    title_style.alignment = TA_CENTER
-    normal = styles["Normal"]
-    normal.spaceAfter = 12
- 
+
     # ---------------- HEADER ----------------
-    elements.append(Paragraph("<b>EDUSTAT REPORTING PLATFORM</b>", title_style))
+    elements.append(Paragraph(HEADER_TITLE, styles["title"]))
     elements.append(Spacer(1, 12))
-    elements.append(Paragraph("<b>INVOICE</b>", styles["Heading2"]))
+    elements.append(Paragraph(HEADER_HEADING, styles["heading"]))
     elements.append(Spacer(1, 10))
- 
+
     # Invoice Info
-    invoice_date = datetime.now().strftime("%B %d, %Y")
+    invoice_date = invoice_date or datetime.now().strftime("%B %d, %Y")
     user_display = user_email.split("@")[0].replace(".", " ").title()
- 
+
     info_data = [
         ["Invoice Reference:", invoice_ref],
         ["Customer Name:", user_display],
@@ -80,76 +127,110 @@ def generate_invoice_pdf(
         ["Report Group:", selected_group],
         ["Date:", invoice_date],
     ]
- 
-    info_table = Table(info_data, colWidths=[150, 350])
-    info_table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
-                ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 0), (-1, -1), "DejaVu"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-    )
+
+    info_table = Table(info_data, colWidths=[150, 350], style=INFO_TABLE_STYLE)
     elements.append(info_table)
     elements.append(Spacer(1, 20))
- 
+
     # ---------------- TABLE OF ITEMS ----------------
     table_data = [["Selected Item", "Quantity", "Amount (₦)"]]
     for col in selected_columns:
         table_data.append([col, "1", "-"])
- 
+
     table_data.append(["", "Grand Total", f"₦{amount:,.2f}"])
- 
-    table = Table(table_data, colWidths=[250, 100, 150])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("FONTNAME", (0, 0), (-1, -1), "DejaVu"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-                ("BACKGROUND", (-3, -1), (-1, -1), colors.whitesmoke),
-            ]
-        )
-    )
+
+    table = Table(table_data, colWidths=[250, 100, 150], style=ITEMS_TABLE_STYLE)
     elements.append(table)
     elements.append(Spacer(1, 20))
- 
+
     # ---------------- STATUS ----------------
-    if "PAID" in status.upper():
-        status_html = '<b>Status:</b> <font color="green">PAID ✓</font>'
-    else:
-        status_html = '<b>Status:</b> <font color="orange">Pending Payment</font>'
- 
+    status_html = PAID_STATUS_HTML if "PAID" in status.upper() else PENDING_STATUS_HTML
     elements.append(Paragraph(status_html, normal))
     elements.append(Spacer(1, 10))
- 
+
     # ---------------- DESCRIPTION ----------------
     elements.append(Paragraph(f"<b>Description:</b> {description}", normal))
     elements.append(Spacer(1, 30))
- 
+
     # ---------------- FOOTER ----------------
-    elements.append(Paragraph("<i>Thank you for using Edustat Reporting Platform.</i>", normal))
- 
+    elements.append(Paragraph(FOOTER_TEXT, normal))
+
     doc.build(elements)
- 
-    with open(pdf_path, "rb") as pdf_file:
-        pdf_bytes = BytesIO(pdf_file.read())
-        pdf_bytes.seek(0)
- 
-    watermarked_pdf = add_watermark(
-        input_pdf_stream=pdf_bytes,
-        watermark_image_path="altered_edustat.jpg"
+    metrics.observe("invoice_render_seconds", time.perf_counter() - start)
+    return buffer.getvalue()
+
+
+# ------------------ MAIN FUNCTION ------------------
+def generate_invoice_pdf(
+    invoice_ref: str,
+    user_email: str,
+    amount: float,
+    description: str,
+    selected_group: str,
+    selected_columns: list,
+    status: str = "Pending Payment",
+    invoice_date: str = None,
+):
+    """
+    Generates a professional invoice PDF and stores it in the artifact store.
+    Returns the artifact ref (see artifact_store.py).
+    """
+    pdf = render_invoice(invoice_ref, user_email, amount, description, selected_group,
+                         selected_columns, status=status, invoice_date=invoice_date)
+    return put_bytes(pdf, ext=".pdf")
+
+
+def invoice_args_from_row(row, user_email: str) -> dict:
+    """
+    generate_invoice_pdf keyword arguments for a stored invoice (an `invoices`
+    row with ref, total, data, invoice_data, created_at). Keeps the original
+    invoice date so regenerated PDFs match what the customer received.
+    """
+    def as_dict(value):
+        try:
+            return (json.loads(value) if isinstance(value, str) else value) or {}
+        except ValueError:
+            return {}
+
+    data = as_dict(row["data"])
+    status = str(as_dict(row["invoice_data"]).get("status", "pending"))
+    group = data.get("report_group") or "General Report"
+    try:
+        invoice_date = row["created_at"].strftime("%B %d, %Y")
+    except (AttributeError, KeyError, ValueError):  # missing or NaT
+        invoice_date = None
+    return {
+        "invoice_ref": row["ref"],
+        "user_email": user_email,
+        "amount": float(row["total"] or 0),
+        "description": data.get("description") or f"Custom Report - {group}",
+        "selected_group": group,
+        "selected_columns": data.get("columns") or [],
+        "status": "PAID ✅" if status.lower() == "paid" else "Pending Payment",
+        "invoice_date": invoice_date,
+    }
+
+
+# ------------------ BENCHMARK ------------------
+def benchmark(count: int = 200) -> float:
+    """Renders `count` sample invoices in memory and returns invoices/second."""
+    sample = dict(
+        user_email="jane.doe@example.com",
+        amount=25000,
+        description="Benchmark invoice",
+        selected_group="General Report",
+        selected_columns=["Sex", "Age", "State", "ExamYear", "Centre"],
     )
- 
-    with open(pdf_path, "wb") as output_file:
-        output_file.write(watermarked_pdf.read())
- 
-    return pdf_path
+    render_invoice("INV-WARMUP", **sample)
+    start = time.perf_counter()
+    for i in range(count):
+        render_invoice(f"INV-BENCH-{i:06d}", status="PAID" if i % 2 else "Pending Payment", **sample)
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "bench":
+        print("Usage: python invoice_pdf.py bench [count]")
+        sys.exit(1)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"🧾 {benchmark(count):,.1f} invoices/sec ({count} rendered in memory)")
@@ -0,0 +1,88 @@
+# job_widgets.py
+# Streamlit pieces for render jobs: a progress bar that polls the job and a
+# download button once the artifact is ready.
+#
+# Pages submit through session_job(), which remembers the job per dedupe key
+# in session_state: a rerun shows the same job, and a failed or expired one
+# is only replaced when the user clicks "Try again".
+import os
+
+import streamlit as st
+
+from render_jobs import DONE, FAILED, forget_dedupe, job_artifact, job_status, submit_job
+from artifact_store import open_artifact
+
+JOB_POLL_INTERVAL = float(os.getenv("RENDER_JOB_POLL_INTERVAL", "1.5"))  # seconds
+SESSION_JOBS_KEY = "render_jobs"  # session_state: {dedupe key: job id}
+
+
+def session_job(kind: str, payload: dict, dedupe_key: str) -> str:
+    """Job id for `dedupe_key` in this session, submitting it the first time only."""
+    jobs = st.session_state.setdefault(SESSION_JOBS_KEY, {})
+    if dedupe_key not in jobs:
+        jobs[dedupe_key] = submit_job(kind, payload, dedupe_key=dedupe_key)
+    return jobs[dedupe_key]
+
+
+def _retry_button(dedupe_key: str, key: str):
+    if dedupe_key and st.button("🔁 Try again", key=f"{key}_retry", use_container_width=True):
+        st.session_state.get(SESSION_JOBS_KEY, {}).pop(dedupe_key, None)
+        forget_dedupe(dedupe_key)
+        st.rerun()
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def _job_progress(job_id: str):
+    status = job_status(job_id)
+    if status is None or status["status"] in (DONE, FAILED):
+        # Finished: rerun the whole page so it renders the final state
+        st.rerun()
+    st.progress(status["progress"] / 100, text=f"⏳ {status['message']}")
+
+
+def _download_button(artifact, label: str, file_name: str, key: str, mime: str):
+    with artifact:
+        st.download_button(
+            label=label,
+            data=artifact,
+            file_name=file_name,
+            mime=mime,
+            key=key,
+            use_container_width=True
+        )
+
+
+def artifact_download(ref: str, label: str, file_name: str, key: str, mime: str = "application/pdf"):
+    """Download button for an artifact that already exists (no job needed)."""
+    _download_button(open_artifact(ref), label, file_name, key, mime)
+
+
+def job_download(job_id: str, label: str, file_name: str, key: str, mime: str = "application/pdf",
+                 dedupe_key: str = None):
+    """
+    Shows the job's progress until it finishes, then a download button.
+    With the job's dedupe_key, a failed or expired job gets a "Try again"
+    button that submits a fresh one. Returns the job record (None if the job expired).
+    """
+    status = job_status(job_id)
+    if status is None:
+        st.warning("⚠️ This download has expired.")
+        _retry_button(dedupe_key, key)
+        return None
+
+    if status["status"] == DONE:
+        artifact = job_artifact(job_id)
+        if artifact is None:
+            # Output deleted: stop dedupe from handing out this job again
+            if dedupe_key:
+                forget_dedupe(dedupe_key)
+            st.warning("⚠️ This download has expired.")
+            _retry_button(dedupe_key, key)
+            return None
+        _download_button(artifact, label, status["result"].get("file_name", file_name), key, mime)
+    elif status["status"] == FAILED:
+        st.error(f"⚠️ Error generating file: {status['error']}")
+        _retry_button(dedupe_key, key)
+    else:
+        _job_progress(job_id)
+    return status
@@ -0,0 +1,289 @@
+# load_checkout.py
+# Load test for the purchase flow against mock_gateway.py: runs N simulated
+# purchases, C at a time, through the same functions the pages call, and
+# reports latency percentiles per step and end to end, plus the DB and Redis
+# load they caused.
+#
+#   configure_filters   create_invoice_record
+#   view_invoice        pending invoice PDF (get_or_render_invoice_pdf)
+#   pay                 initialize_transaction + attach_paystack_ref_to_invoice
+#                       (Nomba: create_checkout_order)
+#   verify              verify_transaction + mark paid + update_payment_status, paid invoice PDF
+#   save_report         save_user_report
+#
+# Run (mock gateway first):
+#   python mock_gateway.py --latency 150 --failure-rate 0.02 &
+#   python load_checkout.py --email loadtest@example.com [--purchases 200] [--concurrency 20]
+#                           [--gateway paystack|nomba] [--cleanup]
+#
+# The account must exist; its invoices, payments and saved reports from the
+# run are deleted with --cleanup. Refuses to run against the real gateways.
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+MOCK_GATEWAY_URL = os.getenv("MOCK_GATEWAY_URL", "http://localhost:8503")
+os.environ.setdefault("PAYSTACK_BASE_URL", f"{MOCK_GATEWAY_URL}/paystack")
+os.environ.setdefault("NOMBA_BASE_URL", f"{MOCK_GATEWAY_URL}/nomba")
+
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.engine import Engine
+
+import nomba
+import paystack
+from db_connection import create_connection
+from db_queries import (
+    attach_paystack_ref_to_invoice,
+    create_invoice_record,
+    mark_invoice_paid_by_paystack_ref,
+    mark_invoice_paid_by_ref,
+    save_user_report,
+    update_payment_status,
+)
+from invoice_cache import get_or_render_invoice_pdf
+from redis_client import redis_client
+
+SUBSCRIPTION_AMOUNT = 20000.00  # ₦, as on the pages
+STEPS = ["configure_filters", "view_invoice", "pay", "verify", "save_report"]
+PERCENTILES = [50, 90, 95, 99]
+
+SAMPLE_REPORT = {
+    "report_group": "Candidates",
+    "subgroup": "Demographics",
+    "analysis": "Gender Distribution",
+    "filters": {"ExamYear": [2023], "Sex": ["Male", "Female"]},
+    "charts": ["Table/Matrix", "Bar Chart"],
+}
+
+CLEANUP_SQL = [
+    text("DELETE FROM user_reports WHERE invoice_ref IN :refs").bindparams(bindparam("refs", expanding=True)),
+    text("DELETE FROM payments WHERE reference IN :refs").bindparams(bindparam("refs", expanding=True)),
+    text("DELETE FROM invoices WHERE ref IN :refs").bindparams(bindparam("refs", expanding=True)),
+]
+
+
+# =========================================================
+# LOAD COUNTERS
+# =========================================================
+class DbLoad:
+    """Counts statements and their time on every engine (create_connection makes new ones)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statements = {}
+        self.seconds = 0.0
+        self.local = threading.local()
+
+    def install(self):
+        event.listen(Engine, "before_cursor_execute", self.before)
+        event.listen(Engine, "after_cursor_execute", self.after)
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        self.local.start = time.perf_counter()
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - getattr(self.local, "start", time.perf_counter())
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        with self.lock:
+            self.statements[verb] = self.statements.get(verb, 0) + 1
+            self.seconds += elapsed
+
+
+def redis_stats() -> dict:
+    """Server-wide Redis counters (includes other clients of the same server)."""
+    stats = redis_client.info("stats")
+    return {
+        "commands": stats.get("total_commands_processed", 0),
+        "keyspace_hits": stats.get("keyspace_hits", 0),
+        "keyspace_misses": stats.get("keyspace_misses", 0),
+    }
+
+
+# =========================================================
+# ONE PURCHASE
+# =========================================================
+def purchase(user_id: int, email: str, gateway: str, created_refs: list) -> dict:
+    """Runs one purchase. Returns {step: seconds, "total": seconds} or {"error": ...}."""
+    timings = {}
+    started = time.perf_counter()
+
+    def step(name, fn):
+        t = time.perf_counter()
+        result = fn()
+        timings[name] = time.perf_counter() - t
+        return result
+
+    report = {**SAMPLE_REPORT, "created_at": datetime.now().isoformat()}
+    invoice_ref = step("configure_filters", lambda: create_invoice_record(user_id, int(SUBSCRIPTION_AMOUNT), report))
+    if not invoice_ref:
+        return {"error": "configure_filters"}
+    created_refs.append(invoice_ref)
+
+    render_args = {
+        "invoice_ref": invoice_ref,
+        "user_email": email,
+        "amount": SUBSCRIPTION_AMOUNT,
+        "description": f"Custom Report - {report['report_group']}",
+        "selected_group": report["report_group"],
+        "selected_columns": list(report["filters"]),
+        "status": "Pending Payment",
+    }
+    step("view_invoice", lambda: get_or_render_invoice_pdf(render_args))
+
+    if gateway == "paystack":
+        def pay():
+            response = paystack.initialize_transaction(email, SUBSCRIPTION_AMOUNT)
+            if response:
+                attach_paystack_ref_to_invoice(invoice_ref, response["reference"])
+                created_refs.append(response["reference"])
+            return response and response["reference"]
+
+        def verify(reference):
+            result = paystack.verify_transaction(reference)
+            if not result or (result.get("data") or {}).get("status") != "success":
+                return False
+            update_payment_status(email)
+            mark_invoice_paid_by_paystack_ref(reference)
+            return True
+    else:
+        def pay():
+            response = nomba.create_checkout_order(email, SUBSCRIPTION_AMOUNT, invoice_ref, MOCK_GATEWAY_URL)
+            return response and response["session_id"]
+
+        def verify(session_id):
+            result = nomba.verify_checkout_payment(session_id)
+            if not result or (result.get("data") or {}).get("status") != "SUCCESS":
+                return False
+            update_payment_status(email)
+            mark_invoice_paid_by_ref(invoice_ref)
+            return True
+
+    reference = step("pay", pay)
+    if not reference:
+        return {"error": "pay", **timings}
+
+    def verify_and_render():
+        if not verify(reference):
+            return None
+        return get_or_render_invoice_pdf({**render_args, "status": "PAID ✅"})
+
+    pdf_ref = step("verify", verify_and_render)
+    if not pdf_ref:
+        return {"error": "verify", **timings}
+
+    saved = step("save_report", lambda: save_user_report(
+        user_id, invoice_ref, report["report_group"], f"Load test {invoice_ref}",
+        report["filters"], report["charts"], pdf_ref,
+    ))
+    if not saved:
+        return {"error": "save_report", **timings}
+
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+# =========================================================
+# RUN + REPORT
+# =========================================================
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(email: str, purchases: int = 100, concurrency: int = 10, gateway: str = "paystack",
+        cleanup: bool = False) -> dict:
+    base_url = paystack.BASE_URL if gateway == "paystack" else nomba.BASE_URL
+    if not base_url.startswith(("http://localhost", "http://127.0.0.1")) and os.getenv("LOADTEST_ALLOW_REMOTE") != "1":
+        raise RuntimeError(f"❌ {gateway} points at {base_url}; start mock_gateway.py or set LOADTEST_ALLOW_REMOTE=1.")
+    # The mock ignores credentials, so a missing secrets.toml must not stop the run
+    paystack.SECRET_KEY = paystack.SECRET_KEY or "sk_test_mock"
+    nomba.ACCOUNT_ID = nomba.ACCOUNT_ID or "mock-account"
+
+    engine = create_connection()
+    if engine is None:
+        raise RuntimeError("❌ Could not connect to database.")
+    with engine.connect() as conn:
+        user_id = conn.execute(text("SELECT user_id FROM users WHERE email_address = :email LIMIT 1"),
+                               {"email": email}).scalar()
+    if user_id is None:
+        raise RuntimeError(f"❌ No user with email {email}; sign up the load-test account first.")
+
+    db = DbLoad()
+    db.install()
+    redis_before = redis_stats()
+    created_refs = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="purchase") as pool:
+        results = list(pool.map(lambda _: purchase(user_id, email, gateway, created_refs), range(purchases)))
+    wall = time.perf_counter() - start
+    redis_after = redis_stats()
+
+    if cleanup and created_refs:
+        with engine.begin() as conn:
+            for statement in CLEANUP_SQL:
+                conn.execute(statement, {"refs": created_refs})
+
+    completed = [r for r in results if "error" not in r]
+    errors = {}
+    for r in results:
+        if "error" in r:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    return {
+        "purchases": purchases,
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "completed": len(completed),
+        "errors": errors,
+        "latency": {
+            name: [r[name] for r in results if name in r] for name in STEPS + ["total"]
+        },
+        "db": {"statements": dict(db.statements), "seconds": db.seconds},
+        "redis": {k: redis_after[k] - redis_before[k] for k in redis_after},
+    }
+
+
+def print_report(summary: dict):
+    print(f"🛒 {summary['completed']}/{summary['purchases']} purchases completed in {summary['wall_seconds']:.1f}s "
+          f"at concurrency {summary['concurrency']} ({summary['completed'] / summary['wall_seconds']:.1f}/s)")
+    if summary["errors"]:
+        print("⚠️ Failed at: " + ", ".join(f"{step} ×{n}" for step, n in summary["errors"].items()))
+
+    print(f"\n{'step':<18}" + "".join(f"{'p' + str(p):>9}" for p in PERCENTILES) + f"{'max':>9}   (ms)")
+    for name, values in summary["latency"].items():
+        if values:
+            cells = [percentile(values, p) for p in PERCENTILES] + [max(values)]
+            print(f"{name:<18}" + "".join(f"{v * 1000:>9.0f}" for v in cells))
+
+    db = summary["db"]
+    total = sum(db["statements"].values())
+    per_purchase = total / max(1, summary["purchases"])
+    print(f"\n🗄️ DB: {total:,} statements ({per_purchase:.1f} per purchase), {db['seconds']:.1f}s in the database — "
+          + ", ".join(f"{verb} {n:,}" for verb, n in sorted(db["statements"].items())))
+    r = summary["redis"]
+    print(f"🧠 Redis: {r['commands']:,} commands ({r['commands'] / max(1, summary['purchases']):.1f} per purchase), "
+          f"{r['keyspace_hits']:,} hits / {r['keyspace_misses']:,} misses")
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+
+    def option(name, default):
+        return argv[argv.index(name) + 1] if name in argv else default
+
+    email = option("--email", os.getenv("LOADTEST_USER_EMAIL"))
+    if not email:
+        print("Usage: python load_checkout.py --email <load-test account> [--purchases N] [--concurrency N] "
+              "[--gateway paystack|nomba] [--cleanup]")
+        sys.exit(1)
+
+    print_report(run(
+        email,
+        purchases=int(option("--purchases", 100)),
+        concurrency=int(option("--concurrency", 10)),
+        gateway=option("--gateway", "paystack"),
+        cleanup="--cleanup" in argv,
+    ))
@@ -0,0 +1,182 @@
+# login_service.py
+# Sign-in for pages/Login.py, built for bursts (exam-day sign-ins):
+# one indexed lookup of only the columns login needs, bcrypt in a bounded
+# worker pool with a cap on sign-ins in flight, and the signed-in user's
+# profile cached in Redis for pages that only need the user id or name.
+#
+#   user_profile:g<gen>:<hash>   {"user_id", "username", "email_address"} (never the password hash)
+#
+# bcrypt releases the GIL while hashing, so the pool hashes in parallel
+# while script threads wait; past LOGIN_MAX_PENDING sign-ins the rest are
+# turned away with LoginBusy instead of queueing behind each other.
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from sqlalchemy import text
+
+from db_connection import create_connection
+from redis_cache import cache_key, get_cached, set_cached
+import metrics
+
+logger = logging.getLogger(__name__)
+
+LOGIN_BCRYPT_WORKERS = int(os.getenv("LOGIN_BCRYPT_WORKERS", str(os.cpu_count() or 2)))
+LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", "64"))  # sign-ins hashing or waiting to hash
+LOGIN_QUEUE_TIMEOUT = float(os.getenv("LOGIN_QUEUE_TIMEOUT", "5"))  # seconds to wait for a slot
+
+USER_PROFILE_NAMESPACE = "user_profile"
+
+LOGIN_USER_SQL = text("SELECT user_id, username, password FROM users WHERE email_address = :email LIMIT 1")
+USER_PROFILE_SQL = text("SELECT user_id, username, email_address FROM users WHERE email_address = :email LIMIT 1")
+
+metrics.describe("login_seconds", "Time to check one sign-in, by outcome")
+metrics.describe("login_bcrypt_wait_seconds", "Time a sign-in waited for a bcrypt worker")
+metrics.describe("login_busy_total", "Sign-ins turned away because too many were in flight")
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=LOGIN_BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots = threading.BoundedSemaphore(LOGIN_MAX_PENDING)
+_engine = None
+
+
+class LoginBusy(Exception):
+    """Too many sign-ins in flight; the user should retry shortly."""
+
+
+def _get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_connection()
+    return _engine
+
+
+# =========================================================
+# BCRYPT POOL
+# =========================================================
+def _run_bcrypt(fn, *args):
+    """Runs a bcrypt call on the pool, waiting for its result. Raises LoginBusy when full."""
+    queued = time.perf_counter()
+    if not _bcrypt_slots.acquire(timeout=LOGIN_QUEUE_TIMEOUT):
+        metrics.inc("login_busy_total")
+        raise LoginBusy()
+    try:
+        def timed():
+            metrics.observe("login_bcrypt_wait_seconds", time.perf_counter() - queued)
+            return fn(*args)
+        return _bcrypt_pool.submit(timed).result()
+    finally:
+        _bcrypt_slots.release()
+
+
+def check_password(password: str, hashed: str) -> bool:
+    return _run_bcrypt(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_password(password: str) -> str:
+    return _run_bcrypt(lambda pw: bcrypt.hashpw(pw, bcrypt.gensalt()).decode("utf-8"), password.encode("utf-8"))
+
+
+# =========================================================
+# USER PROFILE CACHE
+# =========================================================
+def _profile_key(email: str) -> str:
+    return cache_key(USER_PROFILE_NAMESPACE, email.strip().lower())
+
+
+def cache_user_profile(profile: dict):
+    try:
+        set_cached(_profile_key(profile["email_address"]), profile, serializer="json")
+    except Exception:
+        logger.warning("could not cache profile for %s", profile["email_address"], exc_info=True)
+
+
+def get_user_profile(email: str):
+    """{"user_id", "username", "email_address"} for an email, from Redis when cached, else None."""
+    try:
+        profile = get_cached(_profile_key(email))
+    except Exception:
+        profile = None
+    if profile is not None:
+        return profile
+
+    engine = _get_engine()
+    if engine is None:
+        return None
+    with engine.connect() as conn:
+        row = conn.execute(USER_PROFILE_SQL, {"email": email}).mappings().first()
+    if row is None:
+        return None
+    profile = {"user_id": int(row["user_id"]), "username": row["username"], "email_address": row["email_address"]}
+    cache_user_profile(profile)
+    return profile
+
+
+# =========================================================
+# SIGN-IN
+# =========================================================
+def authenticate(email: str, password: str):
+    """
+    Profile of the user if the email and password match, else None.
+    Raises LoginBusy when too many sign-ins are in flight.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        engine = _get_engine()
+        if engine is None:
+            raise RuntimeError("❌ Unable to connect to database.")
+        with engine.connect() as conn:
+            row = conn.execute(LOGIN_USER_SQL, {"email": email}).mappings().first()
+        if row is None or not check_password(password, row["password"]):
+            outcome = "rejected"
+            return None
+
+        outcome = "ok"
+        profile = {"user_id": int(row["user_id"]), "username": row["username"], "email_address": email}
+        cache_user_profile(profile)
+        return profile
+    except LoginBusy:
+        outcome = "busy"
+        raise
+    finally:
+        metrics.observe("login_seconds", time.perf_counter() - start, outcome=outcome)
+
+
+# ------------------ BENCHMARK ------------------
+def benchmark(count: int = 200, concurrency: int = 50) -> dict:
+    """`count` password checks from `concurrency` threads (a sign-in burst). Latencies in seconds."""
+    hashed = bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt()).decode("utf-8")
+    latencies = []
+
+    def one(_):
+        t = time.perf_counter()
+        try:
+            check_password("benchmark-password", hashed)
+        except LoginBusy:
+            return
+        latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as burst:
+        list(burst.map(one, range(count)))
+    wall = time.perf_counter() - start
+    cuts = statistics.quantiles(latencies, n=100)
+    return {"checks": len(latencies), "busy": count - len(latencies), "per_sec": len(latencies) / wall,
+            "p50": cuts[49], "p99": cuts[98]}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "bench":
+        print("Usage: python login_service.py bench [count] [concurrency]")
+        sys.exit(1)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    result = benchmark(count, concurrency)
+    print(f"🔐 {result['checks']} checks ({result['busy']} turned away), {result['per_sec']:,.1f}/sec, "
+          f"p50 {result['p50'] * 1000:,.0f} ms, p99 {result['p99'] * 1000:,.0f} ms "
+          f"({LOGIN_BCRYPT_WORKERS} bcrypt workers, {concurrency} concurrent sign-ins)")
@@ -0,0 +1,148 @@
+# metrics.py
+# Minimal in-process metrics registry (counters + summaries) with a
+# Prometheus text-format export, so cache/gateway tuning is driven by data.
+#
+# Every process (Streamlit app, render_jobs.py, payment_webhooks.py,
+# reconcile_payments.py, ...) exports its own registry, so each writes its
+# own file and labels its series with role="<entry script>":
+#   metrics/edustat.<role>.prom
+# Set METRICS_ROLE per replica when several run the same script.
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+METRICS_ROLE = re.sub(
+    r"[^A-Za-z0-9_]", "",
+    os.getenv("METRICS_ROLE") or os.path.splitext(os.path.basename(sys.argv[0] if sys.argv else ""))[0],
+) or "app"
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", f"metrics/edustat.{METRICS_ROLE}.prom")
+METRICS_EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "60"))  # seconds, 0 disables
+
+_lock = threading.Lock()
+_counters = defaultdict(float)               # (name, labels) -> value
+_summaries = defaultdict(lambda: [0, 0.0, 0.0])  # (name, labels) -> [count, sum, max]
+_help = {}
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def describe(name: str, help_text: str):
+    """Register the HELP line shown for a metric in the export."""
+    _help[name] = help_text
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increment a counter."""
+    with _lock:
+        _counters[(name, _labels_key(labels))] += value
+    maybe_export()
+
+
+def observe(name: str, value: float, **labels):
+    """Record one observation (latency, size, ...) in a summary."""
+    with _lock:
+        summary = _summaries[(name, _labels_key(labels))]
+        summary[0] += 1
+        summary[1] += value
+        summary[2] = max(summary[2], value)
+    maybe_export()
+
+
+def snapshot() -> dict:
+    """
+    Returns a copy of all metrics:
+    {"counters": {(name, labels): value}, "summaries": {(name, labels): (count, sum, max)}}
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "summaries": {k: tuple(v) for k, v in _summaries.items()},
+        }
+
+
+def reset():
+    """Clear all metrics (tests / admin panel)."""
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
+
+
+def _format_labels(labels: tuple, extra: dict = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus() -> str:
+    """Renders every metric in Prometheus text exposition format."""
+    snap = snapshot()
+    role = {"role": METRICS_ROLE}
+    lines = []
+    seen = set()
+
+    for (name, labels), value in sorted(snap["counters"].items()):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels, role)} {value:g}")
+
+    for (name, labels), (count, total, peak) in sorted(snap["summaries"].items()):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} summary")
+        lines.append(f"{name}_count{_format_labels(labels, role)} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels, role)} {total:g}")
+        lines.append(f"{name}_max{_format_labels(labels, role)} {peak:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path: str = METRICS_TEXTFILE) -> str:
+    """
+    Writes the export atomically (tmp file + rename) so a scraper
+    such as node_exporter's textfile collector never reads a partial file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _export_loop():
+    while True:
+        time.sleep(METRICS_EXPORT_INTERVAL)
+        try:
+            write_prometheus_textfile()
+        except OSError:
+            pass
+
+
+def maybe_export():
+    """
+    Makes sure the text file is written every METRICS_EXPORT_INTERVAL, by one
+    background thread per process (never on the caller's thread).
+    """
+    global _exporter
+    if METRICS_EXPORT_INTERVAL <= 0 or _exporter is not None:
+        return
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name="metrics-export", daemon=True)
+            _exporter.start()
@@ -0,0 +1,175 @@
+# mock_gateway.py
+# Local stand-in for the Paystack and Nomba APIs, for load tests and offline
+# development of the checkout flow. Implements only the endpoints paystack.py
+# and nomba.py call; payments always "go through" unless declined by
+# MOCK_GATEWAY_DECLINE_RATE.
+#
+#   POST /paystack/transaction/initialize
+#   GET  /paystack/transaction/verify/<reference>
+#   POST /nomba/v1/auth/token/issue
+#   POST /nomba/v1/checkout/order
+#   GET  /nomba/v1/transactions/requery/<session id>
+#
+# Point the app at it with
+#   PAYSTACK_BASE_URL=http://localhost:8503/paystack NOMBA_BASE_URL=http://localhost:8503/nomba
+#
+# Run: python mock_gateway.py [--latency MS] [--jitter MS] [--failure-rate R] [--decline-rate R]
+import asyncio
+import json
+import os
+import random
+import sys
+import uuid
+
+import tornado.ioloop
+import tornado.web
+
+MOCK_GATEWAY_PORT = int(os.getenv("MOCK_GATEWAY_PORT", "8503"))
+MOCK_GATEWAY_LATENCY_MS = float(os.getenv("MOCK_GATEWAY_LATENCY_MS", "150"))  # mean response time
+MOCK_GATEWAY_JITTER_MS = float(os.getenv("MOCK_GATEWAY_JITTER_MS", "50"))  # ± uniform
+MOCK_GATEWAY_FAILURE_RATE = float(os.getenv("MOCK_GATEWAY_FAILURE_RATE", "0"))  # share of calls answered 503
+MOCK_GATEWAY_DECLINE_RATE = float(os.getenv("MOCK_GATEWAY_DECLINE_RATE", "0"))  # share of payments that fail
+
+SETTINGS = {
+    "latency_ms": MOCK_GATEWAY_LATENCY_MS,
+    "jitter_ms": MOCK_GATEWAY_JITTER_MS,
+    "failure_rate": MOCK_GATEWAY_FAILURE_RATE,
+    "decline_rate": MOCK_GATEWAY_DECLINE_RATE,
+}
+
+# reference / session id -> {"email", "amount", "status"}; the process is the whole "gateway"
+_transactions = {}
+
+
+class MockHandler(tornado.web.RequestHandler):
+    async def prepare(self):
+        """Simulated network + gateway time, then the configured share of 503s."""
+        delay = SETTINGS["latency_ms"] + random.uniform(-SETTINGS["jitter_ms"], SETTINGS["jitter_ms"])
+        await asyncio.sleep(max(0.0, delay) / 1000)
+        if random.random() < SETTINGS["failure_rate"]:
+            self.set_status(503)
+            self.finish({"status": False, "message": "Mock gateway unavailable"})
+
+    def json_body(self) -> dict:
+        try:
+            return json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+
+    def settle(self, key: str) -> dict:
+        """Decides (once) whether the transaction went through."""
+        transaction = _transactions.get(key)
+        if transaction is None:
+            return None
+        if transaction["status"] == "pending":
+            transaction["status"] = "failed" if random.random() < SETTINGS["decline_rate"] else "success"
+        return transaction
+
+
+# =========================================================
+# PAYSTACK
+# =========================================================
+class PaystackInitializeHandler(MockHandler):
+    def post(self):
+        body = self.json_body()
+        reference = f"mock_{uuid.uuid4().hex[:12]}"
+        _transactions[reference] = {"email": body.get("email"), "amount": int(body.get("amount", 0)), "status": "pending"}
+        self.write({
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"{self.request.protocol}://{self.request.host}/paystack/checkout/{reference}",
+                "access_code": uuid.uuid4().hex[:16],
+                "reference": reference,
+            },
+        })
+
+
+class PaystackVerifyHandler(MockHandler):
+    def get(self, reference):
+        transaction = self.settle(reference)
+        if transaction is None:
+            self.set_status(400)
+            self.write({"status": False, "message": "Transaction reference not found"})
+            return
+        self.write({
+            "status": True,
+            "message": "Verification successful",
+            "data": {
+                "reference": reference,
+                "status": transaction["status"],
+                "amount": transaction["amount"],  # kobo
+                "gateway_response": "Successful" if transaction["status"] == "success" else "Declined",
+                "customer": {"email": transaction["email"]},
+            },
+        })
+
+
+# =========================================================
+# NOMBA
+# =========================================================
+class NombaTokenHandler(MockHandler):
+    def post(self):
+        self.write({"code": "00", "description": "Success", "data": {
+            "access_token": f"mock-{uuid.uuid4().hex}",
+            "expires_in": 3600,
+        }})
+
+
+class NombaCheckoutHandler(MockHandler):
+    def post(self):
+        order = self.json_body().get("order") or {}
+        session_id = uuid.uuid4().hex
+        _transactions[session_id] = {
+            "email": order.get("customerEmail"),
+            "amount": order.get("amount"),
+            "status": "pending",
+            "order_reference": order.get("orderReference"),
+        }
+        self.write({"code": "00", "description": "Success", "data": {
+            "checkoutUrl": f"{self.request.protocol}://{self.request.host}/nomba/checkout/{session_id}",
+            "sessionId": session_id,
+        }})
+
+
+class NombaRequeryHandler(MockHandler):
+    def get(self, session_id):
+        transaction = self.settle(session_id)
+        if transaction is None:
+            self.set_status(404)
+            self.write({"code": "404", "description": "Transaction not found"})
+            return
+        self.write({"code": "00", "description": "Success", "data": {
+            "status": "SUCCESS" if transaction["status"] == "success" else "FAILED",
+            "orderReference": transaction["order_reference"],
+            "amount": transaction["amount"],
+            "customerEmail": transaction["email"],
+        }})
+
+
+def make_app() -> tornado.web.Application:
+    return tornado.web.Application([
+        (r"/paystack/transaction/initialize", PaystackInitializeHandler),
+        (r"/paystack/transaction/verify/([^/]+)", PaystackVerifyHandler),
+        (r"/nomba/v1/auth/token/issue", NombaTokenHandler),
+        (r"/nomba/v1/checkout/order", NombaCheckoutHandler),
+        (r"/nomba/v1/transactions/requery/([^/]+)", NombaRequeryHandler),
+    ])
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+
+    def option(name, default):
+        return float(argv[argv.index(name) + 1]) if name in argv else default
+
+    SETTINGS.update(
+        latency_ms=option("--latency", SETTINGS["latency_ms"]),
+        jitter_ms=option("--jitter", SETTINGS["jitter_ms"]),
+        failure_rate=option("--failure-rate", SETTINGS["failure_rate"]),
+        decline_rate=option("--decline-rate", SETTINGS["decline_rate"]),
+    )
+    make_app().listen(MOCK_GATEWAY_PORT)
+    print(f"🧪 Mock gateway on :{MOCK_GATEWAY_PORT} — {SETTINGS['latency_ms']:.0f}±{SETTINGS['jitter_ms']:.0f} ms, "
+          f"{SETTINGS['failure_rate']:.0%} unavailable, {SETTINGS['decline_rate']:.0%} declined")
+    tornado.ioloop.IOLoop.current().start()
@@ -1,8 +1,12 @@
+import os
+
 import streamlit as st
 
 import requests
 
-import time # NEW: Import the time module
+import gateway_http
+
+import gateway_tokens
  
 # --- Configuration: Load ALL credentials ---
 
@@ -20,30 +24,14 @@ except (FileNotFoundError, KeyError) as e:
 
     ACCOUNT_ID, CLIENT_ID, CLIENT_SECRET = None, None, None
  
-BASE_URL = "https://api.nomba.com"
+BASE_URL = os.getenv("NOMBA_BASE_URL", "https://api.nomba.com")  # see mock_gateway.py for load tests
  
  
-# --- NEW FUNCTION: To get and cache the access token ---
+# --- Access token, shared by every session and replica (see gateway_tokens.py) ---
 
-def get_access_token():
-
-    """
-
-    Fetches a Nomba access token. Caches it in the session state to avoid
-
-    requesting a new token on every API call.
-
-    """
+def _issue_token():
 
-    # Check if a valid token already exists in the session state
-
-    current_time = time.time()
-
-    if 'access_token' in st.session_state and st.session_state.get('token_expiry_time', 0) > current_time:
-
-        return st.session_state.access_token
- 
-    # If no valid token, fetch a new one
+    """ Requests a new access token from Nomba. Returns (access_token, expires_in seconds). """
 
     url = f"{BASE_URL}/v1/auth/token/issue"
 
@@ -64,38 +52,43 @@ def get_access_token():
         "Content-Type": "application/json"
 
     }
- 
-    try:
 
-        response = requests.post(url, json=payload, headers=headers)
+    # Token issue has no side effects, so it may be retried like a GET
 
-        response.raise_for_status()
+    response = gateway_http.post("nomba", url, endpoint="auth/token", idempotent=True, json=payload, headers=headers)
 
-        token_data = response.json()
+    response.raise_for_status()
 
-        if token_data.get("code") == "00":
+    token_data = response.json()
 
-            data = token_data.get("data", {})
+    if token_data.get("code") != "00":
 
-            access_token = data.get("access_token")
+        raise RuntimeError(token_data.get("message"))
 
-            expires_in = data.get("expires_in", 3600)  # Default to 1 hour
+    data = token_data.get("data", {})
 
-            # Cache the new token and its expiry time
+    return data.get("access_token"), data.get("expires_in", 3600)  # Default to 1 hour
+ 
+ 
+def get_access_token():
+
+    """
 
-            st.session_state.access_token = access_token
+    Returns a valid Nomba access token, fetched once and shared by all user
 
-            # Add a 60-second buffer to be safe
+    sessions, or None if Nomba could not issue one.
 
-            st.session_state.token_expiry_time = current_time + expires_in - 60
+    """
 
-            return access_token
+    try:
 
-        else:
+        return gateway_tokens.get_token("nomba", _issue_token)
 
-            st.error(f"Failed to get access token: {token_data.get('message')}")
+    except RuntimeError as e:
 
-            return None
+        st.error(f"Failed to get access token: {e}")
+
+        return None
 
     except requests.exceptions.RequestException as e:
 
@@ -142,7 +135,12 @@ def create_checkout_order(email: str, amount: float, order_id: str, callback_url
 
     try:
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = gateway_http.post("nomba", url, endpoint="checkout/order", json=payload, headers=headers)
+
+        if response.status_code == 401:
+
+            gateway_tokens.invalidate_token("nomba", access_token)  # next call fetches a fresh one
+
 
         response.raise_for_status()
 
@@ -193,7 +191,12 @@ def verify_checkout_payment(session_id: str):
 
     try:
 
-        response = requests.get(url, headers=headers)
+        response = gateway_http.get("nomba", url, endpoint="transactions/requery", headers=headers)
+
+        if response.status_code == 401:
+
+            gateway_tokens.invalidate_token("nomba", access_token)  # next call fetches a fresh one
+
 
         response.raise_for_status()
 
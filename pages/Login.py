@@ -1,22 +1,27 @@
 # pages/Login.py
 import streamlit as st
 import re
-import bcrypt
 import pandas as pd
 from db_connection import create_connection
 from streamlit_local_storage import LocalStorage
 from session_manager import create_session, validate_session
+from login_service import LoginBusy, authenticate, hash_password
 import sys
 from pathlib import Path
  
 # Add parent directory to path to import auth_utils
 sys.path.append(str(Path(__file__).parent.parent))
-from auth_utils import check_authentication, login_user, get_cookie_manager
+from auth_utils import check_authentication, login_user, get_cookie_manager, sync_cookies
  
 st.set_page_config(page_title="Login - Edustat", layout="wide")
  
 # --- Check for Existing Session (Cookie-based) ---
 if check_authentication():
+    # login_user only queues the cookies: leave once the browser has stored them
+    if not sync_cookies():
+        st.info("🔐 Signing you in...")
+        if not st.button("Continue to dashboard", key="cookie_sync_continue"):
+            st.stop()
     st.success("Already logged in! Redirecting to dashboard...")
     st.switch_page("pages/dashboard.py")
     st.stop()
@@ -325,42 +330,32 @@ with col2:
                 st.error("Please enter a valid email address.")
             else:
                 try:
-                    engine = create_connection()
-                    user_df = pd.read_sql(
-                        "SELECT * FROM users WHERE email_address = %s",
-                        engine,
-                        params=(email_val,)
-                    )
+                    # Projected lookup + bcrypt on the login worker pool (see login_service.py)
+                    user = authenticate(email_val, password_val)
  
-                    if not user_df.empty:
-                        hashed_pass = user_df['password'].values[0].encode('utf-8')
+                    if user:
+                        user_id = user["user_id"]
  
-                        if bcrypt.checkpw(password_val.encode('utf-8'), hashed_pass):
-                            # Get user_id from DB
-                            user_id = int(user_df['user_id'].values[0])
-                            username = user_df['username'].values[0]
-                            name = user_df.get('name', {}).values[0] if 'name' in user_df.columns else username
+                        # Create session (Redis, audited in DB)
+                        session_token = create_session(user_id)
  
-                            # Create session in DB
-                            session_token = create_session(user_id)
- 
-                            # Login user using cookie system (this sets both cookies AND session_state)
-                            login_user(
-                                username=username,
-                                user_email=email_val,
-                                user_id=str(user_id)
-                            )
+                        # Login user using cookie system (this sets both cookies AND session_state)
+                        login_user(
+                            username=user["username"],
+                            user_email=email_val,
+                            user_id=str(user_id)
+                        )
  
-                            # Also store session_token for your existing session system
-                            st.session_state.session_token = session_token
+                        # Also store session_token for your existing session system
+                        st.session_state.session_token = session_token
  
-                            st.success("✅ Login successful! Redirecting to dashboard...")
-                            st.switch_page("pages/dashboard.py")
-                        else:
-                            st.error("Invalid email or password.")
+                        # The check at the top redirects once the cookies are stored
+                        st.rerun()
                     else:
                         st.error("Invalid email or password.")
  
+                except LoginBusy:
+                    st.warning("⏳ A lot of people are signing in right now. Please try again in a moment.")
                 except Exception as e:
                     st.error(f"Login error: {e}")
        
@@ -388,7 +383,7 @@ with col2:
                     try:
                         engine = create_connection()
                         user_exists_df = pd.read_sql(
-                            "SELECT * FROM users WHERE email_address = %s",
+                            "SELECT user_id FROM users WHERE email_address = %s",
                             engine,
                             params=(forgot_email,)
                         )
@@ -396,7 +391,7 @@ with col2:
                         if user_exists_df.empty:
                             st.error("Email not found in our records.")
                         else:
-                            hashed_pass = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                            hashed_pass = hash_password(new_password)
                             update_query = "UPDATE users SET password=%s WHERE email_address=%s"
  
                             with engine.begin() as conn:
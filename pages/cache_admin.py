@@ -0,0 +1,152 @@
+# 🛠️ CACHE ADMIN - cache hit/miss metrics for tuning
+import streamlit as st
+import pandas as pd
+from decouple import config
+
+import metrics
+from redis_client import redis_client
+from redis_cache import bump_namespace, namespace_generation
+from cache_budget import usage_report, eviction_policy_status
+
+st.set_page_config(page_title="Cache Admin - Edustat", layout="wide")
+
+# ------------------ AUTH CHECK ------------------
+ADMIN_EMAILS = [e.strip().lower() for e in config("ADMIN_EMAILS", default="").split(",") if e.strip()]
+
+if not st.session_state.get("logged_in", False):
+    st.warning("⚠️ Please sign in to access this page.")
+    st.stop()
+
+if st.session_state.get("user_email", "").lower() not in ADMIN_EMAILS:
+    st.error("❌ This page is restricted to administrators.")
+    st.stop()
+
+st.title("🛠️ Cache Metrics")
+st.caption("Metrics are collected per app process since it started.")
+
+
+# =========================================================
+# PER-NAMESPACE TABLE
+# =========================================================
+def namespace_table(snap: dict) -> pd.DataFrame:
+    rows = {}
+
+    def row(namespace):
+        return rows.setdefault(namespace, {
+            "Namespace": namespace, "Hits": 0, "Misses": 0, "Stale Serves": 0, "Evictions": 0,
+            "Recomputes": 0, "Avg Recompute (ms)": 0.0, "Max Recompute (ms)": 0.0,
+            "Writes": 0, "Avg Size (KiB)": 0.0, "Max Size (KiB)": 0.0,
+        })
+
+    counter_columns = {
+        "cache_hits_total": "Hits",
+        "cache_misses_total": "Misses",
+        "cache_stale_serves_total": "Stale Serves",
+        "cache_evictions_total": "Evictions",
+    }
+    for (name, labels), value in snap["counters"].items():
+        if name in counter_columns:
+            row(dict(labels).get("namespace", "-"))[counter_columns[name]] = int(value)
+
+    for (name, labels), (count, total, peak) in snap["summaries"].items():
+        namespace = dict(labels).get("namespace", "-")
+        if name == "cache_recompute_seconds":
+            r = row(namespace)
+            r["Recomputes"] = count
+            r["Avg Recompute (ms)"] = round(total / count * 1000, 1) if count else 0.0
+            r["Max Recompute (ms)"] = round(peak * 1000, 1)
+        elif name == "cache_value_bytes":
+            r = row(namespace)
+            r["Writes"] = count
+            r["Avg Size (KiB)"] = round(total / count / 1024, 1) if count else 0.0
+            r["Max Size (KiB)"] = round(peak / 1024, 1)
+
+    df = pd.DataFrame(list(rows.values()))
+    if not df.empty:
+        lookups = df["Hits"] + df["Misses"]
+        df.insert(3, "Hit Ratio", (df["Hits"] / lookups.where(lookups > 0)).fillna(0).round(3))
+        df = df.sort_values("Namespace")
+    return df
+
+
+snap = metrics.snapshot()
+table = namespace_table(snap)
+
+st.subheader("📊 Per-Namespace Metrics")
+if table.empty:
+    st.info("ℹ️ No cache activity recorded yet in this process.")
+else:
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+# =========================================================
+# REDIS SERVER STATS
+# =========================================================
+st.subheader("🧠 Redis Server")
+try:
+    stats = redis_client.info("stats")
+    memory = redis_client.info("memory")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Used Memory", memory.get("used_memory_human", "N/A"))
+    col2.metric("Evicted Keys (server)", f"{stats.get('evicted_keys', 0):,}")
+    col3.metric("Keyspace Hits", f"{stats.get('keyspace_hits', 0):,}")
+    col4.metric("Keyspace Misses", f"{stats.get('keyspace_misses', 0):,}")
+except Exception as e:
+    st.warning(f"⚠️ Could not read Redis INFO: {e}")
+
+# =========================================================
+# MEMORY BUDGETS
+# =========================================================
+st.subheader("📦 Memory Budgets")
+try:
+    usage = pd.DataFrame(usage_report())
+    usage["used_mib"] = (usage["used_bytes"] / 1024 / 1024).round(2)
+    usage["budget_mib"] = (usage["budget_bytes"] / 1024 / 1024).round(2)
+    st.dataframe(
+        usage[["namespace", "priority", "keys", "used_mib", "budget_mib", "used_pct", "ttl"]].rename(columns={
+            "namespace": "Namespace", "priority": "Priority", "keys": "Keys", "used_mib": "Used (MiB)",
+            "budget_mib": "Budget (MiB)", "used_pct": "Used %", "ttl": "TTL (s)",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    policy_status = eviction_policy_status()
+    st.caption(f"Redis maxmemory-policy: {policy_status['policy'] or 'unknown'}")
+    for warning in policy_status["warnings"]:
+        st.warning(f"⚠️ {warning}")
+except Exception as e:
+    st.warning(f"⚠️ Could not read cache usage: {e}")
+
+# =========================================================
+# BULK INVALIDATION
+# =========================================================
+st.subheader("🧹 Invalidate Namespace")
+known_namespaces = sorted(set(table["Namespace"]) | {"distinct"}) if not table.empty else ["distinct"]
+col_ns, col_bump = st.columns([3, 1])
+with col_ns:
+    namespace = st.selectbox("Namespace", known_namespaces, label_visibility="collapsed")
+    st.caption(f"Current generation: {namespace_generation(namespace)}")
+with col_bump:
+    if st.button("🧹 Invalidate", use_container_width=True):
+        generation = bump_namespace(namespace)
+        st.success(f"✅ '{namespace}' moved to generation {generation}")
+
+# =========================================================
+# EXPORT
+# =========================================================
+st.subheader("📤 Export")
+col_write, col_reset = st.columns(2)
+with col_write:
+    if st.button("💾 Write Prometheus text file", use_container_width=True):
+        path = metrics.write_prometheus_textfile()
+        st.success(f"✅ Written to {path}")
+with col_reset:
+    if st.button("🔄 Reset counters", use_container_width=True):
+        metrics.reset()
+        st.rerun()
+
+st.download_button(
+    "📥 Download metrics (.prom)",
+    data=metrics.render_prometheus(),
+    file_name="edustat_metrics.prom",
+    mime="text/plain",
+)
@@ -5,7 +5,9 @@ from db_queries import (
     fetch_data,
     create_invoice_record,
 )
-from redis_cache import get_or_set_distinct_values
+from redis_cache import cache_key, get_or_set_many_distinct_values
+from report_registry import required_filters as required_filters_for
+from login_service import get_user_profile
 
 # ------------------ SETTINGS ------------------
 SUBSCRIPTION_AMOUNT = 20000.00  # ₦
@@ -137,68 +139,8 @@ selected_analysis = st.session_state.get("selected_analysis", "")
 selected_subgroup = st.session_state.get("selected_subgroup", "")
 selected_main_group = st.session_state.get("selected_main_group", "")
 
-# ------------------ FILTER MAPPING ------------------
-# Maps each analysis to its required filters
-filter_mapping = {
-    # Age Distribution Analysis
-    "Age Range of Candidates": ["ExamYear", "Sex", "State"],
-    "Age Distribution by Exam Year": ["ExamYear", "Sex", "Age"],
-    "Age Appropriateness Analysis": ["ExamYear", "Age", "ExamType"],
-    "Early/Late Enrollment Patterns": ["ExamYear", "Age", "Sex"],
-    
-    # Gender Equity Analysis
-    "Male-to-Female Ratio": ["ExamYear", "Sex", "State"],
-    "Gender Balance by Exam Year": ["ExamYear", "Sex"],
-    "Gender Distribution by Exam Type": ["ExamYear", "Sex", "ExamType"],
-    "Gender Trends Over Time": ["ExamYear", "Sex"],
-    
-    # Disability Analysis
-    "Disability Inclusion Rate": ["ExamYear", "Disability", "Sex"],
-    "Disability Trends by Year": ["ExamYear", "Disability"],
-    "Disability by Gender Distribution": ["ExamYear", "Disability", "Sex"],
-    "Regional Disability Patterns": ["ExamYear", "Disability", "State"],
-    
-    # State-Level Distribution
-    "State Enrollment Rankings": ["ExamYear", "State", "Sex"],
-    "Regional Access Patterns": ["ExamYear", "State"],
-    "State Trends Over Years": ["ExamYear", "State"],
-    "State Capacity Analysis": ["ExamYear", "State", "Centre"],
-    
-    # Centre/School Comparison
-    "Top Performing Centres": ["ExamYear", "Centre", "State"],
-    "Centre Capacity Utilization": ["ExamYear", "Centre"],
-    "Centre Distribution by State": ["ExamYear", "Centre", "State"],
-    "School-to-School Comparison": ["ExamYear", "Centre", "State"],
-    
-    # Origin Analysis
-    "Top Origin Locations": ["ExamYear", "Origin", "State"],
-    "Local vs External Candidates": ["ExamYear", "Origin"],
-    "Migration Patterns": ["ExamYear", "Origin", "State"],
-    "Origin Diversity Index": ["ExamYear", "Origin"],
-    
-    # Exam Type Analysis
-    "School vs Private Exam Distribution": ["ExamYear", "ExamType", "Sex"],
-    "Exam Type Preferences by Year": ["ExamYear", "ExamType"],
-    "Exam Type by Gender": ["ExamYear", "ExamType", "Sex"],
-    "Exam Type Regional Patterns": ["ExamYear", "ExamType", "State"],
-    
-    # Subject Performance
-    "Most Popular Subjects": ["ExamYear", "Subject", "Sex"],
-    "Subject Difficulty Analysis": ["ExamYear", "Subject", "Grade"],
-    "Subject Preferences by Gender": ["ExamYear", "Subject", "Sex"],
-    "Subject Enrollment Trends": ["ExamYear", "Subject"],
-    
-    # Grade Distribution
-    "Overall Grade Patterns": ["ExamYear", "Grade", "Subject"],
-    "Pass/Fail Rate Analysis": ["ExamYear", "Grade"],
-    "Grade Trends by Subject": ["ExamYear", "Grade", "Subject"],
-    "Grade Performance by Year": ["ExamYear", "Grade"],
-    
-    # Add more mappings as needed...
-}
-
 # Get required filters for selected analysis
-required_filters = filter_mapping.get(selected_analysis, ["ExamYear"])
+required_filters = required_filters_for(selected_analysis)
 
 # Helper function to fetch distinct values
 def fetch_distinct_from_db(column):
@@ -249,12 +191,24 @@ st.markdown('<div class="filter-section-title">Select Filters</div>', unsafe_all
 # Initialize filter values
 filter_values = {}
 
+# Prefetch every DB-backed option list this analysis needs in one Redis round-trip
+DISTINCT_FILTER_COLUMNS = ["ExamYear", "Subject", "State", "Origin"]
+distinct_keys = {
+    column: cache_key("distinct", column)
+    for column in DISTINCT_FILTER_COLUMNS
+    if column in required_filters
+}
+cached_distinct = get_or_set_many_distinct_values({
+    key: (lambda column=column: fetch_distinct_from_db(column))
+    for column, key in distinct_keys.items()
+})
+distinct_values = {column: cached_distinct[key] for column, key in distinct_keys.items()}
+
 # Display filters based on required_filters
 for filter_name in required_filters:
     if filter_name == "ExamYear":
         st.markdown("**Select Exam Year**")
-        cache_key = "distinct:ExamYear"
-        years = get_or_set_distinct_values(cache_key, lambda: fetch_distinct_from_db("ExamYear"))
+        years = distinct_values["ExamYear"]
         filter_values["ExamYear"] = st.selectbox(
             "Select Year",
             ["Please select a filter..."] + years,
@@ -342,8 +296,7 @@ for filter_name in required_filters:
     
     elif filter_name == "Subject":
         st.markdown("**Select Subject**")
-        cache_key = "distinct:Subject"
-        subjects = get_or_set_distinct_values(cache_key, lambda: fetch_distinct_from_db("Subject"))
+        subjects = distinct_values["Subject"]
         
         # Display selected subjects as chips
         selected_subjects = st.session_state.get("selected_subjects", [])
@@ -371,8 +324,7 @@ for filter_name in required_filters:
     
     elif filter_name == "State":
         st.markdown("**Select State**")
-        cache_key = "distinct:State"
-        states = get_or_set_distinct_values(cache_key, lambda: fetch_distinct_from_db("State"))
+        states = distinct_values["State"]
         filter_values["State"] = st.selectbox(
             "Select State",
             ["Please select a filter..."] + states,
@@ -411,8 +363,7 @@ for filter_name in required_filters:
     
     elif filter_name == "Origin":
         st.markdown("**Select Origin**")
-        cache_key = "distinct:Origin"
-        origins = get_or_set_distinct_values(cache_key, lambda: fetch_distinct_from_db("Origin"))
+        origins = distinct_values["Origin"]
         filter_values["Origin"] = st.selectbox(
             "Select Origin",
             ["Please select a filter..."] + origins,
@@ -455,9 +406,9 @@ with col2:
             try:
                 # Ensure user_id exists
                 if not user_id or user_id == 0:
-                    user_df = fetch_data(f"SELECT user_id FROM users WHERE email_address='{user_email}' LIMIT 1")
-                    if not user_df.empty:
-                        user_id = int(user_df["user_id"].iloc[0])
+                    profile = get_user_profile(user_email)
+                    if profile:
+                        user_id = profile["user_id"]
                         st.session_state.user_id = user_id
                 
                 # Create invoice
@@ -7,7 +7,7 @@ from db_queries import (
     fetch_data,
     create_invoice_record,
 )
-from redis_cache import get_or_set_distinct_values
+from report_registry import REPORT_GROUPS
 
 # Add parent directory to path to import auth_utils
 sys.path.append(str(Path(__file__).parent.parent))
@@ -101,110 +101,6 @@ st.session_state.setdefault("selected_subgroup", None)
 st.session_state.setdefault("invoice_ref", None)
 st.session_state.setdefault("payment_verified", False)
 
-# ------------------ COMPLETE REPORT STRUCTURE ------------------
-report_structure = {
-    "Demographic Analysis": {
-        "icon": "👥",
-        "subgroups": {
-            "Age Distribution Analysis": "Analyzes candidate age ranges, trends, and appropriateness across exam years and types.",
-            "Gender Equity Analysis": "Examines male-to-female ratios, gender balance trends, and distribution across exam types.",
-            "Regional & Geographic Distribution": "Maps where candidates come from and migration patterns for education.",
-            "Birth Cohort Analysis": "Examines age-appropriate enrollment and generational education patterns."
-        }
-    },
-    "State Analysis": {
-        "icon": "🗺️",
-        "subgroups": {
-            "State Enrollment & Registration": "Tracks state-level candidate registration, trends, and growth rates.",
-            "State Infrastructure": "Analyzes schools and centres registered per state and capacity utilization.",
-            "State Performance Comparison": "State-to-state performance comparison and quality indicators.",
-            "State Subject Analysis": "Number of subjects registered by state and subject performance.",
-            "State Examination Attendance": "State examination attendance rates and absenteeism patterns."
-        }
-    },
-    "Candidate Registration Statistics": {
-        "icon": "📋",
-        "subgroups": {
-            "Overall Registration Metrics": "Total candidate registration, enrollment trends, and forecasting.",
-            "Subject Registration Patterns": "Number of subjects per candidate and subject combination analysis.",
-            "Institutional Registration": "Number of schools and centres registered with growth trends.",
-            "Registration Demographics": "Age, gender, and regional registration distribution patterns."
-        }
-    },
-    "Candidate Performance Insights": {
-        "icon": "🎯",
-        "subgroups": {
-            "Overall Performance Analysis": "Pass/fail rates, grade distribution, and performance trends.",
-            "Credit Requirements Analysis": "Minimum required credits and credits with English & Mathematics.",
-            "Result Release Statistics": "Result release patterns, withheld results, and processing timelines.",
-            "Comparative Performance Analysis": "School, subject, state, and year-over-year performance comparison."
-        }
-    },
-    "Subject Pattern Insights": {
-        "icon": "📚",
-        "subgroups": {
-            "Subject Enrollment Statistics": "Subject registration numbers, popularity rankings, and trends.",
-            "Subject Performance Analysis": "Results by subject, difficulty assessment, and pass/fail rates.",
-            "Subject Comparisons": "Subject-to-subject performance and benchmark analysis.",
-            "Subject Demographics": "Age, gender, and regional subject preference patterns."
-        }
-    },
-    "Special Needs & Disability Insights": {
-        "icon": "♿",
-        "subgroups": {
-            "Special Needs Registration": "Number of special needs candidates and registration trends.",
-            "Special Needs Demographics": "Age, gender, and state distribution of special needs candidates.",
-            "Special Needs Performance": "Average performance and achievement gap analysis.",
-            "Special Needs Accessibility": "Centres with special needs support and accessibility patterns."
-        }
-    },
-    "School & Centre Analysis": {
-        "icon": "🏫",
-        "subgroups": {
-            "School & Centre Statistics": "Number of schools/centres, capacity utilization, and size distribution.",
-            "Centre Performance Rankings": "Top/bottom performing centres and quality scorecard.",
-            "Centre Distribution & Accessibility": "Centre distribution by state and urban vs rural analysis.",
-            "Centre Capacity Analysis": "Centre size vs performance and optimal capacity analysis."
-        }
-    },
-    "Examination & Academic Performance": {
-        "icon": "📊",
-        "subgroups": {
-            "Exam Type Analysis": "School vs private exams distribution and preferences.",
-            "Exam Type Performance": "Performance by exam type and quality indicators.",
-            "Grade Distribution Analysis": "Overall grade distribution and patterns across variables.",
-            "Examination Attendance": "Attendance rates, registration gaps, and absenteeism patterns."
-        }
-    },
-    "Temporal Trends & Forecasting": {
-        "icon": "📈",
-        "subgroups": {
-            "Year-over-Year Trends": "Enrollment and performance trends across years.",
-            "Growth Rate Analysis": "Year-on-year percentage changes and growth patterns.",
-            "Forecasting & Projections": "Future enrollment and performance trend predictions.",
-            "Seasonal & Cyclical Patterns": "Seasonal registration and examination cycle analysis."
-        }
-    },
-    "Cross-Dimensional Analysis": {
-        "icon": "🔄",
-        "subgroups": {
-            "Gender-Subject Preference": "Gender biases in subject selection and STEM gender gaps.",
-            "Gender-Performance Analysis": "Gender performance gaps and equity in outcomes.",
-            "Age-Performance Correlation": "Optimal age for success and age-grade relationships.",
-            "State-Performance Correlation": "State performance rankings and regional disparities.",
-            "Multi-Variable Analysis": "Complex cross-dimensional insights and correlations."
-        }
-    },
-    "Statistical Insights & Summaries": {
-        "icon": "📉",
-        "subgroups": {
-            "Descriptive Statistics": "Mean, median, mode, variance, and outlier detection.",
-            "Correlation Analysis": "Performance prediction factors and variable relationships.",
-            "Distribution Analysis": "Normal distribution testing and data patterns.",
-            "Advanced Analytics": "Regression analysis, trend analysis, and predictive modeling."
-        }
-    }
-}
 
 # ------------------ HEADER SECTION ------------------
 st.markdown("""
@@ -219,11 +115,11 @@ st.markdown("""
 
 # ------------------ GROUP SELECTION TABS ------------------
 if 'selected_main_group' not in st.session_state or st.session_state.selected_main_group is None:
-    st.session_state.selected_main_group = list(report_structure.keys())[0]
+    st.session_state.selected_main_group = list(REPORT_GROUPS.keys())[0]
 
 # Create clickable group tabs (first 6 groups)
 cols = st.columns(6)
-group_list = list(report_structure.items())
+group_list = list(REPORT_GROUPS.items())
 for idx in range(6):
     group_name, group_data = group_list[idx]
     with cols[idx]:
@@ -255,7 +151,7 @@ st.markdown(f"### 📋 {selected_group}")
 st.markdown("---")
 
 # ------------------ SUBGROUP CARDS ------------------
-subgroups = report_structure[selected_group]["subgroups"]
+subgroups = REPORT_GROUPS[selected_group]["subgroups"]
 
 # Create grid of subgroup cards
 num_cols = 3
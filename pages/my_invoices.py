@@ -166,6 +166,7 @@ try:
             invoice_data,
             total,
             data,
+            pdf,
             created_at
         FROM invoices 
         WHERE user_id = {user_id}
@@ -262,8 +263,9 @@ for idx, row in filtered_invoices.iterrows():
                 st.session_state.saved_group = data_dict.get('report_group')
                 st.session_state.saved_filters = data_dict.get('filters', {})
                 st.session_state.saved_charts = data_dict.get('charts', [])
+                st.session_state.saved_analysis = data_dict.get('analysis')
             except:
-                pass
+                st.session_state.saved_analysis = None
             
             if status == 'PENDING':
                 st.session_state.payment_verified = False
@@ -285,8 +287,9 @@ for idx, row in filtered_invoices.iterrows():
                 st.session_state.saved_group = data_dict.get('report_group')
                 st.session_state.saved_filters = data_dict.get('filters', {})
                 st.session_state.saved_charts = data_dict.get('charts', [])
+                st.session_state.saved_analysis = data_dict.get('analysis')
             except:
-                pass
+                st.session_state.saved_analysis = None
             
             if status == 'PENDING':
                 st.session_state.payment_verified = False
@@ -318,9 +321,11 @@ for idx, row in filtered_invoices.iterrows():
                     st.session_state.saved_group = data_dict.get('report_group')
                     st.session_state.saved_filters = data_dict.get('filters', {})
                     st.session_state.saved_charts = data_dict.get('charts', [])
+                    st.session_state.saved_analysis = data_dict.get('analysis')
                     st.session_state.saved_columns = data_dict.get('columns', [])
                     st.session_state.saved_description = data_dict.get('description', f"Custom Report - {data_dict.get('report_group', 'N/A')}")
                 except:
+                    st.session_state.saved_analysis = None
                     st.session_state.saved_columns = []
                     st.session_state.saved_description = f"Custom Report - {report_type}"
                 
@@ -335,18 +340,13 @@ for idx, row in filtered_invoices.iterrows():
         # Download PDF
         with action_cols[1]:
             try:
-                from invoice_pdf import generate_invoice_pdf
-                pdf_path = generate_invoice_pdf(
-                    invoice_ref=ref,
-                    user_email=user_email,
-                    amount=amount,
-                    description=f"Custom Report - {report_type}",
-                    selected_group=report_type,
-                    selected_columns=[],
-                    status=status,
-                )
+                from invoice_pdf import invoice_args_from_row
+                from invoice_cache import get_or_render_invoice_pdf
+                from artifact_store import open_artifact
+                # Stored PDF for this status is served as-is; rendered only once otherwise
+                pdf_path = get_or_render_invoice_pdf(invoice_args_from_row(row, user_email), row=row)
                 
-                with open(pdf_path, "rb") as pdf_file:
+                with open_artifact(pdf_path) as pdf_file:
                     st.download_button(
                         "📥",
                         pdf_file,
@@ -370,8 +370,9 @@ for idx, row in filtered_invoices.iterrows():
                         st.session_state.saved_group = data_dict.get('report_group')
                         st.session_state.saved_filters = data_dict.get('filters', {})
                         st.session_state.saved_charts = data_dict.get('charts', [])
+                        st.session_state.saved_analysis = data_dict.get('analysis')
                     except:
-                        pass
+                        st.session_state.saved_analysis = None
                     
                     st.switch_page("pages/view_invoice.py")
             
@@ -386,8 +387,9 @@ for idx, row in filtered_invoices.iterrows():
                         st.session_state.saved_group = data_dict.get('report_group')
                         st.session_state.saved_filters = data_dict.get('filters', {})
                         st.session_state.saved_charts = data_dict.get('charts', [])
+                        st.session_state.saved_analysis = data_dict.get('analysis')
                     except:
-                        pass
+                        st.session_state.saved_analysis = None
                     
                     st.switch_page("pages/view_report.py")
         
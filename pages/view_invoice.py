@@ -4,7 +4,6 @@
 
 import streamlit as st
 import streamlit.components.v1 as components
-import os
 import base64
 from datetime import datetime
 from db_queries import (
@@ -14,9 +13,14 @@ from db_queries import (
     mark_invoice_paid_by_paystack_ref,
     mark_invoice_failed,  # NEW: Add this function to db_queries
     save_user_report,
+    fetch_invoice_status,
 )
 from paystack import initialize_transaction, verify_transaction
-from invoice_pdf import generate_invoice_pdf
+from render_jobs import DONE, ensure_workers
+from job_widgets import job_download, artifact_download, session_job
+from invoice_cache import lookup_invoice_pdf
+
+WEBHOOK_POLL_INTERVAL = 5  # seconds between checks for a webhook-settled payment
 
 # ------------------ SETTINGS ------------------
 SUBSCRIPTION_AMOUNT = 20000.00  # ₦
@@ -111,16 +115,23 @@ if payment_failed:
 if not payment_verified and not payment_failed:
     st.subheader("📄 Pending Invoice")
     
-    # Generate pending invoice PDF
-    pdf_path = generate_invoice_pdf(
-        invoice_ref=invoice_ref,
-        user_email=user_email,
-        amount=SUBSCRIPTION_AMOUNT,
-        description=saved_description,
-        selected_group=saved_group,
-        selected_columns=saved_columns,
-        status="Pending Payment",
-    )
+    # Serve the stored pending invoice, or generate it in the background
+    pending_pdf_ref = lookup_invoice_pdf(invoice_ref, "Pending Payment")
+    if pending_pdf_ref is None:
+        ensure_workers()
+        pending_pdf_job = session_job(
+            "invoice_pdf",
+            {
+                "invoice_ref": invoice_ref,
+                "user_email": user_email,
+                "amount": SUBSCRIPTION_AMOUNT,
+                "description": saved_description,
+                "selected_group": saved_group,
+                "selected_columns": saved_columns,
+                "status": "Pending Payment",
+            },
+            dedupe_key=f"invoice_pdf:{invoice_ref}:pending",
+        )
 
     # Display pending invoice with watermark
     watermark_base64 = get_base64_image(WATERMARK_PATH)
@@ -182,13 +193,20 @@ if not payment_verified and not payment_failed:
     components.html(container, height=680, scrolling=True)
 
     # Download pending invoice
-    with open(pdf_path, "rb") as f:
-        st.download_button(
-            "📄 Download Pending Invoice PDF",
-            f,
-            file_name=os.path.basename(pdf_path),
-            mime="application/pdf",
+    if pending_pdf_ref is not None:
+        artifact_download(
+            pending_pdf_ref,
+            label="📄 Download Pending Invoice PDF",
+            file_name=f"Invoice_{invoice_ref.replace('/', '_')}.pdf",
+            key="pending_invoice_download",
+        )
+    else:
+        job_download(
+            pending_pdf_job,
+            label="📄 Download Pending Invoice PDF",
+            file_name=f"Invoice_{invoice_ref.replace('/', '_')}.pdf",
             key="pending_invoice_download",
+            dedupe_key=f"invoice_pdf:{invoice_ref}:pending",
         )
 
     # ============================================================
@@ -229,6 +247,17 @@ if not payment_verified and not payment_failed:
         st.markdown("---")
         st.subheader("✔️ Verify Payment")
 
+        # The payment webhook (payment_webhooks.py) settles the invoice on its
+        # own; pick that up from the DB so the user doesn't have to click.
+        @st.fragment(run_every=WEBHOOK_POLL_INTERVAL)
+        def _await_settlement():
+            if str(fetch_invoice_status(invoice_ref) or "").lower() == "paid":
+                st.session_state.payment_verified = True
+                st.rerun()
+            st.caption("⏳ Waiting for payment confirmation...")
+
+        _await_settlement()
+
         if st.button("Verify My Payment", type="primary", key="verify_btn"):
             paystack_ref = st.session_state.get("paystack_reference")
             
@@ -278,20 +307,26 @@ if payment_verified:
     saved_charts = st.session_state.get("saved_charts", [])
     saved_where = st.session_state.get("saved_where_clause", "1=1")
     
-    # Generate paid invoice PDF
-    if not st.session_state.get("paid_pdf_generated", False):
+    # Serve the stored paid invoice (refresh, other device), else render it in the background
+    if not st.session_state.get("paid_pdf_path"):
+        st.session_state.paid_pdf_path = lookup_invoice_pdf(invoice_ref, "PAID")
+    paid_pdf_job = None
+    if not st.session_state.get("paid_pdf_path"):
         try:
-            paid_pdf_path = generate_invoice_pdf(
-                invoice_ref=invoice_ref,
-                user_email=user_email,
-                amount=SUBSCRIPTION_AMOUNT,
-                description=saved_description,
-                selected_group=saved_group,
-                selected_columns=saved_columns,
-                status="PAID ✅",
+            ensure_workers()
+            paid_pdf_job = session_job(
+                "invoice_pdf",
+                {
+                    "invoice_ref": invoice_ref,
+                    "user_email": user_email,
+                    "amount": SUBSCRIPTION_AMOUNT,
+                    "description": saved_description,
+                    "selected_group": saved_group,
+                    "selected_columns": saved_columns,
+                    "status": "PAID ✅",
+                },
+                dedupe_key=f"invoice_pdf:{invoice_ref}:paid",
             )
-            st.session_state.paid_pdf_path = paid_pdf_path
-            st.session_state.paid_pdf_generated = True
         except Exception as e:
             st.error(f"❌ Error generating invoice PDF: {str(e)}")
             st.stop()
@@ -354,14 +389,23 @@ if payment_verified:
     components.html(container_paid, height=680, scrolling=True)
     
     # Download paid invoice
-    with open(st.session_state.paid_pdf_path, "rb") as f:
-        st.download_button(
-            "📄 Download Invoice PDF",
-            f,
-            file_name=os.path.basename(st.session_state.paid_pdf_path),
-            mime="application/pdf",
-            key="download_paid_invoice"
+    if paid_pdf_job is None:
+        artifact_download(
+            st.session_state.paid_pdf_path,
+            label="📄 Download Invoice PDF",
+            file_name=f"Invoice_{invoice_ref.replace('/', '_')}.pdf",
+            key="download_paid_invoice",
+        )
+    else:
+        paid_pdf_status = job_download(
+            paid_pdf_job,
+            label="📄 Download Invoice PDF",
+            file_name=f"Invoice_{invoice_ref.replace('/', '_')}.pdf",
+            key="download_paid_invoice",
+            dedupe_key=f"invoice_pdf:{invoice_ref}:paid",
         )
+        if paid_pdf_status is not None and paid_pdf_status["status"] == DONE:
+            st.session_state.paid_pdf_path = paid_pdf_status["result"]["pdf_path"]
     
     # ========================================
     # SAVE REPORT
@@ -381,6 +425,8 @@ if payment_verified:
         if st.button("💾 Save Report", type="primary"):
             if not report_name.strip():
                 st.error("❌ Report name cannot be empty.")
+            elif not st.session_state.get("paid_pdf_path"):
+                st.info("ℹ️ Your invoice PDF is still being generated. Please try again in a moment.")
             else:
                 try:
                     save_user_report(
@@ -1,17 +1,19 @@
 # 📄 VIEW REPORT 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import tempfile
 from datetime import datetime
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
-from watermark import add_watermark
-from io import BytesIO
 from report_summary import generate_report_summary
+from report_metrics import compute_report_metrics, breakdown_items
+from report_registry import CHARTS, charts_for_report, compute_aggregations
+from report_cache import report_result_key, get_report_result, store_report_result, pack_report_result
+from Analytics_layer import dataset_version
+from chart_renderer import render_images
+from report_pdf import PDF_CHART_MODE
+from render_jobs import ensure_workers
+from job_widgets import job_download, session_job
+from report_exports import available_formats, export_key, cached_export, build_export
+from artifact_store import open_artifact
 
 # PAGE CONFIGURATION
 st.set_page_config(page_title="View Report - Edustat", layout="wide")
@@ -251,28 +253,41 @@ st.markdown(f"""
 # =========================================================
 # CALCULATE METRICS
 # =========================================================
-top_age = df['Age'].mode()[0] if 'Age' in df.columns and not df['Age'].empty else "N/A"
-female_pct = (df["Sex"].str.lower().eq("female").sum() / len(df) * 100) if "Sex" in df.columns else 0
-female_pct = round(female_pct, 0)
-top_state = df['State'].mode()[0] if 'State' in df.columns and not df['State'].empty else "N/A"
-top_state_count = df["State"].value_counts().get(top_state, 0) if top_state != "N/A" else 0
-peak_year = df['ExamYear'].mode()[0] if 'ExamYear' in df.columns and not df['ExamYear'].empty else "N/A"
+saved_analysis = st.session_state.get("saved_analysis")
+
+# Same dataset + analysis + filters → same result for every buyer
+result_key = report_result_key(dataset_version(), saved_analysis, saved_group, saved_filters)
+cached_result = get_report_result(result_key)
+
+if cached_result is None:
+    report_metrics = compute_report_metrics(df)
+    summary_items = breakdown_items(report_metrics)
+    report_metrics.pop("tables")
+else:
+    report_metrics = cached_result["metrics"]
+    summary_items = cached_result["summary_items"]
 
 metrics = {
-    "modal_age": top_age,
-    "female_pct": female_pct,
-    "top_state": top_state,
-    "top_state_count": top_state_count,
-    "peak_year": peak_year,
+    "modal_age": report_metrics["modal_age"],
+    "female_pct": report_metrics["female_pct"],
+    "top_state": report_metrics["top_state"],
+    "top_state_count": report_metrics["top_state_count"],
+    "peak_year": report_metrics["peak_year"],
 }
+female_pct = report_metrics["female_pct"]
+top_state = report_metrics["top_state"]
+peak_year = report_metrics["peak_year"]
 
 # Generate report summary
-summary_text = generate_report_summary(
-    report_group=saved_group,
-    total_records=len(df),
-    metrics=metrics,
-    applied_filters=saved_filters
-)
+if cached_result is None:
+    summary_text = generate_report_summary(
+        report_group=saved_group,
+        total_records=len(df),
+        metrics=metrics,
+        applied_filters=saved_filters
+    )
+else:
+    summary_text = cached_result["summary_text"]
 
 # =========================================================
 # KEY METRICS CARDS
@@ -292,7 +307,7 @@ with col1:
 
 with col2:
     if "Sex" in df.columns:
-        female_count = df["Sex"].str.lower().eq("female").sum()
+        female_count = report_metrics["female_count"]
         st.markdown(f"""
         <div class="kpi-card">
             <div class="kpi-icon">♀️</div>
@@ -347,37 +362,6 @@ st.markdown('</div>', unsafe_allow_html=True)
 # =========================================================
 st.markdown('<div class="section-header">📈 Data Breakdown</div>', unsafe_allow_html=True)
 
-summary_items = []
-
-# Total candidates
-summary_items.append(("Total Candidates", f"{len(df):,}"))
-
-# ExamYear distribution
-if "ExamYear" in df.columns:
-    year_counts = df["ExamYear"].value_counts().sort_index()
-    for year, count in year_counts.items():
-        summary_items.append((f"Exam Year {year}", f"{count:,}"))
-
-# Sex distribution
-if "Sex" in df.columns:
-    sex_counts = df["Sex"].value_counts()
-    for k, v in sex_counts.items():
-        summary_items.append((f"Sex — {k}", f"{v:,}"))
-
-# Disability
-if "Disability" in df.columns:
-    dis_counts = df["Disability"].value_counts()
-    for k, v in dis_counts.items():
-        summary_items.append((f"Disability — {k}", f"{v:,}"))
-
-# Age (most common age)
-if "Age" in df.columns:
-    age_counts = df["Age"].value_counts().sort_values(ascending=False)
-    if not age_counts.empty:
-        top_age_val = age_counts.index[0]
-        top_age_count = age_counts.iloc[0]
-        summary_items.append(("Modal Age", f"{top_age_val} years ({top_age_count:,} candidates)"))
-
 # Render summary
 st.markdown('<div class="summary-box">', unsafe_allow_html=True)
 for metric, value in summary_items:
@@ -388,8 +372,6 @@ for metric, value in summary_items:
     """, unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Create summary DataFrame for PDF
-summary_df = pd.DataFrame(summary_items, columns=["Metric", "Value"])
 
 # =========================================================
 # GLOBAL COLOR PALETTE
@@ -401,295 +383,109 @@ COLOR_PALETTE = ["#1e293b", "#667eea", "#28a745", "#dc3545", "#ffa500"]
 # =========================================================
 st.markdown('<div class="section-header">📊 Automated Insights</div>', unsafe_allow_html=True)
 
-chart_images = []
-
 def safe_plot(fig):
-    """Render and export chart safely."""
+    """Render chart in the page (image export happens in one batch below)."""
     st.plotly_chart(fig, config={'displayModeBar': False}, use_container_width=True)
-    
-    tmp_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_chart:
-            fig.write_image(tmp_chart.name, format="png", scale=2, width=800, height=400)
-            tmp_path = tmp_chart.name
-    except Exception as e:
-        st.warning(f"⚠️ Could not export chart image: {e}")
-    
-    return tmp_path
-
-# --- Insights by Group ---
-if saved_group == "Demographic Analysis":
-    
-    # Gender distribution
-    if "Sex" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Gender Distribution</div>', unsafe_allow_html=True)
-        
-        fig_gender = px.pie(
-            df, 
-            names="Sex", 
-            hole=0.4, 
-            color_discrete_sequence=COLOR_PALETTE
-        )
-        fig_gender.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=20),
-            height=350,
-            font=dict(family="Arial, sans-serif", size=12)
-        )
-        chart_images.append(safe_plot(fig_gender))
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Disability
-    if "Disability" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Disability Status Breakdown</div>', unsafe_allow_html=True)
-        
-        dis_data = df["Disability"].value_counts().reset_index()
-        dis_data.columns = ["Disability", "Count"]
-        
-        fig_dis = px.bar(
-            dis_data, 
-            x="Disability", 
-            y="Count", 
-            color="Disability",
-            color_discrete_sequence=COLOR_PALETTE
-        )
-        fig_dis.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=40),
-            height=350,
-            showlegend=False,
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
-        )
-        chart_images.append(safe_plot(fig_dis))
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Age distribution
-    if "Age" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Age Distribution</div>', unsafe_allow_html=True)
-        
-        fig_age = px.histogram(
-            df, 
-            x="Age", 
-            nbins=10,
-            color_discrete_sequence=[COLOR_PALETTE[0]]
-        )
-        fig_age.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=40),
-            height=350,
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
-        )
-        chart_images.append(safe_plot(fig_age))
-        st.markdown('</div>', unsafe_allow_html=True)
-
-elif saved_group == "Geographic & Institutional Insights":
-    
-    if "State" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Candidates by State</div>', unsafe_allow_html=True)
-        
-        state_data = df["State"].value_counts().reset_index()
-        state_data.columns = ["State", "Count"]
-        
-        fig_state = px.bar(
-            state_data, 
-            x="State", 
-            y="Count", 
-            color="State",
-            color_discrete_sequence=COLOR_PALETTE
-        )
-        fig_state.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=40),
-            height=400,
-            showlegend=False,
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
-        )
-        chart_images.append(safe_plot(fig_state))
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    if "Centre" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Top 10 Exam Centers by Candidates</div>', unsafe_allow_html=True)
-        
-        center_data = df["Centre"].value_counts().reset_index().head(10)
-        center_data.columns = ["Centre", "Count"]
-        
-        fig_center = px.bar(
-            center_data, 
-            x="Centre", 
-            y="Count", 
-            color="Centre",
-            color_discrete_sequence=COLOR_PALETTE
-        )
-        fig_center.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=80),
-            height=400,
-            showlegend=False,
-            xaxis=dict(showgrid=False, tickangle=-45),
-            yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
-        )
-        chart_images.append(safe_plot(fig_center))
-        st.markdown('</div>', unsafe_allow_html=True)
+    return fig
+
+def build_figure(chart, data):
+    """Plotly figure for a registry chart from its pre-aggregated data."""
+    dims = chart["dims"]
+    series = dims[1] if len(dims) > 1 else None
+    layout = dict(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        margin=dict(l=20, r=20, t=20, b=40),
+        height=350,
+        font=dict(family="Arial, sans-serif", size=12),
+        xaxis=dict(showgrid=False),
+        yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
+    )
 
-elif saved_group == "Equity & Sponsorship":
-    
-    if "Sponsor" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Sponsorship Distribution</div>', unsafe_allow_html=True)
-        
-        fig_sponsor = px.pie(
-            df, 
-            names="Sponsor", 
-            hole=0.4, 
-            color_discrete_sequence=COLOR_PALETTE
+    if chart["kind"] == "pie":
+        fig = px.pie(data, names=dims[0], values="Count", hole=0.4, color_discrete_sequence=COLOR_PALETTE)
+        layout["margin"] = dict(l=20, r=20, t=20, b=20)
+    elif chart["kind"] == "histogram":
+        fig = px.bar(
+            data,
+            x="Center",
+            y="Count",
+            color=series,
+            hover_data={"Start": True, "End": True, "Center": False},
+            labels={"Center": dims[0]},
+            color_discrete_sequence=COLOR_PALETTE if series else [COLOR_PALETTE[0]]
         )
-        fig_sponsor.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=20),
-            height=350
+        if not data.empty:
+            fig.update_traces(width=float(data["Width"].iloc[0]))
+        layout["bargap"] = 0
+    elif chart["kind"] == "line":
+        fig = px.line(
+            data,
+            x=dims[0],
+            y="Count",
+            color=series,
+            markers=True,
+            color_discrete_sequence=COLOR_PALETTE if series else [COLOR_PALETTE[0]]
         )
-        chart_images.append(safe_plot(fig_sponsor))
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    if {"Sponsor", "Disability"}.issubset(df.columns):
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Disability vs Sponsorship</div>', unsafe_allow_html=True)
-        
-        sponsor_dis = df.groupby(["Sponsor", "Disability"]).size().reset_index(name="Count")
-        fig_equity = px.bar(
-            sponsor_dis, 
-            x="Sponsor", 
-            y="Count", 
-            color="Disability",
-            barmode="group", 
+    else:
+        fig = px.bar(
+            data,
+            x=dims[0],
+            y="Count",
+            color=series or dims[0],
+            barmode="group",
             color_discrete_sequence=COLOR_PALETTE
         )
-        fig_equity.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=40),
-            height=400,
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
-        )
-        chart_images.append(safe_plot(fig_equity))
-        st.markdown('</div>', unsafe_allow_html=True)
+        layout["height"] = 400
+        layout["showlegend"] = series is not None
+        if chart.get("top"):
+            layout["margin"] = dict(l=20, r=20, t=20, b=80)
+            layout["xaxis"] = dict(showgrid=False, tickangle=-45)
+
+    fig.update_layout(**layout)
+    return fig
+
+# --- Insights for the selected analysis (falls back to the group's charts) ---
+if cached_result is None:
+    chart_ids = charts_for_report(saved_analysis, saved_group, df.columns)
+    chart_data = compute_aggregations(df, chart_ids)
+    cached_images = {}
+else:
+    chart_ids = list(cached_result["aggregates"])
+    chart_data = cached_result["aggregates"]
+    cached_images = cached_result["chart_images"]
+
+figures = {}
+for chart_id in chart_ids:
+    chart = CHARTS[chart_id]
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.markdown(f'<div class="chart-title">{chart["title"]}</div>', unsafe_allow_html=True)
+    figures[chart_id] = safe_plot(build_figure(chart, chart_data[chart_id]))
+    st.markdown('</div>', unsafe_allow_html=True)
 
-elif saved_group == "Temporal & Progression Trends":
-    
-    if "ExamYear" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.markdown('<div class="chart-title">Candidate Trend Over Years</div>', unsafe_allow_html=True)
-        
-        trend = df["ExamYear"].value_counts().sort_index().reset_index()
-        trend.columns = ["ExamYear", "Count"]
-        
-        fig_year = px.line(
-            trend, 
-            x="ExamYear", 
-            y="Count", 
-            markers=True,
-            color_discrete_sequence=[COLOR_PALETTE[0]]
-        )
-        fig_year.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=40),
-            height=350,
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=True, gridcolor='#f1f3f5')
+# Export every chart without a cached image concurrently on the warm renderer
+# (vector PDFs draw charts from the aggregates and need no images at all)
+to_render = [] if PDF_CHART_MODE == "vector" else [
+    chart_id for chart_id in chart_ids if cached_images.get(chart_id) is None
+]
+rendered = dict(zip(to_render, render_images([figures[c] for c in to_render])))
+if any(rendered[c] is None for c in to_render):
+    st.warning("⚠️ Some charts could not be exported as images")
+chart_images = [cached_images.get(c) or rendered.get(c) for c in chart_ids]
+
+result_cached = cached_result is not None
+if not result_cached:
+    try:
+        result_cached = store_report_result(
+            result_key,
+            aggregates=chart_data,
+            metrics=report_metrics,
+            summary_text=summary_text,
+            summary_items=summary_items,
+            chart_images=dict(zip(chart_ids, chart_images)),
         )
-        chart_images.append(safe_plot(fig_year))
-        st.markdown('</div>', unsafe_allow_html=True)
-
-# =========================================================
-# PDF GENERATION SETUP
-# =========================================================
-summary_style = ParagraphStyle(
-    name='SummaryStyle',
-    fontName='Helvetica',
-    fontSize=14,
-    leading=16,
-    alignment=0,
-    spaceAfter=12
-)
-
-@st.cache_data(show_spinner=False)
-def generate_pdf(dataframe, title, chart_paths, user_email):
-    """Generate styled PDF with title, table, and charts."""
-    styles = getSampleStyleSheet()
-    report_title = Paragraph(f"<b>{title}</b>", styles["Title"])
-    date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    generated_on = Paragraph(f"Generated on: {date_str}", styles["Normal"])
-    
-    user_identifier = user_email.split("@")[0].replace(".", " ").title()
-    user_identifier_display = Paragraph(
-        f"<para align='center'><font size=20><b>Name: </b></font><font size=26><b>{user_identifier}</b></font></para>",
-        styles["Normal"]
-    )
-
-    data = [dataframe.columns.tolist()] + dataframe.values.tolist()
-    table = Table(data, colWidths=[200, 300])
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e293b")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
-        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-        ("FONTSIZE", (0, 0), (-1, -1), 14)
-    ]))
-
-    def footer(canvas_obj, doc):
-        canvas_obj.saveState()
-        canvas_obj.setFont("Helvetica", 10)
-        canvas_obj.drawString(40, 20, "© Copyright 2025 Edustat. - All rights reserved")
-        canvas_obj.drawRightString(800, 20, f"email: {user_email}")
-        canvas_obj.restoreState()
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmpfile:
-        doc = SimpleDocTemplate(tmpfile.name, pagesize=landscape(A4))
-        elements = [
-            report_title,
-            Spacer(1, 18),
-            generated_on,
-            Spacer(1, 18),
-            user_identifier_display,
-            Spacer(1, 24),
-            Paragraph("<b>Report Summary</b>", styles["Heading2"]),
-            Spacer(1, 6),
-            Paragraph(summary_text, summary_style),
-            Spacer(1, 12),
-            Paragraph("<b>Filtered Data Summary</b>", styles["Heading2"]),
-            Spacer(1, 6),
-            table,
-        ]
-
-        # Add charts
-        for path in chart_paths:
-            if path:
-                elements.append(PageBreak())
-                elements.append(Paragraph("<b>Chart Visualization</b>", styles["Heading2"]))
-                elements.append(Spacer(1, 12))
-                elements.append(Image(path, width=700, height=400))
-        
-        doc.build(elements, onFirstPage=footer, onLaterPages=footer)
-        return tmpfile.name
+    except Exception as e:
+        st.warning(f"⚠️ Could not cache report result: {e}")
 
 # =========================================================
 # DOWNLOAD SECTION
@@ -703,22 +499,40 @@ user_identifier = st.session_state.get("user_email", "user").split("@")[0]
 user_email = st.session_state.get("user_email", "no-email")
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-# CSV Download
+# Data Download (built only when asked for, then cached per report)
 with col_down1:
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.markdown('<div class="chart-title">📊 CSV Export</div>', unsafe_allow_html=True)
+    st.markdown('<div class="chart-title">📊 Data Export</div>', unsafe_allow_html=True)
     st.markdown('<p style="color: #6c757d; margin-bottom: 1rem;">Download the raw data for external analysis</p>', unsafe_allow_html=True)
     
-    csv_data = df.to_csv(index=False).encode("utf-8")
-    csv_filename = f"{user_identifier}_{saved_group.replace(' ', '_')}.csv"
-    
-    st.download_button(
-        label="📥 Download CSV",
-        data=csv_data,
-        file_name=csv_filename,
-        mime="text/csv",
-        use_container_width=True
+    export_formats = available_formats(len(df))
+    export_format = st.selectbox(
+        "Format",
+        list(export_formats),
+        format_func=lambda fmt: export_formats[fmt]["label"],
+        key="export_format"
     )
+    export_spec = export_formats[export_format]
+    export_cache_key = export_key(result_key, df.columns, export_format)
+    export_ref = cached_export(export_cache_key)
+    
+    if export_ref is None and st.button(f"⚙️ Prepare {export_spec['label']} export", use_container_width=True):
+        try:
+            with st.spinner("Preparing export..."):
+                export_ref = build_export(df, export_format, export_cache_key)
+        except Exception as e:
+            st.error(f"⚠️ Error preparing export: {str(e)}")
+    
+    if export_ref is not None:
+        with open_artifact(export_ref) as export_file:
+            st.download_button(
+                label=f"📥 Download {export_spec['label']}",
+                data=export_file,
+                file_name=f"{user_identifier}_{saved_group.replace(' ', '_')}{export_spec['ext']}",
+                mime=export_spec["mime"],
+                key="report_export_download",
+                use_container_width=True
+            )
     st.markdown('</div>', unsafe_allow_html=True)
 
 # PDF Download
@@ -727,36 +541,28 @@ with col_down2:
     st.markdown('<div class="chart-title">📄 PDF Report</div>', unsafe_allow_html=True)
     st.markdown('<p style="color: #6c757d; margin-bottom: 1rem;">Download a comprehensive PDF with all visualizations</p>', unsafe_allow_html=True)
     
-    if chart_images:
-        valid_charts = [img for img in chart_images if img is not None]
+    if chart_ids:
+        valid_charts = chart_ids if PDF_CHART_MODE == "vector" else [img for img in chart_images if img is not None]
         
         if valid_charts:
             try:
-                pdf_path = generate_pdf(
-                    summary_df, 
-                    f"{saved_group} Summary Report", 
-                    valid_charts, 
-                    user_email
-                )
-                
-                with open(pdf_path, "rb") as pdf_file:
-                    pdf_bytes = BytesIO(pdf_file.read())
-                    pdf_bytes.seek(0)
-                    
-                    # Apply watermark
-                    pdf = add_watermark(
-                        input_pdf_stream=pdf_bytes, 
-                        watermark_image_path="altered_edustat.jpg"
+                # Rendered by a background worker; this page only polls for it
+                ensure_workers()
+                pdf_dedupe_key = f"report_pdf:{result_key}:{user_email}"
+                pdf_payload = {"result_key": result_key, "title": f"{saved_group} Summary Report", "user_email": user_email}
+                if not result_cached:
+                    # Not in the shared cache: the worker gets the result with the job
+                    pdf_payload["result"] = pack_report_result(
+                        chart_data, report_metrics, summary_text, summary_items, dict(zip(chart_ids, chart_images))
                     )
-                
-                st.download_button(
+                pdf_job = session_job("report_pdf", pdf_payload, dedupe_key=pdf_dedupe_key)
+                job_download(
+                    pdf_job,
                     label="📄 Download PDF",
-                    data=pdf,
                     file_name=f"{saved_group.replace(' ', '_')}_report.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
+                    key="report_pdf_download",
+                    dedupe_key=pdf_dedupe_key,
                 )
-            
             except Exception as e:
                 st.error(f"⚠️ Error generating PDF: {str(e)}")
         else:
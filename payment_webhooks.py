@@ -0,0 +1,341 @@
+# payment_webhooks.py
+# Webhook receiver for Paystack and Nomba payment events, so invoices are
+# settled when the gateway pushes the result instead of when the user
+# clicks "Verify My Payment".
+#
+#   POST /webhooks/paystack    x-paystack-signature: hex HMAC-SHA512(secret key, body)
+#   POST /webhooks/nomba       nomba-signature: base64 HMAC-SHA256(webhook secret, body)
+#   GET  /healthz
+#
+# Every event is claimed once per (gateway, reference) in Redis, so gateway
+# retries and duplicate deliveries are acknowledged without settling twice.
+# A claim is released if settlement fails, and the gateway's retry runs again.
+# The payment record and the invoice update commit in one transaction; a
+# payment short of the invoice total is recorded but leaves the invoice unpaid.
+#
+# Run:              python payment_webhooks.py
+# Local test event: python payment_webhooks.py send paystack <reference> [email] [amount]
+#                   python payment_webhooks.py send nomba <invoice ref> [email] [amount]
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sys
+import time
+
+import tornado.ioloop
+import tornado.web
+from sqlalchemy import text
+
+from redis_client import redis_client
+import metrics
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8502"))
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", f"http://localhost:{WEBHOOK_PORT}")
+WEBHOOK_SEEN_TTL = int(os.getenv("WEBHOOK_SEEN_TTL", str(60 * 60 * 24 * 7)))  # remember settled references
+WEBHOOK_CLAIM_TTL = int(os.getenv("WEBHOOK_CLAIM_TTL", "120"))  # max time one settlement may hold its claim
+
+SEEN_KEY = "webhook:seen:{gateway}:{reference}"
+
+MISMATCH = "amount_mismatch"
+
+INVOICE_SQL = {
+    "paystack": text("""
+        SELECT i.ref, i.total, i.data, i.invoice_data, i.created_at, u.email_address
+        FROM invoices i
+        JOIN users u ON u.user_id = i.user_id
+        WHERE JSON_UNQUOTE(JSON_EXTRACT(i.invoice_data, '$.paystack_reference')) = :reference
+    """),
+    "nomba": text("""
+        SELECT i.ref, i.total, i.data, i.invoice_data, i.created_at, u.email_address
+        FROM invoices i
+        JOIN users u ON u.user_id = i.user_id
+        WHERE i.ref = :reference
+    """),
+}
+
+SAVE_PAYMENT_SQL = text("""
+    INSERT INTO payments (
+        email_address, reference, trxref, status, amount, gateway_response, response, redirect_url
+    )
+    VALUES (
+        :email_address, :reference, :trxref, :status, :amount, :gateway_response, :response, NULL
+    )
+    ON DUPLICATE KEY UPDATE
+        trxref = VALUES(trxref),
+        status = VALUES(status),
+        amount = VALUES(amount),
+        gateway_response = VALUES(gateway_response),
+        response = VALUES(response)
+""")
+
+MARK_PAID_SQL = text("""
+    UPDATE invoices
+    SET invoice_data =
+        CASE
+            WHEN invoice_data IS NULL THEN JSON_OBJECT('status', 'paid', 'paid_at', NOW())
+            ELSE JSON_SET(invoice_data, '$.status', 'paid', '$.paid_at', NOW())
+        END,
+        updated_at = NOW()
+    WHERE ref = :ref
+""")
+
+SET_USER_PAID_SQL = text("UPDATE users SET payment = 1 WHERE email_address = :email")
+
+
+class AmountMismatch(Exception):
+    """The gateway reports less than the invoice total; retrying will not change that."""
+
+
+metrics.describe("payment_webhooks_total", "Payment webhook deliveries, by gateway and outcome")
+metrics.describe("payment_webhook_seconds", "Time to settle one payment webhook")
+
+
+# =========================================================
+# SIGNATURES
+# =========================================================
+def _secret(name: str):
+    value = os.getenv(name)
+    if value:
+        return value
+    try:
+        import streamlit as st
+        return st.secrets[name]
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+def paystack_signature(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+
+
+def nomba_signature(body: bytes, secret: str) -> str:
+    return base64.b64encode(hmac.new(secret.encode(), body, hashlib.sha256).digest()).decode()
+
+
+GATEWAYS = {
+    # gateway: (signature header, secret name, signer)
+    "paystack": ("x-paystack-signature", "PAYSTACK_SECRET_KEY", paystack_signature),
+    "nomba": ("nomba-signature", "NOMBA_WEBHOOK_SECRET", nomba_signature),
+}
+
+
+def verify_signature(gateway: str, body: bytes, signature: str) -> bool:
+    _, secret_name, signer = GATEWAYS[gateway]
+    secret = _secret(secret_name)
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(signer(body, secret), signature)
+
+
+# =========================================================
+# EVENTS → SETTLEMENT
+# =========================================================
+def parse_event(gateway: str, event: dict):
+    """
+    Successful payment in a gateway event as
+    {"reference", "email", "amount", "trxref", "gateway_response"}, or None
+    for events that settle nothing.
+    """
+    data = event.get("data") or {}
+    if gateway == "paystack":
+        if event.get("event") != "charge.success" or data.get("status") != "success":
+            return None
+        return {
+            "reference": data.get("reference"),
+            "email": (data.get("customer") or {}).get("email"),
+            "amount": float(data.get("amount", 0)) / 100,  # kobo → NGN
+            "trxref": data.get("reference"),
+            "gateway_response": data.get("gateway_response", "Successful"),
+        }
+
+    if event.get("event_type") != "payment_success":
+        return None
+    order = data.get("order") or {}
+    transaction = data.get("transaction") or {}
+    return {
+        "reference": order.get("orderReference"),
+        "email": order.get("customerEmail"),
+        "amount": float(order.get("amount") or transaction.get("transactionAmount") or 0),
+        "trxref": transaction.get("transactionId"),
+        "gateway_response": transaction.get("responseCode", "Successful"),
+    }
+
+
+def claim(gateway: str, reference: str) -> bool:
+    """True if this delivery is the first for the reference (and now owns it)."""
+    return bool(redis_client.set(SEEN_KEY.format(gateway=gateway, reference=reference), "processing",
+                                 nx=True, ex=WEBHOOK_CLAIM_TTL))
+
+
+def settle(gateway: str, payment: dict, raw_event: str):
+    """
+    Records the payment, marks the invoice paid and queues the paid invoice
+    PDF. Raises AmountMismatch (payment recorded, invoice left unpaid) when
+    the amount is short of the invoice total, and any other error so the
+    gateway retries.
+    """
+    from db_connection import create_connection
+    from invoice_pdf import invoice_args_from_row
+    from render_jobs import ensure_workers, submit_job
+
+    reference = payment["reference"]
+    engine = create_connection()
+    if engine is None:
+        raise RuntimeError("database unavailable")
+
+    with engine.begin() as conn:
+        row = conn.execute(INVOICE_SQL[gateway], {"reference": reference}).mappings().first()
+        if row is None:
+            raise LookupError(f"no invoice for {gateway} reference {reference}")
+        conn.execute(SAVE_PAYMENT_SQL, {
+            "email_address": payment["email"] or row["email_address"],
+            "reference": reference,
+            "trxref": payment["trxref"],
+            "status": "success",
+            "amount": payment["amount"],
+            "gateway_response": payment["gateway_response"],
+            "response": raw_event,
+        })
+        total = float(row["total"] or 0)
+        short = payment["amount"] + 0.005 < total
+        if not short:
+            conn.execute(MARK_PAID_SQL, {"ref": row["ref"]})
+            conn.execute(SET_USER_PAID_SQL, {"email": row["email_address"]})
+            row = conn.execute(INVOICE_SQL[gateway], {"reference": reference}).mappings().first()
+    if short:
+        raise AmountMismatch(f"invoice {row['ref']}: paid {payment['amount']:.2f} of {total:.2f}")
+
+    # Same dedupe key as view_invoice, so the page picks up this render
+    ensure_workers()
+    render_args = invoice_args_from_row(row, row["email_address"])
+    submit_job("invoice_pdf", render_args, dedupe_key=f"invoice_pdf:{row['ref']}:paid")
+    return row["ref"]
+
+
+class WebhookHandler(tornado.web.RequestHandler):
+    async def post(self, gateway):
+        if gateway not in GATEWAYS:
+            raise tornado.web.HTTPError(404)
+
+        body = self.request.body
+        if not verify_signature(gateway, body, self.request.headers.get(GATEWAYS[gateway][0])):
+            metrics.inc("payment_webhooks_total", gateway=gateway, outcome="bad_signature")
+            raise tornado.web.HTTPError(401)
+
+        try:
+            event = json.loads(body)
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+
+        payment = parse_event(gateway, event)
+        if payment is None or not payment["reference"]:
+            metrics.inc("payment_webhooks_total", gateway=gateway, outcome="ignored")
+            self.write({"status": "ignored"})
+            return
+
+        reference = payment["reference"]
+        if not claim(gateway, reference):
+            metrics.inc("payment_webhooks_total", gateway=gateway, outcome="duplicate")
+            self.write({"status": "duplicate"})
+            return
+
+        start = time.perf_counter()
+        seen_key = SEEN_KEY.format(gateway=gateway, reference=reference)
+        try:
+            # DB work is blocking: keep it off the IOLoop
+            invoice_ref = await tornado.ioloop.IOLoop.current().run_in_executor(
+                None, settle, gateway, payment, body.decode("utf-8")
+            )
+        except AmountMismatch as e:
+            # Recorded for follow-up; the same event will never settle, so do not ask for a retry
+            logger.warning("%s webhook for %s not settled: %s", gateway, reference, e)
+            redis_client.set(seen_key, MISMATCH, ex=WEBHOOK_SEEN_TTL)
+            metrics.inc("payment_webhooks_total", gateway=gateway, outcome=MISMATCH)
+            self.write({"status": MISMATCH})
+            return
+        except Exception:
+            logger.exception("%s webhook for %s failed", gateway, reference)
+            redis_client.delete(seen_key)  # let the gateway's retry settle it
+            metrics.inc("payment_webhooks_total", gateway=gateway, outcome="failed")
+            raise tornado.web.HTTPError(500)
+        finally:
+            metrics.observe("payment_webhook_seconds", time.perf_counter() - start, gateway=gateway)
+
+        redis_client.set(seen_key, invoice_ref, ex=WEBHOOK_SEEN_TTL)
+        metrics.inc("payment_webhooks_total", gateway=gateway, outcome="settled")
+        self.write({"status": "settled", "invoice": invoice_ref})
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({"status": "ok"})
+
+
+def make_app() -> tornado.web.Application:
+    return tornado.web.Application([
+        (r"/webhooks/([a-z]+)", WebhookHandler),
+        (r"/healthz", HealthHandler),
+    ])
+
+
+# =========================================================
+# LOCAL STAND-IN SENDER
+# =========================================================
+def sample_event(gateway: str, reference: str, email: str, amount: float) -> dict:
+    """A minimal successful-payment event shaped like the gateway's."""
+    if gateway == "paystack":
+        return {
+            "event": "charge.success",
+            "data": {
+                "reference": reference,
+                "status": "success",
+                "amount": int(amount * 100),
+                "gateway_response": "Successful",
+                "customer": {"email": email},
+            },
+        }
+    return {
+        "event_type": "payment_success",
+        "data": {
+            "order": {"orderReference": reference, "customerEmail": email, "amount": f"{amount:.2f}"},
+            "transaction": {"transactionId": f"TXN-{reference}", "responseCode": "00"},
+        },
+    }
+
+
+def send_test_event(gateway: str, reference: str, email: str = "test@example.com",
+                    amount: float = 20000.0, url: str = WEBHOOK_URL):
+    """Signs a sample event with the configured secret and posts it to the receiver."""
+    import requests
+
+    header, secret_name, signer = GATEWAYS[gateway]
+    secret = _secret(secret_name)
+    if not secret:
+        raise RuntimeError(f"❌ {secret_name} is not configured.")
+    body = json.dumps(sample_event(gateway, reference, email, amount)).encode()
+    return requests.post(
+        f"{url}/webhooks/{gateway}",
+        data=body,
+        headers={header: signer(body, secret), "Content-Type": "application/json"},
+        timeout=30,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) >= 4 and sys.argv[1] == "send":
+        gateway, reference = sys.argv[2], sys.argv[3]
+        email = sys.argv[4] if len(sys.argv) > 4 else "test@example.com"
+        amount = float(sys.argv[5]) if len(sys.argv) > 5 else 20000.0
+        response = send_test_event(gateway, reference, email, amount)
+        print(f"📨 {response.status_code}: {response.text}")
+        sys.exit(0)
+
+    make_app().listen(WEBHOOK_PORT)
+    print(f"🔔 Payment webhooks listening on :{WEBHOOK_PORT} (/webhooks/paystack, /webhooks/nomba)")
+    tornado.ioloop.IOLoop.current().start()
@@ -1,6 +1,8 @@
 # paystack.py
+import os
 import streamlit as st
 import requests
+import gateway_http
 from sqlalchemy import text
 from db_connection import create_connection
 
@@ -13,7 +15,7 @@ except (FileNotFoundError, KeyError) as e:
     st.error(f"⚠️ Paystack API credentials not found in secrets.toml: {e}")
     SECRET_KEY = None
 
-BASE_URL = "https://api.paystack.co"
+BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")  # see mock_gateway.py for load tests
 
 
 # ---------------------------------------------------------
@@ -82,7 +84,7 @@ def initialize_transaction(email_address: str, amount: float):
     payload = {"email": email_address, "amount": amount_in_kobo}
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = gateway_http.post("paystack", url, endpoint="transaction/initialize", json=payload, headers=headers)
         response.raise_for_status()
         data = response.json()
 
@@ -138,6 +140,25 @@ def initialize_transaction(email_address: str, amount: float):
         return None
 
 
+# ---------------------------------------------------------
+# Fetch Transaction (no side effects)
+# ---------------------------------------------------------
+def fetch_transaction(reference: str) -> dict:
+    """
+    Paystack's current record of a transaction (the `data` of the verify
+    response), without touching the DB. Used by background reconciliation.
+    Raises requests.exceptions.RequestException on gateway errors.
+    """
+    if not SECRET_KEY:
+        raise RuntimeError("Paystack API key is not configured.")
+
+    url = f"{BASE_URL}/transaction/verify/{reference}"
+    headers = {"Authorization": f"Bearer {SECRET_KEY}"}
+    response = gateway_http.get("paystack", url, endpoint="transaction/verify", headers=headers)
+    response.raise_for_status()
+    return response.json().get("data") or {}
+
+
 # ---------------------------------------------------------
 # Verify Transaction
 # ---------------------------------------------------------
@@ -155,7 +176,7 @@ def verify_transaction(reference: str):
     engine = create_connection()
 
     try:
-        response = requests.get(url, headers=headers)
+        response = gateway_http.get("paystack", url, endpoint="transaction/verify", headers=headers)
         response.raise_for_status()
         result = response.json()
 
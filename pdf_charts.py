@@ -0,0 +1,142 @@
+# pdf_charts.py
+# Draws registry charts (see report_registry.CHARTS) straight into a PDF with
+# reportlab graphics, from the pre-aggregated chart data. Vector output: no
+# browser round-trip, no embedded bitmaps, crisp at any zoom.
+import pandas as pd
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+
+# Same palette as the on-screen Plotly charts in view_report
+PALETTE = [colors.HexColor(c) for c in ["#1e293b", "#667eea", "#28a745", "#dc3545", "#ffa500"]]
+GRID_COLOR = colors.HexColor("#f1f3f5")
+
+MAX_LABEL_CHARS = 18
+
+
+def _label(value) -> str:
+    text = str(value)
+    return text if len(text) <= MAX_LABEL_CHARS else text[:MAX_LABEL_CHARS - 1] + "…"
+
+
+def _color(i: int):
+    return PALETTE[i % len(PALETTE)]
+
+
+def _series(data: pd.DataFrame, dims: list):
+    """
+    Category labels and one list of counts per series.
+    Single-dim data is one series; a second dim becomes one series per value.
+    """
+    if len(dims) == 1:
+        return [_label(v) for v in data[dims[0]]], [data["Count"].tolist()], []
+    table = data.pivot_table(index=dims[0], columns=dims[1], values="Count",
+                             aggfunc="sum", fill_value=0, sort=False)
+    return ([_label(v) for v in table.index],
+            [table[c].tolist() for c in table.columns],
+            [_label(c) for c in table.columns])
+
+
+def _legend(drawing: Drawing, names: list, x: float, y: float):
+    legend = Legend()
+    legend.x, legend.y = x, y
+    legend.alignment = "right"  # swatch first, text to its right
+    legend.fontName = "Helvetica"
+    legend.fontSize = 8
+    legend.columnMaximum = 12
+    legend.colorNamePairs = [(_color(i), name) for i, name in enumerate(names)]
+    drawing.add(legend)
+
+
+def _axis_style(chart, categories: list):
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = GRID_COLOR
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.labels.fontSize = 8
+    chart.categoryAxis.categoryNames = categories
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.categoryAxis.labels.fontSize = 8
+    if len(categories) > 8:
+        chart.categoryAxis.labels.angle = 45
+        chart.categoryAxis.labels.boxAnchor = "ne"
+
+
+def _pie(drawing: Drawing, data: pd.DataFrame, dims: list, width: float, height: float):
+    pie = Pie()
+    size = min(width * 0.5, height) - 40
+    pie.x, pie.y = 40, (height - size) / 2
+    pie.width = pie.height = size
+    pie.data = data["Count"].tolist() or [1]
+    pie.labels = None
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 1
+    for i in range(len(pie.data)):
+        pie.slices[i].fillColor = _color(i)
+    drawing.add(pie)
+
+    total = data["Count"].sum() or 1
+    _legend(drawing, [f"{_label(v)} ({c / total:.0%})" for v, c in zip(data[dims[0]], data["Count"])],
+            size + 80, height - 20)
+
+
+def _bars(drawing: Drawing, categories: list, values: list, names: list, width: float, height: float,
+          stacked: bool = False):
+    chart = VerticalBarChart()
+    chart.x, chart.y = 50, 60
+    chart.width = width - (200 if names else 70)
+    chart.height = height - 80
+    chart.data = values or [[0]]
+    _axis_style(chart, categories)
+    if stacked:
+        chart.categoryAxis.style = "stacked"
+        chart.barSpacing = 0
+        chart.groupSpacing = 0
+    for i in range(len(chart.data)):
+        chart.bars[i].fillColor = _color(i)
+        chart.bars[i].strokeColor = None
+    drawing.add(chart)
+    if names:
+        _legend(drawing, names, width - 140, height - 20)
+
+
+def _lines(drawing: Drawing, categories: list, values: list, names: list, width: float, height: float):
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 50, 60
+    chart.width = width - (200 if names else 70)
+    chart.height = height - 80
+    chart.data = values or [[0]]
+    chart.joinedLines = 1
+    _axis_style(chart, categories)
+    for i in range(len(chart.data)):
+        chart.lines[i].strokeColor = _color(i)
+        chart.lines[i].strokeWidth = 2
+    drawing.add(chart)
+    if names:
+        _legend(drawing, names, width - 140, height - 20)
+
+
+def chart_drawing(chart: dict, data: pd.DataFrame, width: float = 700, height: float = 400) -> Drawing:
+    """
+    reportlab Drawing (a platypus flowable) for a registry chart.
+    `data` is that chart's output from report_registry.compute_aggregations.
+    """
+    drawing = Drawing(width, height)
+    dims = chart["dims"]
+
+    if chart["kind"] == "pie":
+        _pie(drawing, data, dims, width, height)
+    elif chart["kind"] == "histogram":
+        binned = data.assign(Bin=[f"{s:g}–{e:g}" for s, e in zip(data["Start"], data["End"])])
+        categories, values, names = _series(binned, ["Bin"] + dims[1:])
+        _bars(drawing, categories, values, names, width, height, stacked=True)
+    elif chart["kind"] == "line":
+        categories, values, names = _series(data, dims)
+        _lines(drawing, categories, values, names, width, height)
+    else:
+        categories, values, names = _series(data, dims)
+        _bars(drawing, categories, values, names, width, height)
+    return drawing
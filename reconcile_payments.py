@@ -0,0 +1,276 @@
+# reconcile_payments.py
+# Settles invoices whose payment went through but were never verified (the
+# user closed the tab before "Verify My Payment" and no webhook arrived).
+#
+#   python reconcile_payments.py [--once] [--interval SECONDS] [--workers N] [--page-size N]
+#
+# Every sweep reads pending invoices with a Paystack reference in keyset
+# pages (invoice_id order), asks Paystack for each transaction from a thread
+# pool under one shared rate limit, and applies each page's results with
+# executemany updates in a single transaction:
+#
+#   success           invoice → paid, payment → success, user payment flag set, paid PDF queued
+#   failed / reversed invoice → FAILED, payment status recorded
+#   anything else     left pending for the next sweep (until RECONCILE_MAX_AGE_HOURS)
+#
+# A Redis lock lets only one replica sweep at a time (held with a random
+# token, extended before every page, released only by its owner), and
+# settled references are marked seen for payment_webhooks, so a late webhook
+# is acknowledged without settling twice.
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+from sqlalchemy import text
+
+from db_connection import create_connection
+from invoice_pdf import invoice_args_from_row
+from payment_webhooks import SEEN_KEY, WEBHOOK_SEEN_TTL
+from paystack import fetch_transaction
+from redis_client import redis_client
+from render_jobs import ensure_workers, submit_job
+import metrics
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL = int(os.getenv("RECONCILE_INTERVAL", "300"))  # seconds between sweeps
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", "8"))
+RECONCILE_RATE_PER_SEC = float(os.getenv("RECONCILE_RATE_PER_SEC", "5"))  # gateway calls, all workers together
+RECONCILE_PAGE_SIZE = int(os.getenv("RECONCILE_PAGE_SIZE", "200"))
+RECONCILE_MIN_AGE = int(os.getenv("RECONCILE_MIN_AGE", "120"))  # seconds; leave fresh checkouts to the user
+RECONCILE_MAX_AGE_HOURS = int(os.getenv("RECONCILE_MAX_AGE_HOURS", "72"))
+RECONCILE_LOCK_TTL = int(os.getenv("RECONCILE_LOCK_TTL", "300"))  # seconds; renewed before every page
+
+LOCK_KEY = "reconcile:lock"
+
+PAID, FAILED, PENDING, ERROR, MISMATCH = "settled", "failed", "pending", "error", "amount_mismatch"
+FAILED_STATUSES = {"failed", "reversed"}
+
+PENDING_PAGE_SQL = text("""
+    SELECT i.invoice_id, i.ref, i.total, i.data, i.invoice_data, i.created_at, u.email_address,
+           JSON_UNQUOTE(JSON_EXTRACT(i.invoice_data, '$.paystack_reference')) AS paystack_reference
+    FROM invoices i
+    JOIN users u ON u.user_id = i.user_id
+    WHERE i.invoice_id > :after
+      AND JSON_UNQUOTE(JSON_EXTRACT(i.invoice_data, '$.status')) = 'pending'
+      AND JSON_EXTRACT(i.invoice_data, '$.paystack_reference') IS NOT NULL
+      AND i.created_at BETWEEN :oldest AND :newest
+    ORDER BY i.invoice_id
+    LIMIT :limit
+""")
+
+# Only still-pending invoices change, so a concurrent verify or webhook wins
+MARK_PAID_SQL = text("""
+    UPDATE invoices
+    SET invoice_data = JSON_SET(invoice_data, '$.status', 'paid', '$.paid_at', NOW())
+    WHERE ref = :ref AND JSON_UNQUOTE(JSON_EXTRACT(invoice_data, '$.status')) = 'pending'
+""")
+
+MARK_FAILED_SQL = text("""
+    UPDATE invoices
+    SET invoice_data = JSON_SET(invoice_data, '$.status', 'FAILED', '$.failed_at', NOW())
+    WHERE ref = :ref AND JSON_UNQUOTE(JSON_EXTRACT(invoice_data, '$.status')) = 'pending'
+""")
+
+UPDATE_PAYMENT_SQL = text("""
+    UPDATE payments
+    SET status = :status,
+        trxref = :trxref,
+        gateway_response = :gateway_response,
+        paid_at = CASE WHEN :status = 'success' THEN CURRENT_TIMESTAMP ELSE paid_at END
+    WHERE reference = :reference
+""")
+
+SET_USER_PAID_SQL = text("UPDATE users SET payment = TRUE WHERE email_address = :email")
+
+metrics.describe("reconcile_invoices_total", "Pending invoices checked by reconciliation, by outcome")
+metrics.describe("reconcile_sweep_seconds", "Time for one reconciliation sweep")
+
+
+# =========================================================
+# RATE LIMIT
+# =========================================================
+class RateLimiter:
+    """Token bucket shared by all worker threads: `rate` calls/sec, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# =========================================================
+# SWEEP
+# =========================================================
+def iter_pending_pages(engine, page_size: int = RECONCILE_PAGE_SIZE):
+    """Yields pages of pending invoices old enough to reconcile."""
+    now = datetime.now()
+    window = {
+        "oldest": now - timedelta(hours=RECONCILE_MAX_AGE_HOURS),
+        "newest": now - timedelta(seconds=RECONCILE_MIN_AGE),
+    }
+    after = 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(PENDING_PAGE_SQL, {**window, "after": after, "limit": page_size}).mappings().all()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1]["invoice_id"]
+
+
+def check_invoice(row, limiter: RateLimiter):
+    """Thread pool task: (row, outcome, Paystack transaction data or None)."""
+    limiter.acquire()
+    try:
+        data = fetch_transaction(row["paystack_reference"])
+    except requests.exceptions.RequestException as e:
+        logger.warning("could not verify %s (%s): %s", row["ref"], row["paystack_reference"], e)
+        return row, ERROR, None
+
+    status = data.get("status")
+    if status == "success":
+        paid = float(data.get("amount", 0)) / 100  # kobo → NGN
+        if paid + 0.005 < float(row["total"] or 0):
+            logger.warning("invoice %s: paid %.2f of %.2f, not settling", row["ref"], paid, float(row["total"]))
+            return row, MISMATCH, data
+        return row, PAID, data
+    if status in FAILED_STATUSES:
+        return row, FAILED, data
+    return row, PENDING, data
+
+
+def apply_results(engine, results: list):
+    """Writes one page of (row, outcome, data) in a single transaction. Returns the settled rows."""
+    settled = [(row, data) for row, outcome, data in results if outcome == PAID]
+    failed = [(row, data) for row, outcome, data in results if outcome == FAILED]
+    if not settled and not failed:
+        return []
+
+    def payment_params(row, data):
+        return {
+            "reference": row["paystack_reference"],
+            "status": data.get("status"),
+            "trxref": data.get("reference", row["paystack_reference"]),
+            "gateway_response": data.get("gateway_response", "No message"),
+        }
+
+    with engine.begin() as conn:
+        if settled:
+            conn.execute(MARK_PAID_SQL, [{"ref": row["ref"]} for row, _ in settled])
+            conn.execute(SET_USER_PAID_SQL, [{"email": email} for email in {row["email_address"] for row, _ in settled}])
+        if failed:
+            conn.execute(MARK_FAILED_SQL, [{"ref": row["ref"]} for row, _ in failed])
+        conn.execute(UPDATE_PAYMENT_SQL, [payment_params(row, data) for row, data in settled + failed])
+    return [row for row, _ in settled]
+
+
+def after_settled(rows: list):
+    """Marks references seen for the webhook receiver and queues the paid invoice PDFs."""
+    if rows:
+        ensure_workers()
+    for row in rows:
+        try:
+            redis_client.set(SEEN_KEY.format(gateway="paystack", reference=row["paystack_reference"]),
+                             row["ref"], ex=WEBHOOK_SEEN_TTL)
+            render_args = invoice_args_from_row(row, row["email_address"])
+            render_args["status"] = "PAID ✅"
+            # Same dedupe key as view_invoice and the webhook receiver
+            submit_job("invoice_pdf", render_args, dedupe_key=f"invoice_pdf:{row['ref']}:paid")
+        except Exception:
+            logger.warning("could not queue paid PDF for invoice %s", row["ref"], exc_info=True)
+
+
+def sweep(engine, workers: int = RECONCILE_WORKERS, page_size: int = RECONCILE_PAGE_SIZE,
+          rate: float = RECONCILE_RATE_PER_SEC, lock_token: str = None) -> dict:
+    """
+    Checks every pending invoice once. Returns {outcome: count}. With a
+    lock_token, the sweep lock is renewed before each page and the sweep
+    stops early if another replica has taken it over.
+    """
+    start = time.perf_counter()
+    limiter = RateLimiter(rate)
+    counts = {PAID: 0, FAILED: 0, PENDING: 0, ERROR: 0, MISMATCH: 0}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reconcile") as pool:
+        for rows in iter_pending_pages(engine, page_size=page_size):
+            if lock_token and not _extend_lock(lock_token):
+                logger.warning("lost the reconciliation lock, stopping this sweep")
+                break
+            results = list(pool.map(lambda row: check_invoice(row, limiter), rows))
+            after_settled(apply_results(engine, results))
+            for _, outcome, _ in results:
+                counts[outcome] += 1
+                metrics.inc("reconcile_invoices_total", gateway="paystack", outcome=outcome)
+    metrics.observe("reconcile_sweep_seconds", time.perf_counter() - start)
+    return counts
+
+
+def _extend_lock(token: str) -> bool:
+    """Renews the sweep lock if this sweep still owns it."""
+    if redis_client.get(LOCK_KEY) != token:
+        return False
+    return bool(redis_client.expire(LOCK_KEY, RECONCILE_LOCK_TTL))
+
+
+def _release_lock(token: str):
+    try:
+        if redis_client.get(LOCK_KEY) == token:
+            redis_client.delete(LOCK_KEY)
+    except Exception:
+        pass  # expires on its own
+
+
+def run_once(engine, **kwargs):
+    """One sweep, unless another replica holds the lock. Returns the counts or None."""
+    token = uuid.uuid4().hex
+    if not redis_client.set(LOCK_KEY, token, nx=True, ex=RECONCILE_LOCK_TTL):
+        logger.info("another reconciliation sweep is running, skipping")
+        return None
+    try:
+        return sweep(engine, lock_token=token, **kwargs)
+    finally:
+        _release_lock(token)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    argv = sys.argv[1:]
+
+    def option(name, default):
+        return int(argv[argv.index(name) + 1]) if name in argv else default
+
+    engine = create_connection()
+    if engine is None:
+        raise RuntimeError("❌ Could not connect to database.")
+
+    interval = option("--interval", RECONCILE_INTERVAL)
+    settings = dict(workers=option("--workers", RECONCILE_WORKERS), page_size=option("--page-size", RECONCILE_PAGE_SIZE))
+    while True:
+        counts = run_once(engine, **settings)
+        if counts is not None:
+            print(f"🔄 Reconciled {sum(counts.values()):,} pending invoice(s): {counts[PAID]} settled, "
+                  f"{counts[FAILED]} failed, {counts[PENDING]} still pending, "
+                  f"{counts[ERROR] + counts[MISMATCH]} need attention")
+        if "--once" in argv:
+            break
+        time.sleep(interval)
@@ -1,41 +1,214 @@
-import json
 import hashlib
-from redis_client import redis_client
+import logging
+import os
+import threading
+import time
+from redis_client import redis_binary_client as redis_client
+from cache_serializers import encode, decode, versioned_key
+from cache_budget import admit_many, policy_for, record_write, record_delete
+import metrics
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+logger = logging.getLogger(__name__)
 
 CACHE_TTL = 60 * 60 * 6  # 6 hours
+POLICY_TTL = -1  # use the namespace's TTL from cache_budget.NAMESPACE_POLICIES
+
+# Per-namespace generation counters: bumping one makes every key built
+# with the old generation unreachable (O(1) bulk invalidation, no SCAN).
+GENERATION_KEY = "cache:gen:{namespace}"
+GENERATION_LOCAL_TTL = float(os.getenv("CACHE_GENERATION_TTL", "5"))  # seconds
+
+_generation_lock = threading.Lock()
+_generations = {}  # namespace -> (generation, fetched_at)
+
+# Last-known-good copies of recomputed values, served if a recompute fails
+STALE_SUFFIX = ":stale"
+STALE_TTL = 60 * 60 * 24 * 7  # 7 days
+
+metrics.describe("cache_hits_total", "Cache lookups answered from Redis")
+metrics.describe("cache_misses_total", "Cache lookups that found nothing")
+metrics.describe("cache_stale_serves_total", "Recompute failures answered with a last-known-good copy")
+metrics.describe("cache_evictions_total", "Keys removed by the application")
+metrics.describe("cache_recompute_seconds", "Time spent recomputing a value after a miss")
+metrics.describe("cache_value_bytes", "Serialized size of values written to Redis")
+
+
+def cache_namespace(key: str) -> str:
+    """
+    Namespace used for metrics: the part of the key before the first ':'.
+    """
+    return key.split(":", 1)[0]
+
+
+def _record_lookup(key: str, hit: bool):
+    namespace = cache_namespace(key)
+    if hit:
+        metrics.inc("cache_hits_total", namespace=namespace)
+        logger.debug("cache hit: %s", key)
+    else:
+        metrics.inc("cache_misses_total", namespace=namespace)
+        logger.debug("cache miss: %s", key)
+
+
+def _encode_for_write(key: str, data, serializer: str = None) -> bytes:
+    payload = encode(data, serializer)
+    if not key.endswith(STALE_SUFFIX):
+        metrics.observe("cache_value_bytes", len(payload), namespace=cache_namespace(key))
+    return payload
+
+
+def _hash_parts(parts) -> str:
+    raw = ":".join(str(p) for p in parts).encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(raw)
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def namespace_generation(namespace: str) -> int:
+    """
+    Current generation of a namespace. Cached in-process for
+    GENERATION_LOCAL_TTL seconds so key building does not add a round-trip
+    on every lookup.
+    """
+    now = time.monotonic()
+    with _generation_lock:
+        cached = _generations.get(namespace)
+    if cached and now - cached[1] < GENERATION_LOCAL_TTL:
+        return cached[0]
+
+    raw = redis_client.get(GENERATION_KEY.format(namespace=namespace))
+    generation = int(raw) if raw is not None else 0
+    with _generation_lock:
+        _generations[namespace] = (generation, now)
+    return generation
+
+
+def bump_namespace(namespace: str) -> int:
+    """
+    Invalidates every key in a namespace by moving it to a new generation.
+    Old keys are never read again and expire on their own TTL.
+    Other processes pick up the bump within GENERATION_LOCAL_TTL seconds.
+    """
+    generation = redis_client.incr(GENERATION_KEY.format(namespace=namespace))
+    with _generation_lock:
+        _generations[namespace] = (generation, time.monotonic())
+    logger.info("cache namespace %s bumped to generation %s", namespace, generation)
+    return generation
+
+
+def cache_key(namespace: str, *parts) -> str:
+    """
+    Builds a namespaced, generation-tagged key:
+    <namespace>:g<generation>:<xxh3-64 of parts>
+    """
+    generation = namespace_generation(namespace)
+    return f"{namespace}:g{generation}:{_hash_parts(parts)}"
 
 
 def make_cache_key(prefix: str, value: str) -> str:
     """
     Creates a safe Redis cache key.
     """
-    raw_key = f"{prefix}:{value}"
-    hashed = hashlib.md5(raw_key.encode()).hexdigest()
-    return f"{prefix}:{hashed}"
+    return cache_key(prefix, value)
 
 
 def get_cached(key: str):
     """
     Get cached value from Redis.
     """
-    value = redis_client.get(key)
+    value = redis_client.get(versioned_key(key))
+    _record_lookup(key, value is not None)
     if value is None:
         return None
-    return json.loads(value)
+    return decode(value)
 
 
-def set_cached(key: str, data, ttl: int = CACHE_TTL):
+def _queue_writes(pipe, writes: list) -> list:
     """
-    Save value to Redis with TTL.
+    Queues budget-checked writes [(key, payload, ttl)] on `pipe`, admitting
+    them all in one bookkeeping round-trip. Returns which were written.
     """
-    redis_client.setex(key, ttl, json.dumps(data))
+    entries = []
+    for key, payload, ttl in writes:
+        namespace = cache_namespace(key)
+        if ttl == POLICY_TTL:
+            ttl = policy_for(namespace)["ttl"]
+        entries.append((namespace, versioned_key(key), len(payload), ttl))
+
+    written = []
+    for (namespace, redis_key, size, _), (_, payload, _), decision in zip(entries, writes, admit_many(entries)):
+        allowed, ttl, previous_size = decision
+        written.append(allowed)
+        if not allowed:
+            continue
+        if ttl is None:
+            pipe.set(redis_key, payload)
+        else:
+            pipe.setex(redis_key, ttl, payload)
+        record_write(pipe, namespace, redis_key, size, ttl, previous_size)
+    return written
+
+
+def set_cached(key: str, data, ttl: int = POLICY_TTL, serializer: str = None) -> bool:
+    """
+    Save value to Redis with TTL (ttl=None keeps it until overwritten,
+    default uses the namespace policy). DataFrames and numeric arrays are
+    stored in a binary format. Returns False if the namespace budget refused it.
+    """
+    payload = _encode_for_write(key, data, serializer)
+    with redis_client.pipeline(transaction=False) as pipe:
+        written = _queue_writes(pipe, [(key, payload, ttl)])[0]
+        pipe.execute()
+    return written
 
 
 def delete_cached(key: str):
     """
     Delete a cached key (optional use later).
     """
-    redis_client.delete(key)
+    if redis_client.delete(versioned_key(key)):
+        metrics.inc("cache_evictions_total", namespace=cache_namespace(key))
+    record_delete(cache_namespace(key), versioned_key(key))
+
+
+def _recompute(key: str, fetch_fn):
+    """
+    Runs fetch_fn and records its latency. If it raises, falls back to the
+    last-known-good copy (counted as a stale serve) or re-raises.
+    Returns (data, is_stale).
+    """
+    namespace = cache_namespace(key)
+    start = time.perf_counter()
+    try:
+        return fetch_fn(), False
+    except Exception:
+        stale = redis_client.get(versioned_key(key + STALE_SUFFIX))
+        if stale is None:
+            raise
+        logger.warning("recompute failed for %s, serving stale copy", key, exc_info=True)
+        metrics.inc("cache_stale_serves_total", namespace=namespace)
+        return decode(stale), True
+    finally:
+        metrics.observe("cache_recompute_seconds", time.perf_counter() - start, namespace=namespace)
+
+
+def _with_stale_copies(fresh: dict):
+    """
+    Adds a long-lived last-known-good copy for each freshly computed value.
+    Returns (items, ttls) ready for set_many.
+    """
+    items, ttls = {}, {}
+    for key, data in fresh.items():
+        items[key] = data
+        ttls[key] = POLICY_TTL
+        items[key + STALE_SUFFIX] = data
+        ttls[key + STALE_SUFFIX] = STALE_TTL
+    return items, ttls
 
 
 def get_or_set_distinct_values(key, fetch_fn):
@@ -43,13 +216,67 @@ def get_or_set_distinct_values(key, fetch_fn):
     key: redis key string
     fetch_fn: function that fetches from DB if cache miss
     """
-    cached = redis_client.get(key)
+    cached = redis_client.get(versioned_key(key))
+    _record_lookup(key, bool(cached))
     if cached:
-        print(f"🟢 REDIS HIT → {key}")
-        return json.loads(cached)
+        return decode(cached)
 
     # Cache miss → fetch from DB
-    print(f"🔴 REDIS MISS → {key}")
-    data = fetch_fn()
-    redis_client.setex(key, CACHE_TTL, json.dumps(data))
-    return data
\ No newline at end of file
+    data, is_stale = _recompute(key, fetch_fn)
+    if not is_stale:
+        items, ttls = _with_stale_copies({key: data})
+        set_many(items, ttl=ttls)
+    return data
+
+
+def get_many(keys: list) -> dict:
+    """
+    Fetch several cached values in one round-trip (MGET).
+    Returns {key: value}; missing keys map to None.
+    """
+    if not keys:
+        return {}
+    raw_values = redis_client.mget([versioned_key(k) for k in keys])
+    result = {}
+    for key, raw in zip(keys, raw_values):
+        _record_lookup(key, raw is not None)
+        result[key] = decode(raw) if raw is not None else None
+    return result
+
+
+def set_many(items: dict, ttl=POLICY_TTL) -> dict:
+    """
+    Save several values in one round-trip (pipelined SETEX).
+    ttl: one TTL for every key, or a {key: ttl} dict.
+    Returns {key: written}; False where the namespace budget refused it.
+    """
+    if not items:
+        return {}
+    writes = [
+        (key, _encode_for_write(key, data), ttl.get(key, POLICY_TTL) if isinstance(ttl, dict) else ttl)
+        for key, data in items.items()
+    ]
+    with redis_client.pipeline(transaction=False) as pipe:
+        written = _queue_writes(pipe, writes)
+        pipe.execute()
+    return dict(zip(items, written))
+
+
+def get_or_set_many_distinct_values(fetchers: dict) -> dict:
+    """
+    Batched version of get_or_set_distinct_values.
+    fetchers: {redis key: function that fetches from DB if cache miss}
+    One MGET for all keys, one pipelined write for the misses.
+    """
+    cached = get_many(list(fetchers))
+    fresh = {}
+    for key, value in cached.items():
+        if value is None:
+            data, is_stale = _recompute(key, fetchers[key])
+            cached[key] = data
+            if not is_stale:
+                fresh[key] = data
+
+    items, ttls = _with_stale_copies(fresh)
+    set_many(items, ttl=ttls)
+    return cached
@@ -1,14 +1,60 @@
 import os
 import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 
 # Local dev defaults
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 
+# Pool / timeout settings (seconds unless stated otherwise)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))  # wait for a free connection
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "2"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+REDIS_RETRIES = int(os.getenv("REDIS_RETRIES", "3"))
+REDIS_BACKOFF_BASE = float(os.getenv("REDIS_BACKOFF_BASE", "0.05"))
+REDIS_BACKOFF_CAP = float(os.getenv("REDIS_BACKOFF_CAP", "1.0"))
+
+
+def create_retry() -> Retry:
+    """
+    Retry policy for connection/timeout errors: exponential backoff, bounded attempts.
+    """
+    return Retry(ExponentialBackoff(cap=REDIS_BACKOFF_CAP, base=REDIS_BACKOFF_BASE), REDIS_RETRIES)
+
+
+def create_pool(decode_responses: bool) -> redis.BlockingConnectionPool:
+    """
+    Builds a bounded connection pool. When all connections are busy, callers
+    wait up to REDIS_POOL_TIMEOUT instead of opening unbounded sockets.
+    """
+    return redis.BlockingConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=REDIS_DB,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        retry=create_retry(),
+        retry_on_timeout=True,
+        decode_responses=decode_responses,
+    )
+
+
 redis_client = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    decode_responses=True,  # so we get strings back instead of bytes
-)
\ No newline at end of file
+    connection_pool=create_pool(decode_responses=True),  # so we get strings back instead of bytes
+    retry=create_retry(),
+)
+
+# Raw-bytes client for the cache layer (see cache_serializers.py):
+# payloads are binary, so skip the UTF-8 decode on every read.
+redis_binary_client = redis.Redis(
+    connection_pool=create_pool(decode_responses=False),
+    retry=create_retry(),
+)
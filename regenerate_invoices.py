@@ -0,0 +1,189 @@
+# regenerate_invoices.py
+# Re-renders every stored invoice PDF (after a branding, tax text or
+# watermark change) without going through the UI.
+#
+#   python regenerate_invoices.py [--workers N] [--page-size N] [--restart]
+#
+# Invoices are read in keyset pages (invoice_id order), rendered in a process
+# pool through invoice_pdf, written to the artifact store, and each page's
+# `pdf` refs (with their invoice cache tags, see invoice_cache.py) are
+# updated in one transaction, along with their Redis copies. After every page
+# the last invoice_id is saved to a checkpoint file, so an interrupted run
+# picks up where it stopped and first retries the invoices that failed;
+# --restart ignores the checkpoint. A run that finishes with no failures
+# removes it; one with failures keeps it, so the next run retries only those.
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import bindparam, text
+
+from db_connection import create_connection
+from invoice_pdf import INVOICE_TEMPLATE_VERSION, generate_invoice_pdf, invoice_args_from_row
+from invoice_cache import store_invoice_pdfs
+
+logger = logging.getLogger(__name__)
+
+REGEN_WORKERS = int(os.getenv("INVOICE_REGEN_WORKERS", str(os.cpu_count() or 2)))
+REGEN_PAGE_SIZE = int(os.getenv("INVOICE_REGEN_PAGE_SIZE", "500"))
+CHECKPOINT_PATH = os.getenv("INVOICE_REGEN_CHECKPOINT", "invoice_regen.checkpoint.json")
+
+PAGE_QUERY = text("""
+    SELECT i.invoice_id, i.ref, i.total, i.data, i.invoice_data, i.created_at, u.email_address
+    FROM invoices i
+    JOIN users u ON u.user_id = i.user_id
+    WHERE i.invoice_id > :after
+    ORDER BY i.invoice_id
+    LIMIT :limit
+""")
+
+BY_REF_QUERY = text("""
+    SELECT i.invoice_id, i.ref, i.total, i.data, i.invoice_data, i.created_at, u.email_address
+    FROM invoices i
+    JOIN users u ON u.user_id = i.user_id
+    WHERE i.ref IN :refs
+""").bindparams(bindparam("refs", expanding=True))
+
+
+# =========================================================
+# CHECKPOINT
+# =========================================================
+def load_checkpoint(path: str = CHECKPOINT_PATH) -> dict:
+    """Progress of the last run for the current template version (empty if none)."""
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if checkpoint.get("template_version") != INVOICE_TEMPLATE_VERSION:
+        return {}
+    return checkpoint
+
+
+def save_checkpoint(checkpoint: dict, path: str = CHECKPOINT_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path: str = CHECKPOINT_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# =========================================================
+# PIPELINE
+# =========================================================
+def iter_invoice_pages(engine, after: int = 0, page_size: int = REGEN_PAGE_SIZE):
+    """Yields lists of invoice rows, page by page, never loading the whole table."""
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(PAGE_QUERY, {"after": after, "limit": page_size}).mappings().all()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1]["invoice_id"]
+
+
+def _render(args: dict):
+    """Process pool task: (ref, artifact ref or None, error or None)."""
+    try:
+        return args["invoice_ref"], generate_invoice_pdf(**args), None
+    except Exception as e:
+        return args["invoice_ref"], None, str(e)
+
+
+def update_pdf_refs(engine, refs: dict):
+    """Records {invoice ref: (artifact ref, status)} as the invoices' PDFs (DB and Redis copies)."""
+    store_invoice_pdfs(engine, refs)
+
+
+def _regenerate_rows(pool, engine, rows, workers: int, failed: list) -> int:
+    """Renders and records one batch of rows. Appends failed refs to `failed`; returns how many succeeded."""
+    args = [invoice_args_from_row(row, row["email_address"]) for row in rows]
+    statuses = {a["invoice_ref"]: a["status"] for a in args}
+    refs = {}
+    for invoice_ref, pdf_ref, error in pool.map(_render, args, chunksize=max(1, len(args) // (workers * 4))):
+        if error:
+            logger.warning("invoice %s failed: %s", invoice_ref, error)
+            failed.append(invoice_ref)
+        else:
+            refs[invoice_ref] = (pdf_ref, statuses[invoice_ref])
+    update_pdf_refs(engine, refs)
+    return len(refs)
+
+
+def regenerate(engine, workers: int = REGEN_WORKERS, page_size: int = REGEN_PAGE_SIZE,
+               restart: bool = False) -> dict:
+    """Runs (or resumes) the regeneration. Returns the final checkpoint."""
+    checkpoint = {} if restart else load_checkpoint()
+    checkpoint = {
+        "template_version": INVOICE_TEMPLATE_VERSION,
+        "last_invoice_id": checkpoint.get("last_invoice_id", 0),
+        "done": checkpoint.get("done", 0),
+        "failed": checkpoint.get("failed", []),
+    }
+    if checkpoint["last_invoice_id"]:
+        print(f"↩️ Resuming after invoice_id {checkpoint['last_invoice_id']} ({checkpoint['done']:,} done)")
+
+    start = time.perf_counter()
+    rendered = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Earlier failures first; whatever fails again stays in the list
+        retry, checkpoint["failed"] = checkpoint["failed"], []
+        for i in range(0, len(retry), page_size):
+            with engine.connect() as conn:
+                rows = conn.execute(BY_REF_QUERY, {"refs": retry[i:i + page_size]}).mappings().all()
+            if rows:
+                ok = _regenerate_rows(pool, engine, rows, workers, checkpoint["failed"])
+                rendered += ok
+                checkpoint["done"] += ok
+            save_checkpoint({**checkpoint, "failed": checkpoint["failed"] + retry[i + page_size:]})
+        if retry:
+            print(f"🔁 Retried {len(retry)} failed invoice(s), {len(checkpoint['failed'])} still failing")
+
+        for rows in iter_invoice_pages(engine, after=checkpoint["last_invoice_id"], page_size=page_size):
+            ok = _regenerate_rows(pool, engine, rows, workers, checkpoint["failed"])
+            rendered += ok
+            checkpoint["done"] += ok
+            checkpoint["last_invoice_id"] = rows[-1]["invoice_id"]
+            save_checkpoint(checkpoint)
+
+            rate = rendered / (time.perf_counter() - start)
+            print(f"🧾 {checkpoint['done']:,} regenerated, {len(checkpoint['failed'])} failed "
+                  f"(up to invoice_id {checkpoint['last_invoice_id']}, {rate:,.1f} invoices/sec)")
+
+    if checkpoint["failed"]:
+        save_checkpoint(checkpoint)  # the next run retries just these
+    else:
+        clear_checkpoint()
+    return checkpoint
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    argv = sys.argv[1:]
+
+    def option(name, default):
+        return int(argv[argv.index(name) + 1]) if name in argv else default
+
+    engine = create_connection()
+    if engine is None:
+        raise RuntimeError("❌ Could not connect to database.")
+
+    summary = regenerate(
+        engine,
+        workers=option("--workers", REGEN_WORKERS),
+        page_size=option("--page-size", REGEN_PAGE_SIZE),
+        restart="--restart" in argv,
+    )
+    print(f"✅ Done: {summary['done']:,} invoice(s) regenerated with template v{INVOICE_TEMPLATE_VERSION}")
+    if summary["failed"]:
+        print(f"⚠️ {len(summary['failed'])} failed: {', '.join(summary['failed'][:20])} "
+              f"(run again to retry them)")
@@ -0,0 +1,319 @@
+# render_jobs.py
+# Background render jobs (report PDFs, invoice PDFs) so pages never build
+# PDFs inside the Streamlit script run. Redis-backed queue, local worker
+# threads, progress per job; outputs go to the artifact store.
+#
+#   jobs:queue                     list     job ids waiting for a worker
+#   jobs:processing:<worker>       list     job a worker has taken (BLMOVE from jobs:queue)
+#   jobs:workers                   set      worker names with a processing list
+#   jobs:heartbeat:<process>       string   set while that worker process is alive
+#   jobs:retry                     zset     job id -> time its next attempt is due
+#   job:<id>                       hash     kind, status, progress, message, attempts, error, result
+#   job:<id>:payload               string   JSON payload for the handler
+#   jobs:dedupe:<key>              string   job id already submitted for this key
+#
+# A job stays in its worker's processing list until the attempt finishes, so
+# a worker process that dies mid-render loses nothing: once its heartbeat
+# expires, any live process moves its jobs back to the queue. Retries wait
+# in jobs:retry and are queued again by whichever process sees them due.
+#
+# Workers start inside the app process (start_workers(), called by pages) or
+# as a dedicated process: `python render_jobs.py`.
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from redis_client import redis_client
+from artifact_store import put_bytes, open_artifact
+import metrics
+
+logger = logging.getLogger(__name__)
+
+RENDER_JOB_CONCURRENCY = int(os.getenv("RENDER_JOB_CONCURRENCY", "2"))  # worker threads per process
+RENDER_JOB_MAX_ATTEMPTS = int(os.getenv("RENDER_JOB_MAX_ATTEMPTS", "3"))
+RENDER_JOB_RETRY_DELAY = float(os.getenv("RENDER_JOB_RETRY_DELAY", "2"))  # seconds, doubled per attempt
+RENDER_JOB_TTL = int(os.getenv("RENDER_JOB_TTL", str(60 * 60 * 24)))  # job records
+# Set to "0" when a dedicated `python render_jobs.py` process does the work
+RENDER_WORKERS_EMBEDDED = os.getenv("RENDER_WORKERS_EMBEDDED", "1") == "1"
+# A process silent this long is presumed dead and its in-flight jobs re-queued
+RENDER_WORKER_HEARTBEAT_TTL = int(os.getenv("RENDER_WORKER_HEARTBEAT_TTL", "30"))
+
+QUEUE_KEY = "jobs:queue"
+PROCESSING_KEY = "jobs:processing:{worker}"
+WORKERS_KEY = "jobs:workers"
+HEARTBEAT_KEY = "jobs:heartbeat:{process}"
+RETRY_KEY = "jobs:retry"
+JOB_KEY = "job:{job_id}"
+PAYLOAD_KEY = "job:{job_id}:payload"
+DEDUPE_KEY = "jobs:dedupe:{key}"
+
+QUEUED, RUNNING, RETRYING, DONE, FAILED = "queued", "running", "retrying", "done", "failed"
+
+HANDLERS = {}
+
+metrics.describe("render_jobs_total", "Render jobs finished, by kind and final status")
+metrics.describe("render_job_seconds", "Time spent running one render job attempt")
+metrics.describe("render_job_retries_total", "Render job attempts that failed and were re-queued")
+metrics.describe("render_jobs_recovered_total", "In-flight render jobs re-queued from a dead worker process")
+
+_workers_lock = threading.Lock()
+_workers = []
+_process_id = uuid.uuid4().hex[:12]
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a failure retrying cannot fix; the job fails at once."""
+
+
+def job_handler(kind: str):
+    """
+    Registers fn(payload, progress) -> (artifact bytes or None, result dict)
+    for a job kind. Returned bytes are put in the artifact store and their
+    ref saved as result["artifact"]; a handler that stores its own output
+    returns None and sets result["artifact"] itself.
+    progress(pct, message) updates the job record while it runs.
+    """
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+# =========================================================
+# SUBMIT / QUERY
+# =========================================================
+def submit_job(kind: str, payload: dict, dedupe_key: str = None) -> str:
+    """
+    Queues a job and returns its id. With a dedupe_key, a job already
+    submitted for the same key (and not failed) is returned instead.
+    """
+    if dedupe_key:
+        existing = redis_client.get(DEDUPE_KEY.format(key=dedupe_key))
+        if existing and (job_status(existing) or {}).get("status") not in (None, FAILED):
+            return existing
+
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(JOB_KEY.format(job_id=job_id), mapping={
+            "kind": kind,
+            "status": QUEUED,
+            "progress": 0,
+            "message": "Queued",
+            "attempts": 0,
+            "error": "",
+            "result": "{}",
+            "created_at": now,
+            "updated_at": now,
+        })
+        pipe.expire(JOB_KEY.format(job_id=job_id), RENDER_JOB_TTL)
+        pipe.setex(PAYLOAD_KEY.format(job_id=job_id), RENDER_JOB_TTL, json.dumps(payload, default=str))
+        if dedupe_key:
+            pipe.setex(DEDUPE_KEY.format(key=dedupe_key), RENDER_JOB_TTL, job_id)
+        pipe.rpush(QUEUE_KEY, job_id)
+        pipe.execute()
+    return job_id
+
+
+def forget_dedupe(dedupe_key: str):
+    """Lets the next submit_job for this key start a fresh job (e.g. its output was deleted)."""
+    redis_client.delete(DEDUPE_KEY.format(key=dedupe_key))
+
+
+def job_status(job_id: str):
+    """
+    Job record as a dict (progress as int, result decoded), or None if it
+    never existed or has expired.
+    """
+    record = redis_client.hgetall(JOB_KEY.format(job_id=job_id))
+    if not record:
+        return None
+    record["id"] = job_id
+    record["progress"] = int(float(record.get("progress", 0)))
+    record["attempts"] = int(record.get("attempts", 0))
+    record["result"] = json.loads(record.get("result") or "{}")
+    return record
+
+
+def job_artifact(job_id: str):
+    """Open binary file for a finished job's output, or None."""
+    status = job_status(job_id)
+    ref = status["result"].get("artifact") if status else None
+    if not ref:
+        return None
+    try:
+        return open_artifact(ref)
+    except FileNotFoundError:
+        return None
+
+
+def _update(job_id: str, **fields):
+    fields["updated_at"] = time.time()
+    redis_client.hset(JOB_KEY.format(job_id=job_id), mapping=fields)
+
+
+# =========================================================
+# WORKERS
+# =========================================================
+def _requeue_later(job_id: str, delay: float):
+    redis_client.zadd(RETRY_KEY, {job_id: time.time() + delay})
+
+
+def _queue_due_retries():
+    """Moves retries whose delay has passed back onto the queue."""
+    for job_id in redis_client.zrangebyscore(RETRY_KEY, "-inf", time.time(), start=0, num=100):
+        # ZREM succeeds for one process only, so a retry is queued once
+        if redis_client.zrem(RETRY_KEY, job_id):
+            redis_client.rpush(QUEUE_KEY, job_id)
+
+
+def _recover_orphans():
+    """Re-queues jobs held by workers whose process stopped sending heartbeats."""
+    for worker in redis_client.smembers(WORKERS_KEY):
+        process = worker.split(":", 1)[0]
+        if redis_client.exists(HEARTBEAT_KEY.format(process=process)):
+            continue
+        processing = PROCESSING_KEY.format(worker=worker)
+        while True:
+            job_id = redis_client.lmove(processing, QUEUE_KEY, "LEFT", "RIGHT")
+            if job_id is None:
+                break
+            logger.warning("re-queued render job %s from dead worker %s", job_id, worker)
+            metrics.inc("render_jobs_recovered_total")
+        redis_client.srem(WORKERS_KEY, worker)
+
+
+def _heartbeat():
+    redis_client.set(HEARTBEAT_KEY.format(process=_process_id), int(time.time()), ex=RENDER_WORKER_HEARTBEAT_TTL)
+
+
+def _scheduler_loop():
+    """Per process: heartbeat, due retries, and recovery of dead workers' jobs."""
+    last_recovery = 0.0
+    while True:
+        try:
+            _heartbeat()
+            _queue_due_retries()
+            if time.time() - last_recovery >= RENDER_WORKER_HEARTBEAT_TTL:
+                _recover_orphans()
+                last_recovery = time.time()
+        except Exception:
+            logger.warning("render scheduler could not reach Redis", exc_info=True)
+        time.sleep(1)
+
+
+def run_job(job_id: str):
+    """Runs one attempt of a job and records the outcome."""
+    record = job_status(job_id)
+    raw_payload = redis_client.get(PAYLOAD_KEY.format(job_id=job_id))
+    if record is None or raw_payload is None:
+        logger.warning("render job %s expired before it ran", job_id)
+        return
+
+    kind = record["kind"]
+    attempt = record["attempts"] + 1
+    _update(job_id, status=RUNNING, attempts=attempt, message="Rendering")
+
+    def progress(pct, message=""):
+        _update(job_id, progress=int(pct), message=message)
+
+    start = time.perf_counter()
+    try:
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            raise PermanentJobError(f"no handler registered for job kind {kind!r}")
+        artifact, result = handler(json.loads(raw_payload), progress)
+    except Exception as e:
+        if attempt < RENDER_JOB_MAX_ATTEMPTS and not isinstance(e, PermanentJobError):
+            delay = RENDER_JOB_RETRY_DELAY * 2 ** (attempt - 1)
+            logger.warning("render job %s (%s) attempt %d failed, retrying in %.1fs",
+                           job_id, kind, attempt, delay, exc_info=True)
+            metrics.inc("render_job_retries_total", kind=kind)
+            _update(job_id, status=RETRYING, message=f"Retrying ({attempt}/{RENDER_JOB_MAX_ATTEMPTS})", error=str(e))
+            _requeue_later(job_id, delay)
+        else:
+            logger.error("render job %s (%s) failed", job_id, kind, exc_info=True)
+            metrics.inc("render_jobs_total", kind=kind, status=FAILED)
+            _update(job_id, status=FAILED, message="Failed", error=str(e))
+        return
+    finally:
+        metrics.observe("render_job_seconds", time.perf_counter() - start, kind=kind)
+
+    result = dict(result or {})
+    if artifact is not None:
+        ext = os.path.splitext(result.get("file_name", ""))[1] or ".pdf"
+        result["artifact"] = put_bytes(artifact, ext=ext)
+    _update(job_id, status=DONE, progress=100, message="Ready", error="", result=json.dumps(result, default=str))
+    metrics.inc("render_jobs_total", kind=kind, status=DONE)
+
+
+def _worker_loop(worker: str):
+    processing = PROCESSING_KEY.format(worker=worker)
+    while True:
+        try:
+            redis_client.sadd(WORKERS_KEY, worker)
+            job_id = redis_client.blmove(QUEUE_KEY, processing, timeout=1, src="LEFT", dest="RIGHT")
+        except Exception:
+            logger.warning("render worker could not reach Redis", exc_info=True)
+            time.sleep(RENDER_JOB_RETRY_DELAY)
+            continue
+        if not job_id:
+            continue
+        try:
+            run_job(job_id)
+        finally:
+            try:
+                redis_client.lrem(processing, 1, job_id)
+            except Exception:
+                logger.warning("could not clear render job %s from %s", job_id, processing, exc_info=True)
+
+
+def start_workers(concurrency: int = RENDER_JOB_CONCURRENCY):
+    """
+    Starts the worker threads once per process. `concurrency` caps how many
+    jobs this process renders at the same time.
+    """
+    import render_tasks  # noqa: F401  registers the job handlers
+
+    with _workers_lock:
+        if _workers:
+            return
+        try:
+            _heartbeat()  # before any worker takes a job, so no one mistakes this process for dead
+        except Exception:
+            logger.warning("render workers could not reach Redis", exc_info=True)
+        scheduler = threading.Thread(target=_scheduler_loop, name="render-scheduler", daemon=True)
+        scheduler.start()
+        _workers.append(scheduler)
+        for i in range(concurrency):
+            worker = threading.Thread(target=_worker_loop, args=(f"{_process_id}:{i}",),
+                                      name=f"render-worker-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+    logger.info("started %d render worker(s)", concurrency)
+
+
+def ensure_workers():
+    """Called by pages: starts in-process workers unless a dedicated worker process is used."""
+    if RENDER_WORKERS_EMBEDDED:
+        start_workers()
+
+
+if __name__ == "__main__":
+    # Run the workers from the importable module, not this __main__ copy:
+    # render_tasks registers its handlers on `render_jobs`, and that is the
+    # copy whose HANDLERS and PermanentJobError the workers must use.
+    import render_jobs
+
+    logging.basicConfig(level=logging.INFO)
+    render_jobs.start_workers()
+    print(f"🔄 Render workers running ({render_jobs.RENDER_JOB_CONCURRENCY} concurrent). Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+            metrics.maybe_export()
+    except KeyboardInterrupt:
+        print("👋 Render workers stopped")
@@ -0,0 +1,51 @@
+# render_tasks.py
+# Job handlers run by the render workers (see render_jobs.py).
+import pandas as pd
+
+from render_jobs import PermanentJobError, job_handler
+
+
+@job_handler("report_pdf")
+def render_report_pdf(payload: dict, progress):
+    """
+    payload: {"result_key", "title", "user_email"[, "result"]}
+    Builds the PDF from the shared report result (report_cache.py), so the
+    job usually carries only a key; "result" (pack_report_result) comes
+    along when the cache refused it, and is used if the key is missing.
+    """
+    from report_cache import get_report_result, unpack_report_result
+    from report_pdf import generate_pdf
+
+    progress(10, "Loading report data")
+    result = get_report_result(payload["result_key"])
+    if result is None and payload.get("result"):
+        result = unpack_report_result(payload["result"])
+    if result is None:
+        raise PermanentJobError("Report result is no longer cached; reopen the report to rebuild it.")
+
+    chart_ids = list(result["aggregates"])
+    progress(40, "Building PDF")
+    pdf = generate_pdf(
+        pd.DataFrame(result["summary_items"], columns=["Metric", "Value"]),
+        payload["title"],
+        result["summary_text"],
+        chart_ids,
+        result["aggregates"],
+        [result["chart_images"].get(c) for c in chart_ids],
+        payload["user_email"],
+    )
+    return pdf, {}
+
+
+@job_handler("invoice_pdf")
+def render_invoice_pdf(payload: dict, progress):
+    """
+    payload: generate_invoice_pdf keyword arguments.
+    Served from the invoice cache when this status was already rendered;
+    the stored ref is the pdf_path.
+    """
+    from invoice_cache import get_or_render_invoice_pdf
+
+    progress(20, "Building invoice")
+    pdf_ref = get_or_render_invoice_pdf(payload)
+    return None, {"artifact": pdf_ref, "pdf_path": pdf_ref}
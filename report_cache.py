@@ -0,0 +1,114 @@
+# report_cache.py
+# Content-addressed cache of finished report results, shared by every user.
+# A result is addressed by (dataset version, analysis, group, normalized
+# filters), so two buyers of the same report get the same key.
+#
+#   report:g<gen>:<hash>                 aggregates, metrics, summary (orjson)
+#   report:g<gen>:<hash of key+chart>    one PNG per chart (raw bytes)
+#
+# A result the cache budget refuses can travel inline instead (e.g. in a
+# report_pdf job payload): pack_report_result / unpack_report_result.
+import base64
+import json
+
+import pandas as pd
+
+from redis_cache import cache_key, get_cached, get_many, set_many
+
+REPORT_NAMESPACE = "report"
+
+# Values the filter widgets use for "nothing chosen"
+EMPTY_FILTER_VALUES = ("", "Please select a filter...", None)
+
+
+def normalize_filters(filters: dict) -> dict:
+    """
+    Canonical form of a filter selection: empty filters dropped, lists
+    de-duplicated and sorted, every value as a string.
+    """
+    normalized = {}
+    for name, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            values = sorted({str(v) for v in value if v not in EMPTY_FILTER_VALUES})
+            if values:
+                normalized[name] = values
+        elif value not in EMPTY_FILTER_VALUES:
+            normalized[name] = str(value)
+    return normalized
+
+
+def report_result_key(dataset_version, analysis: str, group: str, filters: dict) -> str:
+    canonical = json.dumps(normalize_filters(filters), sort_keys=True, separators=(",", ":"))
+    return cache_key(REPORT_NAMESPACE, dataset_version, analysis or "", group or "", canonical)
+
+
+def _image_key(result_key: str, chart_id: str) -> str:
+    return cache_key(REPORT_NAMESPACE, result_key, "image", chart_id)
+
+
+def _unpack(stored: dict, images: dict) -> dict:
+    return {
+        "aggregates": {c: pd.DataFrame(**data) for c, data in stored["aggregates"].items()},
+        "metrics": stored["metrics"],
+        "summary_text": stored["summary_text"],
+        "summary_items": [tuple(item) for item in stored["summary_items"]],
+        "chart_images": images,
+    }
+
+
+def _stored_form(aggregates: dict, metrics: dict, summary_text: str, summary_items: list) -> dict:
+    return {
+        "aggregates": {c: data.to_dict(orient="split") for c, data in aggregates.items()},
+        "metrics": metrics,
+        "summary_text": summary_text,
+        "summary_items": summary_items,
+    }
+
+
+def get_report_result(result_key: str):
+    """
+    Cached result or None:
+    {"aggregates": {chart id: DataFrame}, "metrics", "summary_text",
+     "summary_items", "chart_images": {chart id: PNG bytes or None}}.
+    """
+    stored = get_cached(result_key)
+    if stored is None:
+        return None
+
+    chart_ids = list(stored["aggregates"])
+    images = get_many([_image_key(result_key, c) for c in chart_ids])
+    return _unpack(stored, {c: images[_image_key(result_key, c)] for c in chart_ids})
+
+
+def store_report_result(result_key: str, aggregates: dict, metrics: dict, summary_text: str,
+                        summary_items: list, chart_images: dict) -> bool:
+    """
+    Saves a computed report in one pipelined write. Charts whose image
+    export failed are stored without an image. Returns False if the cache
+    budget refused the result.
+    """
+    items = {result_key: _stored_form(aggregates, metrics, summary_text, summary_items)}
+    for chart_id, image in chart_images.items():
+        if image is not None:
+            items[_image_key(result_key, chart_id)] = image
+    return set_many(items).get(result_key, False)
+
+
+def pack_report_result(aggregates: dict, metrics: dict, summary_text: str, summary_items: list,
+                       chart_images: dict) -> dict:
+    """A result as a JSON-safe dict (PNGs base64-encoded), for when it could not be cached."""
+    packed = _stored_form(aggregates, metrics, summary_text, summary_items)
+    packed["chart_images"] = {
+        c: base64.b64encode(image).decode("ascii") if image is not None else None
+        for c, image in chart_images.items()
+    }
+    return packed
+
+
+def unpack_report_result(packed: dict) -> dict:
+    """Reverses pack_report_result into the get_report_result shape."""
+    images = {
+        c: base64.b64decode(image) if image is not None else None
+        for c, image in packed.get("chart_images", {}).items()
+    }
+    return _unpack(packed, {c: images.get(c) for c in packed["aggregates"]})
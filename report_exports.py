@@ -0,0 +1,170 @@
+# report_exports.py
+# Data exports for view_report: gzip CSV, Parquet and Excel, built only when
+# the user asks for one and written in row chunks straight to a temp file,
+# so a large report never holds a second full copy of its data in memory.
+#
+# A finished export goes to the artifact store and its ref is cached under
+# the report's result key, so every later rerun (and every other buyer of
+# the same report) gets the download without rebuilding it.
+#
+#   report_export:g<gen>:<hash of result key+columns+format>   artifact ref
+import gzip
+import importlib.util
+import logging
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from redis_cache import cache_key, get_cached, set_cached
+from artifact_store import ARTIFACT_ROOT, get_backend, is_artifact_ref, put_file
+import metrics
+
+logger = logging.getLogger(__name__)
+
+EXPORT_NAMESPACE = "report_export"
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+EXCEL_MAX_ROWS = 1_048_575  # sheet limit minus the header row
+
+# Whichever Excel writer is installed (xlsxwriter streams rows to disk)
+EXCEL_ENGINE = next(
+    (engine for engine in ("xlsxwriter", "openpyxl") if importlib.util.find_spec(engine)),
+    None
+)
+
+EXPORT_FORMATS = {
+    "csv_gz": {"label": "CSV (gzip)", "ext": ".csv.gz", "mime": "application/gzip"},
+    "parquet": {"label": "Parquet", "ext": ".parquet", "mime": "application/vnd.apache.parquet"},
+    "xlsx": {
+        "label": "Excel",
+        "ext": ".xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+}
+
+metrics.describe("report_export_seconds", "Time to build one report data export, by format")
+metrics.describe("report_export_bytes", "Size of built report data exports, by format")
+metrics.describe("report_export_lookups_total", "Export cache lookups, by result")
+
+
+def _chunks(df, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+# =========================================================
+# WRITERS (df, path) → file at path
+# =========================================================
+def _write_csv_gz(df, path: str):
+    with gzip.open(path, "wt", compresslevel=EXPORT_GZIP_LEVEL, encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(_chunks(df)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+
+
+def _write_parquet(df, path: str):
+    # One schema for the whole frame so every row group matches
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_xlsx(df, path: str):
+    import pandas as pd
+
+    if EXCEL_ENGINE != "xlsxwriter":
+        # Handle, not path: the temp file has no .xlsx extension for pandas to check
+        with open(path, "wb") as f, pd.ExcelWriter(f, engine=EXCEL_ENGINE) as writer:
+            df.to_excel(writer, sheet_name="Report", index=False)
+        return
+
+    import xlsxwriter
+
+    # constant_memory flushes each row once the next one starts, so rows must
+    # be written strictly in order (to_excel writes column by column and
+    # would lose cells): write_row per row instead.
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "remove_timezone": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    try:
+        sheet = workbook.add_worksheet("Report")
+        sheet.write_row(0, 0, [str(c) for c in df.columns], workbook.add_format({"bold": True}))
+        row = 1
+        for chunk in _chunks(df):
+            # Python scalars, with missing values (NaN, NaT, None) as blanks
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for record in values.itertuples(index=False, name=None):
+                sheet.write_row(row, 0, record)
+                row += 1
+    finally:
+        workbook.close()
+
+
+WRITERS = {
+    "csv_gz": _write_csv_gz,
+    "parquet": _write_parquet,
+    "xlsx": _write_xlsx,
+}
+
+
+# =========================================================
+# PUBLIC API
+# =========================================================
+def available_formats(row_count: int) -> dict:
+    """Formats this report can be exported to (Excel needs a writer and fits a sheet)."""
+    formats = dict(EXPORT_FORMATS)
+    if EXCEL_ENGINE is None or row_count > EXCEL_MAX_ROWS:
+        formats.pop("xlsx")
+    return formats
+
+
+def export_key(result_key: str, columns, fmt: str) -> str:
+    return cache_key(EXPORT_NAMESPACE, result_key, list(columns), fmt)
+
+
+def cached_export(key: str):
+    """Artifact ref of an export already built for this key, or None."""
+    ref = get_cached(key)
+    if ref and is_artifact_ref(ref) and get_backend().touch(ref):
+        metrics.inc("report_export_lookups_total", result="hit")
+        return ref
+    metrics.inc("report_export_lookups_total", result="miss")
+    return None
+
+
+def build_export(df, fmt: str, key: str) -> str:
+    """
+    Writes `df` in `fmt`, stores it in the artifact store and caches the ref
+    under `key`. Returns the ref.
+    """
+    spec = EXPORT_FORMATS[fmt]
+    os.makedirs(ARTIFACT_ROOT, exist_ok=True)
+    # Same filesystem as the store, so put_file is a rename
+    fd, tmp_path = tempfile.mkstemp(dir=ARTIFACT_ROOT, suffix=".tmp")
+    os.close(fd)
+
+    start = time.perf_counter()
+    try:
+        WRITERS[fmt](df, tmp_path)
+        size = os.path.getsize(tmp_path)
+        ref = put_file(tmp_path, ext=spec["ext"])
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    elapsed = time.perf_counter() - start
+    metrics.observe("report_export_seconds", elapsed, format=fmt)
+    metrics.observe("report_export_bytes", size, format=fmt)
+    logger.info("built %s export (%d rows, %d bytes) in %.2fs", fmt, len(df), size, elapsed)
+
+    try:
+        set_cached(key, ref, serializer="json")
+    except Exception:
+        logger.warning("could not cache export ref %s", key, exc_info=True)
+    return ref
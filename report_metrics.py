@@ -0,0 +1,88 @@
+# report_metrics.py
+# KPI and breakdown numbers for view_report, all derived from one frequency
+# table per column instead of separate .mode() / value_counts() scans.
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ["Age", "Sex", "State", "ExamYear", "Disability"]
+
+
+def frequency_table(series: pd.Series) -> pd.Series:
+    """
+    Counts per value in a single pass (factorize + bincount), largest first.
+    Missing values are not counted, like value_counts().
+    """
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    table = pd.Series(counts, index=uniques, name="Count")
+    return table.sort_values(ascending=False, kind="stable")
+
+
+def frequency_tables(df: pd.DataFrame, columns=METRIC_COLUMNS) -> dict:
+    return {column: frequency_table(df[column]) for column in columns if column in df.columns}
+
+
+def table_mode(table: pd.Series):
+    """
+    Most frequent value; ties go to the smallest value, matching .mode()[0].
+    Returns "N/A" for an empty table.
+    """
+    if table.empty:
+        return "N/A"
+    top = table[table == table.iloc[0]].index
+    try:
+        value = min(top)
+    except TypeError:
+        value = top[0]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def compute_report_metrics(df: pd.DataFrame) -> dict:
+    """
+    Everything the KPI cards, summary text and breakdown need:
+    {"total", "tables", "modal_age", "female_count", "female_pct",
+     "top_state", "top_state_count", "peak_year"}.
+    """
+    tables = frequency_tables(df)
+    total = len(df)
+
+    female_count = 0
+    if "Sex" in tables:
+        sex = tables["Sex"]
+        female_count = int(sex[sex.index.astype(str).str.lower() == "female"].sum())
+
+    top_state = table_mode(tables["State"]) if "State" in tables else "N/A"
+
+    return {
+        "total": total,
+        "tables": tables,
+        "modal_age": table_mode(tables["Age"]) if "Age" in tables else "N/A",
+        "female_count": female_count,
+        "female_pct": round(female_count / total * 100, 0) if "Sex" in tables and total else 0,
+        "top_state": top_state,
+        "top_state_count": int(tables["State"].get(top_state, 0)) if top_state != "N/A" else 0,
+        "peak_year": table_mode(tables["ExamYear"]) if "ExamYear" in tables else "N/A",
+    }
+
+
+def breakdown_items(report_metrics: dict) -> list:
+    """
+    (label, value) rows for the Data Breakdown section and the PDF table.
+    """
+    tables = report_metrics["tables"]
+    items = [("Total Candidates", f"{report_metrics['total']:,}")]
+
+    if "ExamYear" in tables:
+        for year, count in tables["ExamYear"].sort_index().items():
+            items.append((f"Exam Year {year}", f"{count:,}"))
+
+    for column, label in (("Sex", "Sex"), ("Disability", "Disability")):
+        if column in tables:
+            for value, count in tables[column].items():
+                items.append((f"{label} — {value}", f"{count:,}"))
+
+    if "Age" in tables and not tables["Age"].empty:
+        modal_age = report_metrics["modal_age"]
+        items.append(("Modal Age", f"{modal_age} years ({tables['Age'].loc[modal_age]:,} candidates)"))
+
+    return items
@@ -0,0 +1,101 @@
+# report_pdf.py
+# Builds the downloadable report PDF (summary, breakdown table, charts) in
+# memory. Used by the "report_pdf" render job (see render_tasks.py).
+import os
+from datetime import datetime
+from io import BytesIO
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle, Image, PageBreak
+
+from pdf_charts import chart_drawing
+from report_registry import CHARTS
+from watermark import WatermarkedDocTemplate
+
+# "vector": charts drawn into the PDF with reportlab from the aggregates
+# "raster": kaleido PNGs embedded as images
+PDF_CHART_MODE = os.getenv("PDF_CHART_MODE", "vector")
+
+WATERMARK_IMAGE = "altered_edustat.jpg"
+
+summary_style = ParagraphStyle(
+    name='SummaryStyle',
+    fontName='Helvetica',
+    fontSize=14,
+    leading=16,
+    alignment=0,
+    spaceAfter=12
+)
+
+
+def generate_pdf(dataframe: pd.DataFrame, title: str, summary_text: str, chart_ids: list,
+                 chart_data: dict, chart_pngs: list, user_email: str) -> bytes:
+    """Generate styled, watermarked PDF with title, table, and charts."""
+    styles = getSampleStyleSheet()
+    report_title = Paragraph(f"<b>{title}</b>", styles["Title"])
+    date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    generated_on = Paragraph(f"Generated on: {date_str}", styles["Normal"])
+
+    user_identifier = user_email.split("@")[0].replace(".", " ").title()
+    user_identifier_display = Paragraph(
+        f"<para align='center'><font size=20><b>Name: </b></font><font size=26><b>{user_identifier}</b></font></para>",
+        styles["Normal"]
+    )
+
+    data = [dataframe.columns.tolist()] + dataframe.values.tolist()
+    table = Table(data, colWidths=[200, 300])
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1e293b")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 14)
+    ]))
+
+    def footer(canvas_obj, doc):
+        canvas_obj.saveState()
+        canvas_obj.setFont("Helvetica", 10)
+        canvas_obj.drawString(40, 20, "© Copyright 2025 Edustat. - All rights reserved")
+        canvas_obj.drawRightString(800, 20, f"email: {user_email}")
+        canvas_obj.restoreState()
+
+    buffer = BytesIO()
+    # Watermark is drawn on each page as it is laid out (no second pass)
+    doc = WatermarkedDocTemplate(buffer, watermark_image_path=WATERMARK_IMAGE, pagesize=landscape(A4))
+    elements = [
+        report_title,
+        Spacer(1, 18),
+        generated_on,
+        Spacer(1, 18),
+        user_identifier_display,
+        Spacer(1, 24),
+        Paragraph("<b>Report Summary</b>", styles["Heading2"]),
+        Spacer(1, 6),
+        Paragraph(summary_text, summary_style),
+        Spacer(1, 12),
+        Paragraph("<b>Filtered Data Summary</b>", styles["Heading2"]),
+        Spacer(1, 6),
+        table,
+    ]
+
+    # Add charts
+    for chart_id, png in zip(chart_ids, chart_pngs):
+        if PDF_CHART_MODE == "vector":
+            chart_flowable = chart_drawing(CHARTS[chart_id], chart_data[chart_id], width=700, height=400)
+        elif png:
+            chart_flowable = Image(BytesIO(png), width=700, height=400)
+        else:
+            continue
+        elements.append(PageBreak())
+        elements.append(Paragraph(f"<b>{CHARTS[chart_id]['title']}</b>", styles["Heading2"]))
+        elements.append(Spacer(1, 12))
+        elements.append(chart_flowable)
+
+    doc.build(elements, onFirstPage=footer, onLaterPages=footer)
+    return buffer.getvalue()
@@ -0,0 +1,795 @@
+# report_registry.py
+# Single catalogue of every report: groups -> subgroups -> analyses, the
+# filters each analysis asks for, and the charts it draws. Charts declare the
+# columns they aggregate over; plan_aggregations/compute_aggregations merge
+# those into one grouped pass over the filtered data.
+import numpy as np
+import pandas as pd
+
+from chart_data import histogram_edges, bins_frame
+
+DEFAULT_FILTERS = ["ExamYear"]
+
+# =========================================================
+# GROUPS & SUBGROUPS
+# =========================================================
+REPORT_GROUPS = {
+    "Demographic Analysis": {
+        "icon": "👥",
+        "subgroups": {
+            "Age Distribution Analysis": "Analyzes candidate age ranges, trends, and appropriateness across exam years and types.",
+            "Gender Equity Analysis": "Examines male-to-female ratios, gender balance trends, and distribution across exam types.",
+            "Regional & Geographic Distribution": "Maps where candidates come from and migration patterns for education.",
+            "Birth Cohort Analysis": "Examines age-appropriate enrollment and generational education patterns."
+        }
+    },
+    "State Analysis": {
+        "icon": "🗺️",
+        "subgroups": {
+            "State Enrollment & Registration": "Tracks state-level candidate registration, trends, and growth rates.",
+            "State Infrastructure": "Analyzes schools and centres registered per state and capacity utilization.",
+            "State Performance Comparison": "State-to-state performance comparison and quality indicators.",
+            "State Subject Analysis": "Number of subjects registered by state and subject performance.",
+            "State Examination Attendance": "State examination attendance rates and absenteeism patterns."
+        }
+    },
+    "Candidate Registration Statistics": {
+        "icon": "📋",
+        "subgroups": {
+            "Overall Registration Metrics": "Total candidate registration, enrollment trends, and forecasting.",
+            "Subject Registration Patterns": "Number of subjects per candidate and subject combination analysis.",
+            "Institutional Registration": "Number of schools and centres registered with growth trends.",
+            "Registration Demographics": "Age, gender, and regional registration distribution patterns."
+        }
+    },
+    "Candidate Performance Insights": {
+        "icon": "🎯",
+        "subgroups": {
+            "Overall Performance Analysis": "Pass/fail rates, grade distribution, and performance trends.",
+            "Credit Requirements Analysis": "Minimum required credits and credits with English & Mathematics.",
+            "Result Release Statistics": "Result release patterns, withheld results, and processing timelines.",
+            "Comparative Performance Analysis": "School, subject, state, and year-over-year performance comparison."
+        }
+    },
+    "Subject Pattern Insights": {
+        "icon": "📚",
+        "subgroups": {
+            "Subject Enrollment Statistics": "Subject registration numbers, popularity rankings, and trends.",
+            "Subject Performance Analysis": "Results by subject, difficulty assessment, and pass/fail rates.",
+            "Subject Comparisons": "Subject-to-subject performance and benchmark analysis.",
+            "Subject Demographics": "Age, gender, and regional subject preference patterns."
+        }
+    },
+    "Special Needs & Disability Insights": {
+        "icon": "♿",
+        "subgroups": {
+            "Special Needs Registration": "Number of special needs candidates and registration trends.",
+            "Special Needs Demographics": "Age, gender, and state distribution of special needs candidates.",
+            "Special Needs Performance": "Average performance and achievement gap analysis.",
+            "Special Needs Accessibility": "Centres with special needs support and accessibility patterns."
+        }
+    },
+    "School & Centre Analysis": {
+        "icon": "🏫",
+        "subgroups": {
+            "School & Centre Statistics": "Number of schools/centres, capacity utilization, and size distribution.",
+            "Centre Performance Rankings": "Top/bottom performing centres and quality scorecard.",
+            "Centre Distribution & Accessibility": "Centre distribution by state and urban vs rural analysis.",
+            "Centre Capacity Analysis": "Centre size vs performance and optimal capacity analysis."
+        }
+    },
+    "Examination & Academic Performance": {
+        "icon": "📊",
+        "subgroups": {
+            "Exam Type Analysis": "School vs private exams distribution and preferences.",
+            "Exam Type Performance": "Performance by exam type and quality indicators.",
+            "Grade Distribution Analysis": "Overall grade distribution and patterns across variables.",
+            "Examination Attendance": "Attendance rates, registration gaps, and absenteeism patterns."
+        }
+    },
+    "Temporal Trends & Forecasting": {
+        "icon": "📈",
+        "subgroups": {
+            "Year-over-Year Trends": "Enrollment and performance trends across years.",
+            "Growth Rate Analysis": "Year-on-year percentage changes and growth patterns.",
+            "Forecasting & Projections": "Future enrollment and performance trend predictions.",
+            "Seasonal & Cyclical Patterns": "Seasonal registration and examination cycle analysis."
+        }
+    },
+    "Cross-Dimensional Analysis": {
+        "icon": "🔄",
+        "subgroups": {
+            "Gender-Subject Preference": "Gender biases in subject selection and STEM gender gaps.",
+            "Gender-Performance Analysis": "Gender performance gaps and equity in outcomes.",
+            "Age-Performance Correlation": "Optimal age for success and age-grade relationships.",
+            "State-Performance Correlation": "State performance rankings and regional disparities.",
+            "Multi-Variable Analysis": "Complex cross-dimensional insights and correlations."
+        }
+    },
+    "Statistical Insights & Summaries": {
+        "icon": "📉",
+        "subgroups": {
+            "Descriptive Statistics": "Mean, median, mode, variance, and outlier detection.",
+            "Correlation Analysis": "Performance prediction factors and variable relationships.",
+            "Distribution Analysis": "Normal distribution testing and data patterns.",
+            "Advanced Analytics": "Regression analysis, trend analysis, and predictive modeling."
+        }
+    }
+}
+
+# =========================================================
+# CHARTS
+# =========================================================
+# kind:  pie | bar | line | histogram
+# dims:  columns counted over; a second dim becomes the colour/series
+# top:   keep only the N largest categories of the first dim
+# bins:  number of bins for a histogram's first (numeric) dim
+# sort:  "index" orders the first dim by value instead of by count
+CHARTS = {
+    # Demographics
+    "gender_pie":          {"title": "Gender Distribution", "kind": "pie", "dims": ["Sex"]},
+    "disability_bar":      {"title": "Disability Status Breakdown", "kind": "bar", "dims": ["Disability"]},
+    "age_histogram":       {"title": "Age Distribution", "kind": "histogram", "dims": ["Age"], "bins": 10},
+    "age_by_year":         {"title": "Age Distribution by Exam Year", "kind": "histogram", "dims": ["Age", "ExamYear"], "bins": 10},
+    "age_by_exam_type":    {"title": "Age Distribution by Exam Type", "kind": "histogram", "dims": ["Age", "ExamType"], "bins": 10},
+    "age_by_sex":          {"title": "Age Distribution by Gender", "kind": "histogram", "dims": ["Age", "Sex"], "bins": 10},
+    "sex_by_year":         {"title": "Gender Balance by Exam Year", "kind": "bar", "dims": ["ExamYear", "Sex"], "sort": "index"},
+    "sex_by_state":        {"title": "Gender Distribution by State", "kind": "bar", "dims": ["State", "Sex"]},
+    "sex_by_exam_type":    {"title": "Gender Distribution by Exam Type", "kind": "bar", "dims": ["ExamType", "Sex"]},
+    "sex_trend":           {"title": "Gender Trend Over Years", "kind": "line", "dims": ["ExamYear", "Sex"], "sort": "index"},
+    "disability_trend":    {"title": "Disability Trend Over Years", "kind": "line", "dims": ["ExamYear", "Disability"], "sort": "index"},
+    "disability_by_sex":   {"title": "Disability by Gender", "kind": "bar", "dims": ["Disability", "Sex"]},
+    "disability_by_state": {"title": "Disability by State", "kind": "bar", "dims": ["State", "Disability"]},
+
+    # Geography & institutions
+    "state_bar":           {"title": "Candidates by State", "kind": "bar", "dims": ["State"]},
+    "state_trend":         {"title": "State Enrollment Over Years", "kind": "line", "dims": ["ExamYear", "State"], "sort": "index"},
+    "centre_top10_bar":    {"title": "Top 10 Exam Centers by Candidates", "kind": "bar", "dims": ["Centre"], "top": 10},
+    "origin_top10_bar":    {"title": "Top 10 Origin Locations", "kind": "bar", "dims": ["Origin"], "top": 10},
+
+    # Exam types & subjects
+    "exam_type_pie":       {"title": "Exam Type Distribution", "kind": "pie", "dims": ["ExamType"]},
+    "exam_type_trend":     {"title": "Exam Type Preferences Over Years", "kind": "line", "dims": ["ExamYear", "ExamType"], "sort": "index"},
+    "exam_type_by_sex":    {"title": "Exam Type by Gender", "kind": "bar", "dims": ["ExamType", "Sex"]},
+    "exam_type_by_state":  {"title": "Exam Type by State", "kind": "bar", "dims": ["State", "ExamType"]},
+    "subject_top_bar":     {"title": "Top 15 Subjects by Enrollment", "kind": "bar", "dims": ["Subject"], "top": 15},
+    "subject_by_sex":      {"title": "Subject Enrollment by Gender", "kind": "bar", "dims": ["Subject", "Sex"], "top": 15},
+    "subject_trend":       {"title": "Subject Enrollment Over Years", "kind": "line", "dims": ["ExamYear", "Subject"], "sort": "index"},
+
+    # Grades
+    "grade_bar":           {"title": "Grade Distribution", "kind": "bar", "dims": ["Grade"], "sort": "index"},
+    "grade_by_subject":    {"title": "Grades by Subject", "kind": "bar", "dims": ["Subject", "Grade"], "top": 15},
+    "grade_by_year":       {"title": "Grades by Exam Year", "kind": "bar", "dims": ["ExamYear", "Grade"], "sort": "index"},
+    "grade_by_exam_type":  {"title": "Grades by Exam Type", "kind": "bar", "dims": ["ExamType", "Grade"]},
+    "grade_by_disability": {"title": "Grades by Disability Status", "kind": "bar", "dims": ["Disability", "Grade"]},
+    "grade_by_sex":        {"title": "Grades by Gender", "kind": "bar", "dims": ["Sex", "Grade"]},
+
+    # Equity & trends
+    "sponsor_pie":            {"title": "Sponsorship Distribution", "kind": "pie", "dims": ["Sponsor"]},
+    "sponsor_disability_bar": {"title": "Disability vs Sponsorship", "kind": "bar", "dims": ["Sponsor", "Disability"]},
+    "year_trend_line":        {"title": "Candidate Trend Over Years", "kind": "line", "dims": ["ExamYear"], "sort": "index"},
+}
+
+# Charts shown for a report group when the selected analysis declares none
+# (keys are REPORT_GROUPS names)
+GROUP_CHARTS = {
+    "Demographic Analysis": ["gender_pie", "disability_bar", "age_histogram"],
+    "State Analysis": ["state_bar", "centre_top10_bar"],
+    "School & Centre Analysis": ["centre_top10_bar", "state_bar"],
+    "Special Needs & Disability Insights": ["disability_bar", "sponsor_disability_bar", "sponsor_pie"],
+    "Temporal Trends & Forecasting": ["year_trend_line"],
+}
+
+# =========================================================
+# ANALYSES
+# =========================================================
+# Every analysis offered in report_filters. "filters" defaults to
+# DEFAULT_FILTERS; an empty "charts" list falls back to GROUP_CHARTS.
+ANALYSES = {
+    # Age Distribution Analysis
+    "Age Range of Candidates": {
+        "subgroup": "Age Distribution Analysis",
+        "description": "View youngest and oldest candidates, identifying age extremes in the dataset",
+        "filters": ["ExamYear", "Sex", "State"],
+        "charts": ["age_histogram"],
+    },
+    "Age Distribution by Exam Year": {
+        "subgroup": "Age Distribution Analysis",
+        "description": "Analyze how candidate ages vary across different examination years",
+        "filters": ["ExamYear", "Sex", "Age"],
+        "charts": ["age_histogram", "age_by_year"],
+    },
+    "Age Appropriateness Analysis": {
+        "subgroup": "Age Distribution Analysis",
+        "description": "Assess age suitability for different exam types and identify outliers",
+        "filters": ["ExamYear", "Age", "ExamType"],
+        "charts": ["age_histogram", "age_by_exam_type"],
+    },
+    "Early/Late Enrollment Patterns": {
+        "subgroup": "Age Distribution Analysis",
+        "description": "Identify trends in early or delayed enrollment based on age data",
+        "filters": ["ExamYear", "Age", "Sex"],
+        "charts": ["age_histogram", "age_by_sex"],
+    },
+
+    # Gender Equity Analysis
+    "Male-to-Female Ratio": {
+        "subgroup": "Gender Equity Analysis",
+        "description": "Calculate overall gender balance and identify disparities",
+        "filters": ["ExamYear", "Sex", "State"],
+        "charts": ["gender_pie", "sex_by_state"],
+    },
+    "Gender Balance by Exam Year": {
+        "subgroup": "Gender Equity Analysis",
+        "description": "Track how gender distribution changes over examination years",
+        "filters": ["ExamYear", "Sex"],
+        "charts": ["sex_by_year"],
+    },
+    "Gender Distribution by Exam Type": {
+        "subgroup": "Gender Equity Analysis",
+        "description": "Compare gender representation across school and private exams",
+        "filters": ["ExamYear", "Sex", "ExamType"],
+        "charts": ["sex_by_exam_type"],
+    },
+    "Gender Trends Over Time": {
+        "subgroup": "Gender Equity Analysis",
+        "description": "Visualize historical gender equity patterns and improvements",
+        "filters": ["ExamYear", "Sex"],
+        "charts": ["sex_trend"],
+    },
+
+    # Special Needs & Disability Analysis
+    "Disability Inclusion Rate": {
+        "subgroup": "Special Needs & Disability Analysis",
+        "description": "Calculate percentage of candidates with special needs",
+        "filters": ["ExamYear", "Disability", "Sex"],
+        "charts": ["disability_bar"],
+    },
+    "Disability Trends by Year": {
+        "subgroup": "Special Needs & Disability Analysis",
+        "description": "Track inclusion rates and changes over time",
+        "filters": ["ExamYear", "Disability"],
+        "charts": ["disability_trend"],
+    },
+    "Disability by Gender Distribution": {
+        "subgroup": "Special Needs & Disability Analysis",
+        "description": "Analyze disability representation across male and female candidates",
+        "filters": ["ExamYear", "Disability", "Sex"],
+        "charts": ["disability_by_sex"],
+    },
+    "Regional Disability Patterns": {
+        "subgroup": "Special Needs & Disability Analysis",
+        "description": "Compare disability rates across different states and regions",
+        "filters": ["ExamYear", "Disability", "State"],
+        "charts": ["disability_by_state"],
+    },
+
+    # State-Level Distribution
+    "State Enrollment Rankings": {
+        "subgroup": "State-Level Distribution",
+        "description": "Identify top and bottom states by candidate volume",
+        "filters": ["ExamYear", "State", "Sex"],
+        "charts": ["state_bar"],
+    },
+    "Regional Access Patterns": {
+        "subgroup": "State-Level Distribution",
+        "description": "Map geographic disparities in education access",
+        "filters": ["ExamYear", "State"],
+        "charts": ["state_bar"],
+    },
+    "State Trends Over Years": {
+        "subgroup": "State-Level Distribution",
+        "description": "Track enrollment growth or decline by state",
+        "filters": ["ExamYear", "State"],
+        "charts": ["state_trend"],
+    },
+    "State Capacity Analysis": {
+        "subgroup": "State-Level Distribution",
+        "description": "Assess state-level educational infrastructure utilization",
+        "filters": ["ExamYear", "State", "Centre"],
+        "charts": ["state_bar", "centre_top10_bar"],
+    },
+
+    # Centre/School Comparison
+    "Top Performing Centres": {
+        "subgroup": "Centre/School Comparison",
+        "description": "Rank examination centres by candidate enrollment",
+        "filters": ["ExamYear", "Centre", "State"],
+        "charts": ["centre_top10_bar"],
+    },
+    "Centre Capacity Utilization": {
+        "subgroup": "Centre/School Comparison",
+        "description": "Analyze how effectively centres are being used",
+        "filters": ["ExamYear", "Centre"],
+        "charts": ["centre_top10_bar"],
+    },
+    "Centre Distribution by State": {
+        "subgroup": "Centre/School Comparison",
+        "description": "Map centres across geographic regions",
+        "filters": ["ExamYear", "Centre", "State"],
+        "charts": ["state_bar", "centre_top10_bar"],
+    },
+    "School-to-School Comparison": {
+        "subgroup": "Centre/School Comparison",
+        "description": "Compare individual institutions on key metrics",
+        "filters": ["ExamYear", "Centre", "State"],
+        "charts": ["centre_top10_bar"],
+    },
+
+    # Origin Analysis
+    "Top Origin Locations": {
+        "subgroup": "Origin Analysis",
+        "description": "Identify where most candidates originate from",
+        "filters": ["ExamYear", "Origin", "State"],
+        "charts": ["origin_top10_bar"],
+    },
+    "Local vs External Candidates": {
+        "subgroup": "Origin Analysis",
+        "description": "Compare candidates from local vs external origins",
+        "filters": ["ExamYear", "Origin"],
+        "charts": ["origin_top10_bar"],
+    },
+    "Migration Patterns": {
+        "subgroup": "Origin Analysis",
+        "description": "Visualize candidate movement for education",
+        "filters": ["ExamYear", "Origin", "State"],
+        "charts": ["origin_top10_bar", "state_bar"],
+    },
+    "Origin Diversity Index": {
+        "subgroup": "Origin Analysis",
+        "description": "Measure geographic diversity of candidate origins",
+        "filters": ["ExamYear", "Origin"],
+        "charts": ["origin_top10_bar"],
+    },
+
+    # Exam Type Analysis
+    "School vs Private Exam Distribution": {
+        "subgroup": "Exam Type Analysis",
+        "description": "Compare volumes of school and private examinations",
+        "filters": ["ExamYear", "ExamType", "Sex"],
+        "charts": ["exam_type_pie"],
+    },
+    "Exam Type Preferences by Year": {
+        "subgroup": "Exam Type Analysis",
+        "description": "Track how exam type choices change over time",
+        "filters": ["ExamYear", "ExamType"],
+        "charts": ["exam_type_trend"],
+    },
+    "Exam Type by Gender": {
+        "subgroup": "Exam Type Analysis",
+        "description": "Analyze gender differences in exam type selection",
+        "filters": ["ExamYear", "ExamType", "Sex"],
+        "charts": ["exam_type_by_sex"],
+    },
+    "Exam Type Regional Patterns": {
+        "subgroup": "Exam Type Analysis",
+        "description": "Identify regional preferences for exam types",
+        "filters": ["ExamYear", "ExamType", "State"],
+        "charts": ["exam_type_by_state"],
+    },
+
+    # Subject Performance Analysis
+    "Most Popular Subjects": {
+        "subgroup": "Subject Performance Analysis",
+        "description": "Rank subjects by enrollment and identify trends",
+        "filters": ["ExamYear", "Subject", "Sex"],
+        "charts": ["subject_top_bar"],
+    },
+    "Subject Difficulty Analysis": {
+        "subgroup": "Subject Performance Analysis",
+        "description": "Assess subject difficulty based on grade distributions",
+        "filters": ["ExamYear", "Subject", "Grade"],
+        "charts": ["grade_by_subject"],
+    },
+    "Subject Preferences by Gender": {
+        "subgroup": "Subject Performance Analysis",
+        "description": "Identify gender-based subject selection patterns",
+        "filters": ["ExamYear", "Subject", "Sex"],
+        "charts": ["subject_by_sex"],
+    },
+    "Subject Enrollment Trends": {
+        "subgroup": "Subject Performance Analysis",
+        "description": "Track how subject popularity changes over years",
+        "filters": ["ExamYear", "Subject"],
+        "charts": ["subject_trend"],
+    },
+
+    # Grade Distribution Analysis
+    "Overall Grade Patterns": {
+        "subgroup": "Grade Distribution Analysis",
+        "description": "View complete grade distribution across all candidates",
+        "filters": ["ExamYear", "Grade", "Subject"],
+        "charts": ["grade_bar"],
+    },
+    "Pass/Fail Rate Analysis": {
+        "subgroup": "Grade Distribution Analysis",
+        "description": "Calculate success rates and identify improvement areas",
+        "filters": ["ExamYear", "Grade"],
+        "charts": ["grade_bar"],
+    },
+    "Grade Trends by Subject": {
+        "subgroup": "Grade Distribution Analysis",
+        "description": "Compare performance across different subjects",
+        "filters": ["ExamYear", "Grade", "Subject"],
+        "charts": ["grade_by_subject"],
+    },
+    "Grade Performance by Year": {
+        "subgroup": "Grade Distribution Analysis",
+        "description": "Track academic outcomes over examination years",
+        "filters": ["ExamYear", "Grade"],
+        "charts": ["grade_by_year"],
+    },
+
+    # Year-over-Year Enrollment Trends
+    "Total Enrollment by Year": {
+        "subgroup": "Year-over-Year Enrollment Trends",
+        "description": "Track overall candidate volumes across years",
+        "charts": ["year_trend_line"],
+    },
+    "Growth Rate Analysis": {
+        "subgroup": "Year-over-Year Enrollment Trends",
+        "description": "Calculate year-on-year percentage changes",
+        "charts": ["year_trend_line"],
+    },
+    "Enrollment Forecasting": {
+        "subgroup": "Year-over-Year Enrollment Trends",
+        "description": "Project future enrollment trends based on historical data",
+        "charts": [],
+    },
+    "Seasonal Enrollment Patterns": {
+        "subgroup": "Year-over-Year Enrollment Trends",
+        "description": "Identify cyclical patterns in registration",
+        "charts": [],
+    },
+
+    # Birth Cohort Analysis
+    "Birth Year Distribution": {
+        "subgroup": "Birth Cohort Analysis",
+        "description": "Analyze candidate distribution by year of birth",
+        "charts": [],
+    },
+    "Age-Appropriate Enrollment": {
+        "subgroup": "Birth Cohort Analysis",
+        "description": "Assess if candidates are enrolling at suitable ages",
+        "charts": [],
+    },
+    "Cohort Tracking": {
+        "subgroup": "Birth Cohort Analysis",
+        "description": "Follow specific age groups through examination years",
+        "charts": [],
+    },
+    "Generational Education Trends": {
+        "subgroup": "Birth Cohort Analysis",
+        "description": "Compare educational patterns across generations",
+        "charts": [],
+    },
+
+    # Gender-Subject Preference
+    "Gender Bias in Subjects": {
+        "subgroup": "Gender-Subject Preference",
+        "description": "Identify male or female-dominated subject areas",
+        "charts": ["subject_by_sex"],
+    },
+    "STEM Gender Gap Analysis": {
+        "subgroup": "Gender-Subject Preference",
+        "description": "Analyze gender representation in science subjects",
+        "charts": ["subject_by_sex"],
+    },
+    "Subject Gender Balance Index": {
+        "subgroup": "Gender-Subject Preference",
+        "description": "Measure gender equity across all subjects",
+        "charts": ["subject_by_sex"],
+    },
+    "Gender Preference Trends": {
+        "subgroup": "Gender-Subject Preference",
+        "description": "Track how gender-subject patterns change over time",
+        "charts": [],
+    },
+
+    # Gender-Performance Analysis
+    "Gender Performance Gap": {
+        "subgroup": "Gender-Performance Analysis",
+        "description": "Compare average grades between male and female candidates",
+        "charts": ["grade_by_sex"],
+    },
+    "Subject-Specific Gender Performance": {
+        "subgroup": "Gender-Performance Analysis",
+        "description": "Identify subjects where gender affects outcomes",
+        "charts": [],
+    },
+    "Gender Equity in Outcomes": {
+        "subgroup": "Gender-Performance Analysis",
+        "description": "Assess fairness in academic achievement",
+        "charts": [],
+    },
+    "Performance Trends by Gender": {
+        "subgroup": "Gender-Performance Analysis",
+        "description": "Track how gender performance gaps evolve",
+        "charts": [],
+    },
+
+    # Age-Performance Correlation
+    "Optimal Age for Success": {
+        "subgroup": "Age-Performance Correlation",
+        "description": "Determine age ranges with best performance",
+        "charts": [],
+    },
+    "Over-Age Performance Analysis": {
+        "subgroup": "Age-Performance Correlation",
+        "description": "Assess outcomes for candidates above typical age",
+        "charts": [],
+    },
+    "Under-Age Performance Analysis": {
+        "subgroup": "Age-Performance Correlation",
+        "description": "Evaluate results for younger candidates",
+        "charts": [],
+    },
+    "Age-Grade Relationship": {
+        "subgroup": "Age-Performance Correlation",
+        "description": "Visualize correlation between age and grades",
+        "charts": [],
+    },
+
+    # State-Performance Comparison
+    "State Performance Rankings": {
+        "subgroup": "State-Performance Comparison",
+        "description": "Rank states by average academic outcomes",
+        "charts": [],
+    },
+    "Regional Performance Gaps": {
+        "subgroup": "State-Performance Comparison",
+        "description": "Identify disparities between high and low-performing regions",
+        "charts": [],
+    },
+    "State Quality Indicators": {
+        "subgroup": "State-Performance Comparison",
+        "description": "Assess state-level education quality metrics",
+        "charts": [],
+    },
+    "Performance Improvement Trends": {
+        "subgroup": "State-Performance Comparison",
+        "description": "Track which states are improving over time",
+        "charts": [],
+    },
+
+    # Disability-Performance Analysis
+    "Achievement Gap Analysis": {
+        "subgroup": "Disability-Performance Analysis",
+        "description": "Measure performance differences for students with disabilities",
+        "charts": ["grade_by_disability"],
+    },
+    "Disability Support Effectiveness": {
+        "subgroup": "Disability-Performance Analysis",
+        "description": "Assess if support systems improve outcomes",
+        "charts": [],
+    },
+    "Inclusion Success Metrics": {
+        "subgroup": "Disability-Performance Analysis",
+        "description": "Evaluate academic success of special needs students",
+        "charts": [],
+    },
+    "Disability Performance by Subject": {
+        "subgroup": "Disability-Performance Analysis",
+        "description": "Identify subjects where disability impacts vary",
+        "charts": ["grade_by_disability"],
+    },
+
+    # Exam Type-Performance Analysis
+    "School vs Private Performance": {
+        "subgroup": "Exam Type-Performance Analysis",
+        "description": "Compare grades between exam types",
+        "charts": ["grade_by_exam_type"],
+    },
+    "Exam Type Standards Comparison": {
+        "subgroup": "Exam Type-Performance Analysis",
+        "description": "Assess if grading standards differ",
+        "charts": [],
+    },
+    "Performance Trends by Exam Type": {
+        "subgroup": "Exam Type-Performance Analysis",
+        "description": "Track outcome patterns over years",
+        "charts": [],
+    },
+    "Exam Type Success Rates": {
+        "subgroup": "Exam Type-Performance Analysis",
+        "description": "Calculate pass rates for each exam type",
+        "charts": ["grade_by_exam_type"],
+    },
+
+    # Centre-Performance Rankings
+    "Best Performing Centres": {
+        "subgroup": "Centre-Performance Rankings",
+        "description": "Identify top centres by academic outcomes",
+        "charts": [],
+    },
+    "Centre Quality Scorecard": {
+        "subgroup": "Centre-Performance Rankings",
+        "description": "Create comprehensive centre performance metrics",
+        "charts": [],
+    },
+    "Centre Size vs Performance": {
+        "subgroup": "Centre-Performance Rankings",
+        "description": "Analyze if centre size affects results",
+        "charts": [],
+    },
+    "Centre Improvement Tracking": {
+        "subgroup": "Centre-Performance Rankings",
+        "description": "Monitor centres showing progress over time",
+        "charts": [],
+    },
+
+    # Descriptive Statistics
+    "Central Tendency Measures": {
+        "subgroup": "Descriptive Statistics",
+        "description": "Calculate mean, median, and mode for key metrics",
+        "charts": [],
+    },
+    "Dispersion Analysis": {
+        "subgroup": "Descriptive Statistics",
+        "description": "Assess variance and standard deviation patterns",
+        "charts": [],
+    },
+    "Quartile and Percentile Analysis": {
+        "subgroup": "Descriptive Statistics",
+        "description": "Identify data distribution segments",
+        "charts": [],
+    },
+    "Outlier Detection": {
+        "subgroup": "Descriptive Statistics",
+        "description": "Find anomalies and extreme values in the dataset",
+        "charts": [],
+    },
+
+    # Correlation Analysis
+    "Grade Prediction Factors": {
+        "subgroup": "Correlation Analysis",
+        "description": "Identify which variables best predict academic success",
+        "charts": [],
+    },
+    "Variable Relationships": {
+        "subgroup": "Correlation Analysis",
+        "description": "Analyze correlations between different data points",
+        "charts": [],
+    },
+    "Performance Indicators": {
+        "subgroup": "Correlation Analysis",
+        "description": "Determine key factors associated with better outcomes",
+        "charts": [],
+    },
+    "Multi-Variable Analysis": {
+        "subgroup": "Correlation Analysis",
+        "description": "Examine complex relationships between multiple factors",
+        "charts": [],
+    },
+}
+
+
+# =========================================================
+# LOOKUPS
+# =========================================================
+def analyses_for_subgroup(subgroup: str) -> list:
+    """(title, description) pairs for a subgroup, in catalogue order."""
+    return [
+        (title, analysis["description"])
+        for title, analysis in ANALYSES.items()
+        if analysis["subgroup"] == subgroup
+    ]
+
+
+def required_filters(analysis: str) -> list:
+    return ANALYSES.get(analysis, {}).get("filters", DEFAULT_FILTERS)
+
+
+def charts_for_report(analysis: str, group: str, columns) -> list:
+    """
+    Chart ids to draw for a report, keeping only charts whose columns are
+    all present in the data.
+    """
+    chart_ids = ANALYSES.get(analysis, {}).get("charts") or GROUP_CHARTS.get(group, [])
+    columns = set(columns)
+    return [c for c in chart_ids if set(CHARTS[c]["dims"]).issubset(columns)]
+
+
+# =========================================================
+# AGGREGATION PLANNER
+# =========================================================
+def _bin_column(column: str) -> str:
+    return f"{column}__bin"
+
+
+def plan_aggregations(chart_ids: list) -> dict:
+    """
+    Merges the aggregations of several charts:
+    {"dims": every grouping column once, "bins": {numeric column: nbins}}.
+    Histogram columns are grouped by bin, not by raw value.
+    """
+    dims, bins = [], {}
+    for chart_id in chart_ids:
+        chart = CHARTS[chart_id]
+        for position, column in enumerate(chart["dims"]):
+            if chart["kind"] == "histogram" and position == 0:
+                bins[column] = max(bins.get(column, 0), chart.get("bins", 10))
+                column = _bin_column(column)
+            if column not in dims:
+                dims.append(column)
+    return {"dims": dims, "bins": bins}
+
+
+def _marginal(counts: pd.Series, dims: list) -> pd.DataFrame:
+    """Sums the combined counts down to `dims` (rows with a missing value drop out)."""
+    return counts.groupby(level=dims, observed=True).sum().reset_index(name="Count")
+
+
+def compute_aggregations(df: pd.DataFrame, chart_ids: list) -> dict:
+    """
+    Computes the data for every chart in one grouped pass:
+    one groupby over the union of all chart dims, then each chart's counts
+    are summed out of that (small) result. Returns {chart id: DataFrame}.
+    """
+    if not chart_ids:
+        return {}
+    plan = plan_aggregations(chart_ids)
+
+    frame = df
+    edges = {}
+    if plan["bins"]:
+        frame = df.copy(deep=False)
+        for column, nbins in plan["bins"].items():
+            values = pd.to_numeric(df[column], errors="coerce")
+            present = values.dropna().to_numpy()
+            if present.size == 0:
+                edges[column] = np.array([0.0, 1.0])
+                frame[_bin_column(column)] = np.nan
+                continue
+            edges[column] = histogram_edges(present, nbins)
+            # Same bins as np.histogram: right edge closed on the last bin only
+            codes = np.searchsorted(edges[column], values.to_numpy(), side="right") - 1
+            codes = np.clip(codes, 0, len(edges[column]) - 2).astype(float)
+            codes[values.isna().to_numpy()] = np.nan
+            frame[_bin_column(column)] = codes
+
+    counts = frame.groupby(plan["dims"], dropna=False, observed=True).size()
+    if len(plan["dims"]) == 1:
+        counts.index = pd.MultiIndex.from_arrays([counts.index], names=plan["dims"])
+
+    results = {}
+    for chart_id in chart_ids:
+        chart = CHARTS[chart_id]
+        dims = list(chart["dims"])
+        first = dims[0]
+
+        if chart["kind"] == "histogram":
+            dims[0] = _bin_column(first)
+            data = _marginal(counts, dims)
+            edge = edges[first]
+            if len(dims) == 1:
+                per_bin = data.set_index(dims[0])["Count"].reindex(range(len(edge) - 1), fill_value=0)
+                results[chart_id] = bins_frame(edge, per_bin.to_numpy())
+                continue
+            bin_index = data[dims[0]].astype(int).to_numpy()
+            start, end = edge[bin_index], edge[bin_index + 1]
+            results[chart_id] = pd.DataFrame({
+                "Start": start,
+                "End": end,
+                "Center": (start + end) / 2,
+                "Width": end - start,
+            }).join(data[dims[1:] + ["Count"]])
+            continue
+
+        data = _marginal(counts, dims)
+        totals = data.groupby(first)["Count"].sum()
+        if chart.get("top"):
+            keep = totals.sort_values(ascending=False, kind="stable").head(chart["top"]).index
+            data = data[data[first].isin(keep)]
+            totals = totals.loc[keep]
+
+        if chart.get("sort") == "index":
+            data = data.sort_values(dims, kind="stable")
+        else:
+            # Largest first dim first, like value_counts()
+            order = totals.sort_values(ascending=False, kind="stable").index
+            rank = pd.Series(range(len(order)), index=order)
+            data = data.assign(_rank=data[first].map(rank)).sort_values(
+                ["_rank"] + dims[1:], kind="stable").drop(columns="_rank")
+        results[chart_id] = data.reset_index(drop=True)
+    return results
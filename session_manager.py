@@ -1,33 +1,156 @@
+# session_manager.py
+# Login sessions. Redis is the source of truth, so validating a token is one
+# command; MySQL `sessions` is only an audit trail, written in batches by a
+# background thread off the login path.
+#
+#   session:<token>   string  user_id, expires after SESSION_TTL without use
+#                             (every validation renews it: sliding expiry)
+#   sessions          row per login (user_id, session_token, created_at);
+#                     logout sets ended_at and keeps the row. Needs
+#                     ALTER TABLE sessions ADD COLUMN ended_at DATETIME NULL
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
 import uuid
-import pandas as pd
-from datetime import datetime, timedelta
-from db_connection import create_connection
+from datetime import datetime
+
+import redis
 from sqlalchemy import text
- 
+
+from db_connection import create_connection
+from redis_client import redis_client
+import metrics
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(60 * 60 * 4)))  # seconds idle before a session expires (cookie login: 4h)
+SESSION_AUDIT_QUEUE_SIZE = int(os.getenv("SESSION_AUDIT_QUEUE_SIZE", "10000"))
+SESSION_AUDIT_BATCH = int(os.getenv("SESSION_AUDIT_BATCH", "200"))  # rows per MySQL write
+SESSION_AUDIT_FLUSH_INTERVAL = float(os.getenv("SESSION_AUDIT_FLUSH_INTERVAL", "1"))  # seconds a batch may wait
+
+SESSION_KEY = "session:{token}"
+
+AUDIT_SQL = {
+    "create": text("INSERT INTO sessions (user_id, session_token, created_at) VALUES (:user_id, :token, :created_at)"),
+    "end": text("UPDATE sessions SET ended_at = :ended_at WHERE session_token = :token AND ended_at IS NULL"),
+}
+
+metrics.describe("session_validations_total", "Session token validations, by result")
+metrics.describe("session_audit_writes_total", "Session audit rows written to MySQL, by kind and outcome")
+metrics.describe("session_audit_dropped_total", "Session audit rows dropped because the queue was full")
+
+_audit_queue = queue.Queue(maxsize=SESSION_AUDIT_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+
+
+# =========================================================
+# AUDIT WRITER (MySQL, async)
+# =========================================================
+def _write_batch(engine, batch: list):
+    """Writes one batch, creates before ends so a login/logout pair lands in order."""
+    for kind in ("create", "end"):
+        rows = [params for k, params in batch if k == kind]
+        if not rows:
+            continue
+        try:
+            if engine is None:
+                raise RuntimeError("database unavailable")
+            with engine.begin() as conn:
+                conn.execute(AUDIT_SQL[kind], rows)
+            metrics.inc("session_audit_writes_total", len(rows), kind=kind, outcome="ok")
+        except Exception:
+            logger.warning("could not write %d session audit row(s) (%s)", len(rows), kind, exc_info=True)
+            metrics.inc("session_audit_writes_total", len(rows), kind=kind, outcome="error")
+
+
+def _writer_loop():
+    engine = None
+    while True:
+        batch = [_audit_queue.get()]
+        deadline = time.monotonic() + SESSION_AUDIT_FLUSH_INTERVAL
+        while len(batch) < SESSION_AUDIT_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_audit_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            engine = engine or create_connection()
+            _write_batch(engine, batch)
+        finally:
+            for _ in batch:
+                _audit_queue.task_done()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="session-audit", daemon=True)
+            _writer.start()
+
+
+def _audit(kind: str, params: dict):
+    _ensure_writer()
+    try:
+        _audit_queue.put_nowait((kind, params))
+    except queue.Full:
+        metrics.inc("session_audit_dropped_total", kind=kind)
+        logger.warning("session audit queue full, dropping %s row", kind)
+
+
+def flush_audit(timeout: float = 5.0) -> bool:
+    """Waits until queued audit rows are written. True if the queue drained in time."""
+    deadline = time.monotonic() + timeout
+    while _audit_queue.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+atexit.register(flush_audit)
+
+
+# =========================================================
+# SESSIONS
+# =========================================================
 def create_session(user_id: int):
-    """Generate a session token, save it to DB, and return the token."""
-    engine = create_connection()
+    """Generate a session token, store it in Redis, queue its audit row, and return the token."""
     session_token = str(uuid.uuid4())
-    insert_query = "INSERT INTO sessions (user_id, session_token, created_at) VALUES (%s, %s, %s)"
-    with engine.begin() as conn:
-        conn.execute(
-            text("INSERT INTO sessions (user_id, session_token, created_at) VALUES (:user_id, :token, :created_at)"),
-            {"user_id": user_id, "token": session_token, "created_at": datetime.utcnow()}
-        )
+    try:
+        redis_client.set(SESSION_KEY.format(token=session_token), int(user_id), ex=SESSION_TTL)
+    except redis.RedisError:
+        # Cookie login does not depend on it; the token just will not validate
+        logger.warning("could not store session for user %s", user_id, exc_info=True)
+    _audit("create", {"user_id": user_id, "token": session_token, "created_at": datetime.utcnow()})
     return session_token
- 
+
+
 def validate_session(token: str):
-    """Check if a session token exists and is still valid."""
-    engine = create_connection()
-    query = "SELECT * FROM sessions WHERE session_token = %s"
-    session_df = pd.read_sql(query, engine, params=(token,))
-    if session_df.empty:
+    """User id of a live session (renewing its expiry), or None."""
+    if not token:
+        return None
+    try:
+        user_id = redis_client.getex(SESSION_KEY.format(token=token), ex=SESSION_TTL)
+    except redis.RedisError:
+        logger.warning("could not validate session", exc_info=True)
+        metrics.inc("session_validations_total", result="error")
         return None
-    return int(session_df['user_id'].values[0])
- 
+    metrics.inc("session_validations_total", result="valid" if user_id else "invalid")
+    return int(user_id) if user_id else None
+
+
 def delete_session(token: str):
-    """Remove session on logout."""
-    engine = create_connection()
-    delete_query = "DELETE FROM sessions WHERE session_token = %s"
-    with engine.begin() as conn:
-        conn.execute(delete_query, (token,))
\ No newline at end of file
+    """Remove session on logout (the audit row is kept, marked ended)."""
+    try:
+        redis_client.delete(SESSION_KEY.format(token=token))
+    except redis.RedisError:
+        logger.warning("could not delete session", exc_info=True)
+    _audit("end", {"token": token, "ended_at": datetime.utcnow()})
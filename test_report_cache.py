@@ -0,0 +1,27 @@
+# test_report_cache.py
+# A report result packed into a job payload must come back as get_report_result returns it.
+#   python -m pytest -q test_report_cache.py
+import json
+
+import pandas as pd
+
+from report_cache import pack_report_result, unpack_report_result
+
+
+def test_packed_result_survives_a_json_job_payload():
+    aggregates = {"by_state": pd.DataFrame({"State": ["Lagos", "Kano"], "Candidates": [120, 85]})}
+    packed = pack_report_result(
+        aggregates, {"rows": 2}, "Two states.", [("Rows", 2)], {"by_state": b"\x89PNG\r\n"}
+    )
+
+    result = unpack_report_result(json.loads(json.dumps(packed, default=str)))
+
+    pd.testing.assert_frame_equal(result["aggregates"]["by_state"], aggregates["by_state"])
+    assert result["summary_text"] == "Two states."
+    assert result["summary_items"] == [("Rows", 2)]
+    assert result["chart_images"] == {"by_state": b"\x89PNG\r\n"}
+
+
+def test_missing_chart_image_stays_missing():
+    packed = pack_report_result({"c": pd.DataFrame({"a": [1]})}, {}, "", [], {"c": None})
+    assert unpack_report_result(packed)["chart_images"] == {"c": None}
@@ -0,0 +1,78 @@
+# test_report_exports.py
+# Round-trips the report data exports: what is written must read back as the frame.
+#   python -m pytest -q test_report_exports.py
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import report_exports
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _column_index(ref: str) -> int:
+    letters = re.match(r"[A-Z]+", ref).group(0)
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def read_xlsx(path: str) -> list:
+    """Cell values of the first sheet as rows of strings (None for empty cells)."""
+    with zipfile.ZipFile(path) as z:
+        shared = []
+        if "xl/sharedStrings.xml" in z.namelist():
+            for si in ET.fromstring(z.read("xl/sharedStrings.xml")).findall("x:si", NS):
+                shared.append("".join(t.text or "" for t in si.iter(f"{{{NS['x']}}}t")))
+        sheet = ET.fromstring(z.read("xl/worksheets/sheet1.xml"))
+
+    rows = {}
+    for row in sheet.find("x:sheetData", NS).findall("x:row", NS):
+        cells = {}
+        for c in row.findall("x:c", NS):
+            kind = c.get("t")
+            if kind == "s":
+                value = shared[int(c.find("x:v", NS).text)]
+            elif kind == "inlineStr":
+                value = "".join(t.text or "" for t in c.iter(f"{{{NS['x']}}}t"))
+            else:
+                v = c.find("x:v", NS)
+                value = v.text if v is not None else None
+            cells[_column_index(c.get("r"))] = value
+        rows[int(row.get("r")) - 1] = cells
+
+    width = max((max(cells) + 1 for cells in rows.values() if cells), default=0)
+    return [[rows.get(r, {}).get(col) for col in range(width)] for r in range(max(rows) + 1)]
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "State": ["Lagos", "Kano", "Oyo", "Abia", "Edo"],
+        "Candidates": np.array([120, 85, 64, 30, 12], dtype="int64"),
+        "PassRate": [0.51, np.nan, 0.66, 0.25, 0.8],
+    })
+
+
+@pytest.mark.skipif(report_exports.EXCEL_ENGINE is None, reason="no Excel writer installed")
+@pytest.mark.parametrize("chunk_rows", [2, report_exports.EXPORT_CHUNK_ROWS])
+def test_xlsx_export_reads_back_as_the_frame(tmp_path, monkeypatch, frame, chunk_rows):
+    monkeypatch.setattr(report_exports._chunks, "__defaults__", (chunk_rows,))
+    path = str(tmp_path / "export.xlsx")
+    report_exports.WRITERS["xlsx"](frame, path)
+
+    rows = read_xlsx(path)
+    assert rows[0] == list(frame.columns)
+    assert len(rows) == len(frame) + 1
+    for written, (_, expected) in zip(rows[1:], frame.iterrows()):
+        assert written[0] == expected["State"]
+        assert int(float(written[1])) == expected["Candidates"]
+        if pd.isna(expected["PassRate"]):
+            assert written[2] is None
+        else:
+            assert float(written[2]) == pytest.approx(expected["PassRate"])
@@ -1,23 +1,56 @@
 ## import necessary libraries
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from io import BytesIO
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import SimpleDocTemplate
 from PyPDF2 import PdfReader, PdfWriter
 import reportlab.lib.colors as colors
-from PIL import Image
- 
-# define watermark function
-def watermark(input_pdf_stream, text = None, image_path = None):
-    reader = PdfReader(input_pdf_stream)
-    first_page = reader.pages[0]
-    width = float(first_page.mediabox.width)
-    height = float(first_page.mediabox.height)
- 
-    watermark_buffer = BytesIO()
-    # define page size
-    c = canvas.Canvas(watermark_buffer, pagesize=(width, height))
-   
- 
+from reportlab import rl_config
+
+_a85_lock = threading.Lock()
+_a85_users = 0
+_a85_saved = rl_config.useA85
+
+
+@contextmanager
+def binary_streams():
+    """
+    Embeds streams as binary instead of ASCII85 text while active. The
+    pure-Python ASCII85 encoder dominated every watermarked build (the logo
+    is re-encoded per PDF); binary is ~4x faster and ~20% smaller.
+    reportlab only reads this from rl_config, so overlapping builds are
+    counted and the previous setting comes back when the last one ends.
+    """
+    global _a85_users, _a85_saved
+    with _a85_lock:
+        if _a85_users == 0:
+            _a85_saved = rl_config.useA85
+            rl_config.useA85 = 0
+        _a85_users += 1
+    try:
+        yield
+    finally:
+        with _a85_lock:
+            _a85_users -= 1
+            if _a85_users == 0:
+                rl_config.useA85 = _a85_saved
+
+
+# ---------------------------------------------------------
+# Drawing (shared by both watermarking modes)
+# ---------------------------------------------------------
+@lru_cache(maxsize=8)
+def watermark_image(image_path):
+    """Decoded watermark image, loaded once per process."""
+    return ImageReader(image_path)
+
+
+def draw_watermark(c, width, height, text=None, image_path=None):
+    """Draws the watermark centred on the current page of canvas `c`."""
+    c.saveState()
     # condition to check if text or image is provided
     if text:
         # text watermark
@@ -26,51 +59,100 @@ def watermark(input_pdf_stream, text = None, image_path = None):
         c.translate(width/2, height/2)  # move origin to center of page
         c.rotate(45)  # rotate text
         c.drawCentredString(0, 0, text)  # draw the watermark text
- 
+
     # image watermark
     elif image_path:
         logo_width, logo_height = width * 0.7, height * 0.3
         x = -logo_width / 2
         y = -logo_height / 2
- 
+
         c.translate(width/2, height/2)  # move origin to center of page
         c.rotate(40)  # rotate image
-        c.drawImage(image_path,
+        c.drawImage(watermark_image(image_path),
                     x = x,
                     y = y,
                     width=logo_width,
                     height=logo_height,
                     mask='auto')
- 
-    c.save()
-    # save watermark PDF to buffer
-    watermark_buffer.seek(0)
-    return watermark_buffer
-    # image watermark
- 
+    c.restoreState()
+
+
+# ---------------------------------------------------------
+# One-pass mode: watermark drawn while reportlab builds the PDF
+# ---------------------------------------------------------
+class WatermarkedDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate that stamps the watermark on top of every page as it
+    is finished (page-end hook), so the PDF never needs a second pass.
+    """
+
+    def __init__(self, filename, watermarktext=None, watermark_image_path=None, **kwargs):
+        if not(watermarktext or watermark_image_path):
+            raise ValueError("Either watermarktext or watermark_image_path must be provided.")
+        self.watermarktext = watermarktext
+        self.watermark_image_path = watermark_image_path
+        super().__init__(filename, **kwargs)
+
+    def build(self, flowables, *args, **kwargs):
+        with binary_streams():
+            return super().build(flowables, *args, **kwargs)
+
+    def afterPage(self):
+        width, height = self.canv._pagesize
+        draw_watermark(self.canv, width, height, text=self.watermarktext, image_path=self.watermark_image_path)
+
+
+# ---------------------------------------------------------
+# Post-merge mode: only for PDFs we did not build ourselves
+# ---------------------------------------------------------
+@lru_cache(maxsize=32)
+def _watermark_pdf_bytes(width, height, text=None, image_path=None):
+    """One-page watermark PDF for a page size, built once and reused."""
+    watermark_buffer = BytesIO()
+    with binary_streams():
+        # define page size
+        c = canvas.Canvas(watermark_buffer, pagesize=(width, height))
+        draw_watermark(c, width, height, text=text, image_path=image_path)
+        c.save()
+    return watermark_buffer.getvalue()
+
+
+# define watermark function
+def watermark(input_pdf_stream, text = None, image_path = None):
+    """Watermark page (as a PDF stream) sized like the input's first page."""
+    reader = PdfReader(input_pdf_stream)
+    first_page = reader.pages[0]
+    width = float(first_page.mediabox.width)
+    height = float(first_page.mediabox.height)
+    return BytesIO(_watermark_pdf_bytes(width, height, text, image_path))
+
+
 # define add_watermark function
 def add_watermark(input_pdf_stream, watermarktext=None, watermark_image_path=None):
+    """
+    Merges the watermark onto every page of an existing PDF. For PDFs built
+    here, prefer WatermarkedDocTemplate (no re-parse, no re-serialize).
+    """
     # adds image
     if not(watermarktext or watermark_image_path):
         raise ValueError("Either watermarktext or watermark_image_path must be provided.")
-   
-    # create watermark PDF
-    watermark_pdf = watermark(input_pdf_stream, text=watermarktext, image_path=watermark_image_path)
-    watermark_reader = PdfReader(watermark_pdf)
-    watermark_page = watermark_reader.pages[0]
- 
-    # read input PDF
+
+    # read input PDF once
     reader = PdfReader(input_pdf_stream)
     writer = PdfWriter()
- 
-    # merge watermark with each page
-    for page_num in range(len(reader.pages)):
-        page = reader.pages[page_num]
-        page.merge_page(watermark_page)
+
+    # merge watermark with each page (one cached watermark page per page size)
+    watermark_pages = {}
+    for page in reader.pages:
+        size = (float(page.mediabox.width), float(page.mediabox.height))
+        if size not in watermark_pages:
+            watermark_bytes = _watermark_pdf_bytes(size[0], size[1], watermarktext, watermark_image_path)
+            watermark_pages[size] = PdfReader(BytesIO(watermark_bytes)).pages[0]
+        page.merge_page(watermark_pages[size])
         writer.add_page(page)
- 
+
     # write to output PDF stream
     output_pdf_stream = BytesIO()
     writer.write(output_pdf_stream)
     output_pdf_stream.seek(0)
-    return output_pdf_stream
\ No newline at end of file
+    return output_pdf_stream